@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Any
 from uuid import UUID
 
@@ -6,14 +6,31 @@ import orjson
 from cassandra.query import timezone
 from clickhouse_connect.driver.asyncclient import AsyncClient
 
-from app.core.constants import AnalyticsEventType
+from app.core.constants import Accuracy, AnalyticsEventType, TimeBucket
 from app.domain.entities.analytics_event import AnalyticsEvent
 from app.domain.entities.room_stats import RoomStats
 
+BUCKET_SECONDS = {TimeBucket.MINUTE: 60, TimeBucket.HOUR: 3600, TimeBucket.DAY: 86400}
+# sampled reads count exactly within the sample, only exact and approximate
+# differ in the distinct function itself
+UNIQ = {
+    Accuracy.EXACT: "uniqExact",
+    Accuracy.APPROXIMATE: "uniqCombined",
+    Accuracy.SAMPLED: "uniqExact",
+}
+ROLLUP_UNIQ = {
+    Accuracy.EXACT: ("uniqExactMerge", ""),
+    Accuracy.APPROXIMATE: ("uniqCombinedMerge", "approx_"),
+}
+
 
 class ClickHouseAnalyticsRepository:
-    def __init__(self, client: AsyncClient):
+    def __init__(self, client: AsyncClient, sample_rate: float):
         self._client = client
+        self._sample_rate = sample_rate
+
+    def _rate(self, accuracy: Accuracy) -> float:
+        return self._sample_rate if accuracy is Accuracy.SAMPLED else 1.0
 
     async def publish_event(self, event: AnalyticsEvent) -> None:
         payload_serialized = None
@@ -42,21 +59,20 @@ class ClickHouseAnalyticsRepository:
             ],
         )
 
-    async def get_room_stats(self, room_id: UUID) -> RoomStats | None:
-        event_type = AnalyticsEventType.MESSAGE_SENT.value
-        query = """
+    async def get_room_stats(
+        self, room_id: UUID, accuracy: Accuracy = Accuracy.EXACT
+    ) -> RoomStats | None:
+        merge, state = ROLLUP_UNIQ[accuracy]
+        query = f"""
                 SELECT
-                    COUNT(*) AS total_messages,
-                    uniqExact(user_id) AS users_amount,
-                    MAX(created_at) AS last_updated
-                FROM analytics_events
+                    sum(total_messages) AS total_messages,
+                    {merge}(users_{state}state) AS users_amount,
+                    max(last_updated) AS last_updated
+                FROM room_stats_agg
                 WHERE room_id = %(room_id)s
-                  AND event_type = %(event_type)s
-                """
+                """  # noqa: S608
 
-        result = await self._client.query(
-            query, {"room_id": str(room_id), "event_type": event_type}
-        )
+        result = await self._client.query(query, {"room_id": str(room_id)})
 
         if not result.result_rows:
             return None
@@ -69,23 +85,19 @@ class ClickHouseAnalyticsRepository:
             last_updated=row["last_updated"],
         )
 
-    async def get_user_activity(self, user_id: UUID) -> dict[str, int] | None:
-        query = """
+    async def get_user_activity(
+        self, user_id: UUID, accuracy: Accuracy = Accuracy.EXACT
+    ) -> dict[str, int] | None:
+        merge, state = ROLLUP_UNIQ[accuracy]
+        query = f"""
                 SELECT
-                    COUNTIf(event_type = %(message_sent)s) AS messages,
-                    uniqExactIf(room_id, event_type = %(user_joined)s) AS rooms_joined
-                FROM analytics_events
+                    sum(messages) AS messages,
+                    {merge}(rooms_joined_{state}state) AS rooms_joined
+                FROM user_activity_agg
                 WHERE user_id = %(user_id)s
-                """
+                """  # noqa: S608
 
-        result = await self._client.query(
-            query,
-            {
-                "user_id": str(user_id),
-                "message_sent": AnalyticsEventType.MESSAGE_SENT.value,
-                "user_joined": AnalyticsEventType.USER_JOINED_ROOM.value,
-            },
-        )
+        result = await self._client.query(query, {"user_id": str(user_id)})
 
         if not result.result_rows:
             return None
@@ -96,23 +108,23 @@ class ClickHouseAnalyticsRepository:
             "rooms_joined": row["rooms_joined"] or 0,
         }
 
-    async def top_active_rooms(self, limit: int) -> list[RoomStats]:
-        query = """
+    async def top_active_rooms(
+        self, limit: int, accuracy: Accuracy = Accuracy.EXACT
+    ) -> list[RoomStats]:
+        merge, state = ROLLUP_UNIQ[accuracy]
+        query = f"""
                 SELECT
                     room_id,
-                    COUNT(*) AS total_messages,
-                    uniqExact(user_id) AS users_amount,
-                    MAX(created_at) AS last_updated
-                FROM analytics_events
-                WHERE event_type = %(event_type)s
+                    sum(total_messages) AS total_messages,
+                    {merge}(users_{state}state) AS users_amount,
+                    max(last_updated) AS last_updated
+                FROM room_stats_agg
                 GROUP BY room_id
                 ORDER BY total_messages DESC
                 LIMIT %(limit)s
-                """
+                """  # noqa: S608
 
-        result = await self._client.query(
-            query, {"event_type": AnalyticsEventType.MESSAGE_SENT.value, "limit": limit}
-        )
+        result = await self._client.query(query, {"limit": limit})
 
         return [
             RoomStats(
@@ -129,20 +141,15 @@ class ClickHouseAnalyticsRepository:
         since_str = since_time.strftime("%Y-%m-%d %H:%M:%S")
 
         query = """
-                SELECT COUNT(*) AS cnt
-                FROM analytics_events
+                SELECT sum(messages) AS cnt
+                FROM room_activity_1m
                 WHERE room_id = %(room_id)s
-                  AND event_type = %(event_type)s
-                  AND created_at >= toDateTime(%(since_time)s)
+                  AND minute >= toStartOfMinute(toDateTime(%(since_time)s))
                 """
 
         result = await self._client.query(
             query,
-            parameters={
-                "room_id": str(room_id),
-                "event_type": AnalyticsEventType.MESSAGE_SENT.value,
-                "since_time": since_str,
-            },
+            parameters={"room_id": str(room_id), "since_time": since_str},
         )
 
         if not result.result_rows:
@@ -151,32 +158,117 @@ class ClickHouseAnalyticsRepository:
         row = next(result.named_results())
         return int(row["cnt"])
 
-    async def get_user_retention(self, days: int) -> float:
-        since_time = datetime.now(timezone.utc) - timedelta(days=days)
-        since_str = since_time.strftime("%Y-%m-%d %H:%M:%S")
-
+    async def get_room_activity(
+        self, room_id: UUID, start: datetime, end: datetime, bucket: TimeBucket
+    ) -> list[tuple[datetime, int]]:
+        # the minute filter prunes the monthly partitions of the rollup
         query = """
+                SELECT
+                    toStartOfInterval(minute, toIntervalSecond(%(step)s)) AS bucket,
+                    sum(messages) AS messages
+                FROM room_activity_1m
+                WHERE room_id = %(room_id)s
+                  AND minute >= toDateTime(%(start)s)
+                  AND minute < toDateTime(%(end)s)
+                GROUP BY bucket
+                ORDER BY bucket
+                """
+
+        result = await self._client.query(
+            query,
+            parameters={
+                "room_id": str(room_id),
+                "step": BUCKET_SECONDS[bucket],
+                "start": start.strftime("%Y-%m-%d %H:%M:%S"),
+                "end": end.strftime("%Y-%m-%d %H:%M:%S"),
+            },
+        )
+        return [(row["bucket"], int(row["messages"])) for row in result.named_results()]
+
+    async def get_user_retention(
+        self, days: int, accuracy: Accuracy = Accuracy.EXACT
+    ) -> float:
+        since_day = (datetime.now(timezone.utc) - timedelta(days=days)).date()
+
+        # both sides sample the same user hash range, the ratio needs no scaling
+        query = f"""
                     SELECT
-                        uniqExact(user_id) AS active,
-                        (SELECT uniqExact(user_id) FROM analytics_events
-                         WHERE event_type = %(registered_event)s) AS total
-                    FROM analytics_events
-                    WHERE event_type = %(login_event)s
-                      AND created_at >= toDateTime(%(since_time)s)
-                    """
+                        (SELECT {UNIQ[accuracy]}(user_id)
+                         FROM user_active_days SAMPLE %(rate)s
+                         WHERE day >= %(since_day)s) AS active,
+                        (SELECT {UNIQ[accuracy]}(user_id)
+                         FROM user_cohorts SAMPLE %(rate)s) AS total
+                    """  # noqa: S608
 
         result = await self._client.query(
             query,
             parameters={
-                "registered_event": AnalyticsEventType.USER_REGISTERED.value,
-                "login_event": AnalyticsEventType.USER_LOGGED_IN.value,
-                "since_time": since_str,
+                "since_day": since_day.isoformat(),
+                "rate": self._rate(accuracy),
             },
         )
 
         row = next(result.named_results())
         return (row["active"] / row["total"]) * 100 if row["total"] else 0.0
 
+    async def get_cohort_sizes(
+        self, start: date, end: date, accuracy: Accuracy = Accuracy.EXACT
+    ) -> dict[date, int]:
+        query = f"""
+                SELECT
+                    cohort_day,
+                    round({UNIQ[accuracy]}(user_id) / %(rate)s) AS users
+                FROM user_cohorts SAMPLE %(rate)s
+                WHERE cohort_day BETWEEN %(start)s AND %(end)s
+                GROUP BY cohort_day
+                """  # noqa: S608
+
+        result = await self._client.query(
+            query,
+            parameters={
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                "rate": self._rate(accuracy),
+            },
+        )
+        return {row["cohort_day"]: int(row["users"]) for row in result.named_results()}
+
+    async def get_cohort_activity(
+        self, start: date, end: date, accuracy: Accuracy = Accuracy.EXACT
+    ) -> list[tuple[date, int, int]]:
+        # both sides are read by their sort key prefix, only the cohorts of the
+        # range and the active days after the first of them are touched. Sampling
+        # by the user hash keeps the same users on both sides of the join
+        query = f"""
+                SELECT
+                    c.cohort_day AS cohort_day,
+                    toUInt32(a.day - c.cohort_day) AS day_offset,
+                    round({UNIQ[accuracy]}(a.user_id) / %(rate)s) AS users
+                FROM user_active_days AS a SAMPLE %(rate)s
+                INNER JOIN (
+                    SELECT user_id, min(cohort_day) AS cohort_day
+                    FROM user_cohorts SAMPLE %(rate)s
+                    WHERE cohort_day BETWEEN %(start)s AND %(end)s
+                    GROUP BY user_id
+                ) AS c ON a.user_id = c.user_id
+                WHERE a.day BETWEEN %(start)s AND %(end)s
+                  AND a.day >= c.cohort_day
+                GROUP BY cohort_day, day_offset
+                """  # noqa: S608
+
+        result = await self._client.query(
+            query,
+            parameters={
+                "start": start.isoformat(),
+                "end": end.isoformat(),
+                "rate": self._rate(accuracy),
+            },
+        )
+        return [
+            (row["cohort_day"], int(row["day_offset"]), int(row["users"]))
+            for row in result.named_results()
+        ]
+
     async def message_edit_delete_ratio(self) -> dict[str, float]:
         query = """
                     SELECT
@@ -202,25 +294,21 @@ class ClickHouseAnalyticsRepository:
             "delete_ratio": row["deleted"] / sent,
         }
 
-    async def top_social_users(self, limit: int = 10) -> list[dict[str, Any]]:
-        query = """
+    async def top_social_users(
+        self, limit: int = 10, accuracy: Accuracy = Accuracy.EXACT
+    ) -> list[dict[str, Any]]:
+        merge, state = ROLLUP_UNIQ[accuracy]
+        query = f"""
                 SELECT
                     user_id,
-                    uniqExact(room_id) AS rooms,
-                    COUNTIf(event_type = %(sent_event)s) AS messages
-                FROM analytics_events
-                WHERE user_id IS NOT NULL
+                    {merge}(rooms_{state}state) AS rooms,
+                    sum(messages) AS messages
+                FROM user_activity_agg
                 GROUP BY user_id
                 ORDER BY rooms DESC, messages DESC
                 LIMIT %(limit)s
-                """
+                """  # noqa: S608
 
-        result = await self._client.query(
-            query,
-            parameters={
-                "sent_event": AnalyticsEventType.MESSAGE_SENT.value,
-                "limit": limit,
-            },
-        )
+        result = await self._client.query(query, parameters={"limit": limit})
 
         return list(result.named_results())
@@ -0,0 +1,225 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable, Mapping
+from datetime import date, datetime
+from typing import Any, TypeVar, cast
+from uuid import UUID
+
+import structlog
+
+from app.core.constants import Accuracy, TimeBucket
+from app.core.metrics import get_metrics
+from app.domain.entities.analytics_event import AnalyticsEvent
+from app.domain.entities.room_stats import RoomStats
+from app.domain.ports.analytics import AnalyticsPort
+
+logger = structlog.get_logger(__name__)
+
+T = TypeVar("T")
+
+
+class AnalyticsResultCache:
+    def __init__(
+        self, max_size: int, stale_seconds: float, max_concurrency: int
+    ) -> None:
+        self._max_size = max_size
+        self._stale_seconds = stale_seconds
+        # value, fresh until, servable until
+        self._entries: OrderedDict[Hashable, tuple[Any, float, float]] = OrderedDict()
+        self._loading: dict[Hashable, asyncio.Task[Any]] = {}
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+        metrics = get_metrics()
+        self._hits = metrics.counter(
+            "analytics_cache_hits_total", "Analytics results served fresh from cache"
+        )
+        self._stale = metrics.counter(
+            "analytics_cache_stale_total",
+            "Analytics results served stale while refreshing",
+        )
+        self._misses = metrics.counter(
+            "analytics_cache_misses_total", "Analytics results read from ClickHouse"
+        )
+
+    async def get_or_load(
+        self, key: Hashable, ttl: float, loader: Callable[[], Awaitable[T]]
+    ) -> T:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, fresh_until, stale_until = entry
+            if now < fresh_until:
+                self._entries.move_to_end(key)
+                self._hits.inc()
+                return cast(T, value)
+            if now < stale_until:
+                self._entries.move_to_end(key)
+                self._stale.inc()
+                self._load(key, ttl, loader)
+                return cast(T, value)
+            del self._entries[key]
+
+        self._misses.inc()
+        # a caller that goes away must not cancel the load others wait on
+        return cast(T, await asyncio.shield(self._load(key, ttl, loader)))
+
+    def _load(
+        self, key: Hashable, ttl: float, loader: Callable[[], Awaitable[T]]
+    ) -> asyncio.Task[Any]:
+        task = self._loading.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch(key, ttl, loader))
+            self._loading[key] = task
+            task.add_done_callback(lambda done: self._loaded(key, done))
+        return task
+
+    async def _fetch(
+        self, key: Hashable, ttl: float, loader: Callable[[], Awaitable[T]]
+    ) -> T:
+        async with self._slots:
+            value = await loader()
+        now = time.monotonic()
+        self._entries[key] = (value, now + ttl, now + ttl + self._stale_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+        return value
+
+    def _loaded(self, key: Hashable, task: asyncio.Task[Any]) -> None:
+        self._loading.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.bind(key=key, error=str(task.exception())).warning(
+                "Analytics cache load failed"
+            )
+
+
+class CachedAnalyticsRepository:
+    def __init__(
+        self,
+        analytics: AnalyticsPort,
+        cache: AnalyticsResultCache,
+        ttl_seconds: Mapping[str, float],
+    ):
+        self._analytics = analytics
+        self._cache = cache
+        self._ttl_seconds = ttl_seconds
+
+    async def _cached(
+        self, method: str, loader: Callable[[], Awaitable[T]], *params: Hashable
+    ) -> T:
+        ttl = self._ttl_seconds.get(method)
+        if not ttl:
+            return await loader()
+        return await self._cache.get_or_load((method, *params), ttl, loader)
+
+    async def publish_event(self, event: AnalyticsEvent) -> None:
+        await self._analytics.publish_event(event)
+
+    async def get_room_stats(
+        self, room_id: UUID, accuracy: Accuracy = Accuracy.EXACT
+    ) -> RoomStats | None:
+        return await self._cached(
+            "get_room_stats",
+            lambda: self._analytics.get_room_stats(room_id=room_id, accuracy=accuracy),
+            room_id,
+            accuracy,
+        )
+
+    async def get_user_activity(
+        self, user_id: UUID, accuracy: Accuracy = Accuracy.EXACT
+    ) -> dict[str, int] | None:
+        return await self._cached(
+            "get_user_activity",
+            lambda: self._analytics.get_user_activity(
+                user_id=user_id, accuracy=accuracy
+            ),
+            user_id,
+            accuracy,
+        )
+
+    async def top_active_rooms(
+        self, limit: int, accuracy: Accuracy = Accuracy.EXACT
+    ) -> list[RoomStats]:
+        return await self._cached(
+            "top_active_rooms",
+            lambda: self._analytics.top_active_rooms(limit=limit, accuracy=accuracy),
+            limit,
+            accuracy,
+        )
+
+    async def messages_per_minute(self, room_id: UUID, since_minutes: int) -> int:
+        return await self._cached(
+            "messages_per_minute",
+            lambda: self._analytics.messages_per_minute(
+                room_id=room_id, since_minutes=since_minutes
+            ),
+            room_id,
+            since_minutes,
+        )
+
+    async def get_room_activity(
+        self, room_id: UUID, start: datetime, end: datetime, bucket: TimeBucket
+    ) -> list[tuple[datetime, int]]:
+        return await self._cached(
+            "get_room_activity",
+            lambda: self._analytics.get_room_activity(
+                room_id=room_id, start=start, end=end, bucket=bucket
+            ),
+            room_id,
+            start,
+            end,
+            bucket,
+        )
+
+    async def get_user_retention(
+        self, days: int, accuracy: Accuracy = Accuracy.EXACT
+    ) -> float:
+        return await self._cached(
+            "get_user_retention",
+            lambda: self._analytics.get_user_retention(days=days, accuracy=accuracy),
+            days,
+            accuracy,
+        )
+
+    async def get_cohort_sizes(
+        self, start: date, end: date, accuracy: Accuracy = Accuracy.EXACT
+    ) -> dict[date, int]:
+        return await self._cached(
+            "get_cohort_sizes",
+            lambda: self._analytics.get_cohort_sizes(
+                start=start, end=end, accuracy=accuracy
+            ),
+            start,
+            end,
+            accuracy,
+        )
+
+    async def get_cohort_activity(
+        self, start: date, end: date, accuracy: Accuracy = Accuracy.EXACT
+    ) -> list[tuple[date, int, int]]:
+        return await self._cached(
+            "get_cohort_activity",
+            lambda: self._analytics.get_cohort_activity(
+                start=start, end=end, accuracy=accuracy
+            ),
+            start,
+            end,
+            accuracy,
+        )
+
+    async def message_edit_delete_ratio(self) -> dict[str, float]:
+        return await self._cached(
+            "message_edit_delete_ratio",
+            self._analytics.message_edit_delete_ratio,
+        )
+
+    async def top_social_users(
+        self, limit: int = 10, accuracy: Accuracy = Accuracy.EXACT
+    ) -> list[dict[str, Any]]:
+        return await self._cached(
+            "top_social_users",
+            lambda: self._analytics.top_social_users(limit=limit, accuracy=accuracy),
+            limit,
+            accuracy,
+        )
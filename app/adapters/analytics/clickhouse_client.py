@@ -1,6 +1,7 @@
 import clickhouse_connect
 import structlog
 from clickhouse_connect.driver.asyncclient import AsyncClient
+from clickhouse_connect.driver.exceptions import DatabaseError
 
 from app.core.settings import get_settings
 
@@ -11,6 +12,283 @@ async def ensure_database(client: AsyncClient, db_name: str) -> None:
     await client.command(f"CREATE DATABASE IF NOT EXISTS {db_name}")
 
 
+# Bump a rollup's version whenever its schema or select changes, the rollup is
+# then rebuilt from analytics_events on the next startup.
+ROLLUPS = (
+    (
+        "room_stats_agg",
+        2,
+        """
+        (
+            room_id UUID,
+            total_messages SimpleAggregateFunction(sum, UInt64),
+            users_state AggregateFunction(uniqExact, UUID),
+            users_approx_state AggregateFunction(uniqCombined, UUID),
+            last_updated SimpleAggregateFunction(max, DateTime64(3))
+        ) ENGINE = AggregatingMergeTree()
+        ORDER BY room_id
+        """,
+        """
+        SELECT
+            room_id,
+            toUInt64(count()) AS total_messages,
+            uniqExactState(user_id) AS users_state,
+            uniqCombinedState(user_id) AS users_approx_state,
+            max(created_at) AS last_updated
+        FROM analytics_events
+        """,
+        "event_type = 'MESSAGE_SENT'",
+        "room_id",
+    ),
+    (
+        "user_activity_agg",
+        2,
+        """
+        (
+            user_id UUID,
+            messages SimpleAggregateFunction(sum, UInt64),
+            rooms_joined_state AggregateFunction(uniqExact, UUID),
+            rooms_state AggregateFunction(uniqExact, UUID),
+            rooms_joined_approx_state AggregateFunction(uniqCombined, UUID),
+            rooms_approx_state AggregateFunction(uniqCombined, UUID)
+        ) ENGINE = AggregatingMergeTree()
+        ORDER BY user_id
+        """,
+        """
+        SELECT
+            user_id,
+            toUInt64(countIf(event_type = 'MESSAGE_SENT')) AS messages,
+            uniqExactIfState(room_id, event_type = 'USER_JOINED_ROOM')
+                AS rooms_joined_state,
+            uniqExactState(room_id) AS rooms_state,
+            uniqCombinedIfState(room_id, event_type = 'USER_JOINED_ROOM')
+                AS rooms_joined_approx_state,
+            uniqCombinedState(room_id) AS rooms_approx_state
+        FROM analytics_events
+        """,
+        "1",
+        "user_id",
+    ),
+    (
+        "room_activity_1m",
+        1,
+        """
+        (
+            room_id UUID,
+            minute DateTime,
+            messages UInt64
+        ) ENGINE = SummingMergeTree()
+        PARTITION BY toYYYYMM(minute)
+        ORDER BY (room_id, minute)
+        """,
+        """
+        SELECT
+            room_id,
+            toStartOfMinute(created_at) AS minute,
+            toUInt64(count()) AS messages
+        FROM analytics_events
+        """,
+        "event_type = 'MESSAGE_SENT'",
+        "room_id, minute",
+    ),
+    (
+        "user_cohorts",
+        1,
+        """
+        (
+            cohort_day Date,
+            user_id UUID
+        ) ENGINE = ReplacingMergeTree()
+        ORDER BY (cohort_day, cityHash64(user_id), user_id)
+        SAMPLE BY cityHash64(user_id)
+        """,
+        """
+        SELECT
+            toDate(min(created_at)) AS cohort_day,
+            user_id
+        FROM analytics_events
+        """,
+        "event_type = 'USER_REGISTERED'",
+        "user_id",
+    ),
+    (
+        "user_active_days",
+        1,
+        """
+        (
+            day Date,
+            user_id UUID
+        ) ENGINE = ReplacingMergeTree()
+        PARTITION BY toYYYYMM(day)
+        ORDER BY (day, cityHash64(user_id), user_id)
+        SAMPLE BY cityHash64(user_id)
+        """,
+        """
+        SELECT
+            toDate(created_at) AS day,
+            user_id
+        FROM analytics_events
+        """,
+        "event_type = 'USER_LOGGED_IN'",
+        "day, user_id",
+    ),
+)
+
+
+async def _rollup_backfill_state(
+    client: AsyncClient, table: str
+) -> tuple[int, int, bool] | None:
+    result = await client.query(
+        "SELECT version, cutoff_ms, done FROM rollup_backfills FINAL "
+        "WHERE table = %(table)s",
+        parameters={"table": table},
+    )
+    if not result.result_rows:
+        return None
+    version, cutoff_ms, done = result.result_rows[0]
+    return int(version), int(cutoff_ms), bool(done)
+
+
+async def _mark_rollup_backfill(
+    client: AsyncClient, table: str, version: int, cutoff_ms: int, done: bool
+) -> None:
+    await client.command(
+        "INSERT INTO rollup_backfills (table, version, cutoff_ms, done, updated_at) "
+        "VALUES (%(table)s, %(version)s, %(cutoff_ms)s, %(done)s, now64(3))",
+        parameters={
+            "table": table,
+            "version": version,
+            "cutoff_ms": cutoff_ms,
+            "done": int(done),
+        },
+    )
+
+
+async def _claim_rollup(client: AsyncClient, staging: str, schema: str) -> bool:
+    # the staging table doubles as the claim, only one worker can create it,
+    # a claim older than the timeout was left behind by a crashed worker
+    for _ in range(2):
+        try:
+            await client.command(f"CREATE TABLE {staging} {schema}")
+            return True
+        except DatabaseError:
+            result = await client.query(
+                "SELECT dateDiff('second', metadata_modification_time, now()) "
+                "FROM system.tables "
+                "WHERE database = currentDatabase() AND name = %(name)s",
+                parameters={"name": staging},
+            )
+            if not result.result_rows:
+                raise
+            if (
+                result.result_rows[0][0]
+                < get_settings().clickhouse_rollup_claim_timeout_seconds
+            ):
+                return False
+            await client.command(f"DROP TABLE IF EXISTS {staging}")
+    return False
+
+
+async def _attach_backfill(
+    client: AsyncClient, table: str, staging: str, cutoff_ms: int
+) -> None:
+    # rollups are either unpartitioned or partitioned by toYYYYMM, a month
+    # before the cutoff month holds no view rows and is replaced, which is
+    # idempotent, the one partition shared with the view is attached last
+    result = await client.query(
+        "SELECT DISTINCT partition_id FROM system.parts "
+        "WHERE database = currentDatabase() AND table = %(table)s AND active",
+        parameters={"table": staging},
+    )
+    cutoff_month = (
+        await client.query(
+            f"SELECT toString(toYYYYMM(fromUnixTimestamp64Milli({cutoff_ms})))"
+        )
+    ).result_rows[0][0]
+    partitions = sorted(row[0] for row in result.result_rows)
+    for partition_id in partitions:
+        action = (
+            "REPLACE"
+            if partition_id != "all" and partition_id < cutoff_month
+            else "ATTACH"
+        )
+        await client.command(
+            f"ALTER TABLE {table} {action} PARTITION ID %(partition)s FROM {staging}",
+            parameters={"partition": partition_id},
+        )
+
+
+async def ensure_rollup(
+    client: AsyncClient,
+    table: str,
+    version: int,
+    schema: str,
+    select: str,
+    where: str,
+    group_by: str,
+) -> None:
+    await client.command(f"CREATE TABLE IF NOT EXISTS {table} {schema}")
+    state = await _rollup_backfill_state(client=client, table=table)
+    if state is not None and state[0] == version and state[2]:
+        return
+
+    view = f"{table}_mv"
+    staging = f"{table}_backfill"
+    if not await _claim_rollup(client=client, staging=staging, schema=schema):
+        return
+
+    # another worker may have finished between the first read and the claim
+    state = await _rollup_backfill_state(client=client, table=table)
+    if state is not None and state[0] == version and state[2]:
+        await client.command(f"DROP TABLE IF EXISTS {staging}")
+        return
+
+    if state is None or state[0] != version:
+        # an older schema, or a view without a marker (it predates the marker
+        # or a crash hit before its cutoff was recorded) is rebuilt from
+        # analytics_events, its rows cannot be told apart from the backfill
+        await client.command(f"DROP VIEW IF EXISTS {view}")
+        await client.command(f"DROP TABLE IF EXISTS {table}")
+        await client.command(f"CREATE TABLE {table} {schema}")
+        result = await client.query("SELECT toUnixTimestamp64Milli(now64(3))")
+        cutoff_ms = int(result.result_rows[0][0])
+        await client.command(
+            f"CREATE MATERIALIZED VIEW {view} TO {table} AS {select} "
+            f"WHERE {where} AND created_at >= fromUnixTimestamp64Milli({cutoff_ms}) "
+            f"GROUP BY {group_by}"
+        )
+        await _mark_rollup_backfill(
+            client=client,
+            table=table,
+            version=version,
+            cutoff_ms=cutoff_ms,
+            done=False,
+        )
+    else:
+        cutoff_ms = state[1]
+
+    # the view and the backfill split analytics_events on the same cutoff,
+    # the backfill lands in the staging table first so a crash midway only
+    # leaves the claim behind
+    await client.command(
+        f"INSERT INTO {staging} {select} "
+        f"WHERE {where} AND created_at < fromUnixTimestamp64Milli({cutoff_ms}) "
+        f"GROUP BY {group_by}"
+    )
+    await _attach_backfill(
+        client=client, table=table, staging=staging, cutoff_ms=cutoff_ms
+    )
+    await _mark_rollup_backfill(
+        client=client,
+        table=table,
+        version=version,
+        cutoff_ms=cutoff_ms,
+        done=True,
+    )
+    await client.command(f"DROP TABLE IF EXISTS {staging}")
+    logger.bind(table=table).info("ClickHouse rollup created and backfilled")
+
+
 async def ensure_tables(client: AsyncClient) -> None:
     await client.command("""
     CREATE TABLE IF NOT EXISTS analytics_events (
@@ -25,6 +303,31 @@ async def ensure_tables(client: AsyncClient) -> None:
     ORDER BY (event_type, room_id, created_at)
     SETTINGS index_granularity = 8192
     """)
+    await client.command("""
+    CREATE TABLE IF NOT EXISTS rollup_backfills (
+        table String,
+        version UInt32,
+        cutoff_ms Int64,
+        done UInt8,
+        updated_at DateTime64(3)
+    ) ENGINE = ReplacingMergeTree(updated_at)
+    ORDER BY table
+    """)
+    for table, version, schema, select, where, group_by in ROLLUPS:
+        await ensure_rollup(
+            client=client,
+            table=table,
+            version=version,
+            schema=schema,
+            select=select,
+            where=where,
+            group_by=group_by,
+        )
+    # a full copy of every row ordered by user that no query read, per-user
+    # reads go to user_activity_agg
+    await client.command(
+        "ALTER TABLE analytics_events DROP PROJECTION IF EXISTS events_by_user"
+    )
 
 
 async def create_clickhouse_client() -> AsyncClient:
@@ -36,7 +339,7 @@ async def create_clickhouse_client() -> AsyncClient:
         database="default",
     )
     await ensure_database(tmp_client, get_settings().clickhouse_db)
-    await tmp_client.close()  # type:ignore[no-untyped-call]
+    await tmp_client.close()
 
     client = await clickhouse_connect.get_async_client(
         host=get_settings().clickhouse_host,
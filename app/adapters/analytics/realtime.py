@@ -0,0 +1,84 @@
+from datetime import UTC, datetime
+from uuid import UUID
+
+import structlog
+from redis.asyncio import Redis
+
+from app.core.constants import AnalyticsEventType
+from app.core.settings import get_settings
+from app.domain.entities.analytics_event import AnalyticsEvent
+
+logger = structlog.get_logger(__name__)
+
+BUCKET_SECONDS = 60
+
+
+def _bucket(moment: datetime) -> int:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=UTC)
+    return int(moment.timestamp()) // BUCKET_SECONDS
+
+
+class RedisRealtimeMetrics:
+    def __init__(
+        self,
+        redis: Redis,
+        window_minutes: int = get_settings().realtime_metrics_window_minutes,
+    ) -> None:
+        self._redis = redis
+        # a bucket outlives the widest window by one bucket, then expires
+        self._ttl = (window_minutes + 1) * BUCKET_SECONDS
+
+    @staticmethod
+    def _scope(room_id: UUID | None) -> str:
+        # the hash tag keeps every bucket of a scope in one cluster slot, so the
+        # multi-key PFCOUNT and MGET of a window stay valid
+        return f"{{room:{room_id}}}" if room_id else "{all}"
+
+    def _users_key(self, room_id: UUID | None, bucket: int) -> str:
+        return f"realtime:{self._scope(room_id)}:users:{bucket}"
+
+    def _events_key(
+        self, room_id: UUID | None, event_type: AnalyticsEventType, bucket: int
+    ) -> str:
+        return f"realtime:{self._scope(room_id)}:{event_type.value}:{bucket}"
+
+    def _window(self, minutes: int) -> range:
+        now = _bucket(datetime.now(UTC))
+        return range(now - minutes + 1, now + 1)
+
+    async def record(self, event: AnalyticsEvent) -> None:
+        bucket = _bucket(event.created_at)
+        scopes = [None, event.room_id] if event.room_id else [None]
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for room_id in scopes:
+                    events_key = self._events_key(room_id, event.event_type, bucket)
+                    pipe.incr(events_key)
+                    pipe.expire(events_key, self._ttl)
+                    if event.user_id:
+                        users_key = self._users_key(room_id, bucket)
+                        pipe.pfadd(users_key, str(event.user_id))
+                        pipe.expire(users_key, self._ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.bind(event_id=event.id, e=str(e)).warning(
+                "Realtime metrics record error"
+            )
+
+    async def active_users(self, minutes: int, room_id: UUID | None = None) -> int:
+        keys = [self._users_key(room_id, bucket) for bucket in self._window(minutes)]
+        # PFCOUNT over several keys counts the union of the minute sketches
+        return int(await self._redis.pfcount(*keys))
+
+    async def event_counts(
+        self,
+        event_type: AnalyticsEventType,
+        minutes: int,
+        room_id: UUID | None = None,
+    ) -> list[int]:
+        keys = [
+            self._events_key(room_id, event_type, bucket)
+            for bucket in self._window(minutes)
+        ]
+        return [int(value or 0) for value in await self._redis.mget(keys)]
@@ -0,0 +1,148 @@
+import asyncio
+import time
+from contextlib import suppress
+
+import orjson
+import structlog
+from clickhouse_connect.driver.asyncclient import AsyncClient
+
+from app.core.metrics import get_metrics
+from app.domain.entities.analytics_event import AnalyticsEvent
+
+logger = structlog.get_logger(__name__)
+
+COLUMN_NAMES = ["id", "event_type", "user_id", "room_id", "created_at", "payload"]
+
+
+class BufferedAnalyticsSink:
+    def __init__(
+        self,
+        client: AsyncClient,
+        max_batch_size: int = 1000,
+        max_buffer_size: int = 10_000,
+        max_age_seconds: float = 1.0,
+    ):
+        self._client = client
+        self._max_batch_size = max_batch_size
+        self._max_buffer_size = max_buffer_size
+        self._max_age_seconds = max_age_seconds
+
+        # one list per column, clickhouse_connect sends them without pivoting rows
+        self._columns: list[list[object]] = [[] for _ in COLUMN_NAMES]
+        self._acks: list[asyncio.Future[None]] = []
+        self._oldest: float | None = None
+        # rows buffered or being inserted, bounded by max_buffer_size
+        self._pending = 0
+        self._space = asyncio.Condition()
+        self._flush_requested = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flusher: asyncio.Task[None] | None = None
+
+        metrics = get_metrics()
+        self._batch_rows = metrics.histogram(
+            "analytics_sink_batch_rows",
+            "Rows per ClickHouse insert",
+            buckets=(1, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000),
+        )
+        self._failed = metrics.counter(
+            "analytics_sink_failed_rows_total", "Rows of failed ClickHouse inserts"
+        )
+
+    async def start(self) -> None:
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._flusher
+            self._flusher = None
+        while self._acks:
+            await self.flush()
+
+    async def submit(self, event: AnalyticsEvent) -> asyncio.Future[None]:
+        async with self._space:
+            # backpressure: producers wait here while ClickHouse is behind
+            await self._space.wait_for(lambda: self._pending < self._max_buffer_size)
+            self._pending += 1
+
+        for column, value in zip(self._columns, self._row(event), strict=True):
+            column.append(value)
+        ack: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._acks.append(ack)
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        if len(self._acks) >= self._max_batch_size:
+            self._flush_requested.set()
+        return ack
+
+    async def publish_event(self, event: AnalyticsEvent) -> None:
+        await (await self.submit(event))
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            size = min(len(self._acks), self._max_batch_size)
+            if not size:
+                return
+            data = [column[:size] for column in self._columns]
+            for column in self._columns:
+                del column[:size]
+            acks, self._acks = self._acks[:size], self._acks[size:]
+            self._oldest = time.monotonic() if self._acks else None
+            if len(self._acks) >= self._max_batch_size:
+                self._flush_requested.set()
+
+            try:
+                await self._client.insert(
+                    "analytics_events",
+                    data,
+                    column_names=COLUMN_NAMES,
+                    column_oriented=True,
+                )
+            except Exception as e:
+                self._failed.inc(size)
+                logger.bind(rows=size, error=str(e)).warning(
+                    "Analytics batch insert failed"
+                )
+                for ack in acks:
+                    if not ack.done():
+                        ack.set_exception(e)
+            else:
+                self._batch_rows.observe(size)
+                logger.bind(rows=size).debug("Analytics batch inserted")
+                for ack in acks:
+                    if not ack.done():
+                        ack.set_result(None)
+            finally:
+                async with self._space:
+                    self._pending -= size
+                    self._space.notify_all()
+
+    async def _run(self) -> None:
+        while True:
+            timeout = self._max_age_seconds
+            if self._oldest is not None:
+                timeout = max(
+                    0.0, self._oldest + self._max_age_seconds - time.monotonic()
+                )
+            with suppress(TimeoutError):
+                async with asyncio.timeout(timeout):
+                    await self._flush_requested.wait()
+            self._flush_requested.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.bind(error=str(e)).exception("Analytics sink flush failed")
+
+    @staticmethod
+    def _row(event: AnalyticsEvent) -> tuple[object, ...]:
+        payload = orjson.dumps(event.payload).decode("utf-8") if event.payload else ""
+        return (
+            str(event.id),
+            event.event_type.value,
+            str(event.user_id) if event.user_id else None,
+            str(event.room_id) if event.room_id else None,
+            event.created_at,
+            payload,
+        )
@@ -0,0 +1,194 @@
+import fcntl
+import shutil
+import threading
+from collections import defaultdict
+from collections.abc import AsyncIterator, Callable, Iterator
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache, partial
+from pathlib import Path
+from uuid import UUID
+
+import structlog
+
+from app.adapters.archive.segment import read_segment, segment_month, write_segment
+from app.adapters.executor import BoundedExecutor, get_archive_executor
+from app.core.settings import get_settings
+from app.domain.entities.message import Message
+
+logger = structlog.get_logger(__name__)
+
+SEGMENT_SUFFIX = ".seg"
+
+# rewrites of a segment are read-modify-write, so they are serialised per path,
+# by a striped lock between archive threads and by flock between processes
+SEGMENT_LOCKS = tuple(threading.Lock() for _ in range(64))
+
+
+@contextmanager
+def _segment_lock(path: Path) -> Iterator[None]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with (
+        SEGMENT_LOCKS[hash(path) % len(SEGMENT_LOCKS)],
+        (path.parent / f".{path.name}.lock").open("a") as lock_file,
+    ):
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _read_oldest_first(path: Path, room_id: UUID) -> list[Message]:
+    # a segment may be dropped by a delete between listing and reading it
+    if not path.exists():
+        return []
+    messages = read_segment(path=path, room_id=room_id)
+    messages.reverse()
+    return messages
+
+
+class LocalSegmentArchive:
+    def __init__(self, root: Path, executor: BoundedExecutor | None = None) -> None:
+        self._root = root
+        self._executor = executor or get_archive_executor()
+
+    def _room_dir(self, room_id: UUID) -> Path:
+        return self._root / str(room_id)
+
+    async def archive(self, room_id: UUID, messages: list[Message]) -> None:
+        by_month: dict[str, list[Message]] = defaultdict(list)
+        for message in messages:
+            by_month[segment_month(message.created_at)].append(message)
+
+        def _archive() -> None:
+            for month, month_messages in by_month.items():
+                path = self._room_dir(room_id) / f"{month}{SEGMENT_SUFFIX}"
+                merged = {m.id: m for m in month_messages}
+                with _segment_lock(path):
+                    if path.exists():
+                        # segments are immutable, a later batch for the same
+                        # month rewrites the file with the union of old and new
+                        for message in read_segment(path=path, room_id=room_id):
+                            merged.setdefault(message.id, message)
+                    write_segment(path=path, messages=list(merged.values()))
+
+        await self._executor.run(_archive)
+        logger.bind(room_id=room_id, count=len(messages), months=len(by_month)).debug(
+            "Messages archived"
+        )
+
+    async def get_recent(
+        self, room_id: UUID, limit: int, before: datetime | None
+    ) -> list[Message]:
+        def _get() -> list[Message]:
+            room_dir = self._room_dir(room_id)
+            if not room_dir.is_dir():
+                return []
+
+            last_month = segment_month(before) if before else None
+            months = sorted(
+                (p.stem for p in room_dir.glob(f"*{SEGMENT_SUFFIX}")), reverse=True
+            )
+            result: list[Message] = []
+            for month in months:
+                if last_month and month > last_month:
+                    continue
+                result.extend(
+                    read_segment(
+                        path=room_dir / f"{month}{SEGMENT_SUFFIX}",
+                        room_id=room_id,
+                        limit=limit - len(result),
+                        before=before,
+                    )
+                )
+                if len(result) >= limit:
+                    break
+            return result
+
+        return await self._executor.run(_get)
+
+    async def iter_oldest(
+        self, room_id: UUID, page_size: int
+    ) -> AsyncIterator[list[Message]]:
+        room_dir = self._room_dir(room_id)
+        months = await self._executor.run(
+            lambda: sorted(p.stem for p in room_dir.glob(f"*{SEGMENT_SUFFIX}"))
+        )
+        for month in months:
+            # a segment holds one month of one room and is read whole
+            messages = await self._executor.run(
+                partial(
+                    _read_oldest_first,
+                    path=room_dir / f"{month}{SEGMENT_SUFFIX}",
+                    room_id=room_id,
+                )
+            )
+            for start in range(0, len(messages), page_size):
+                yield messages[start : start + page_size]
+
+    async def delete_messages(self, room_id: UUID, messages: list[Message]) -> None:
+        ids = {message.id for message in messages}
+        months = {segment_month(message.created_at) for message in messages}
+
+        def _delete() -> int:
+            removed = 0
+            for month in months:
+                path = self._room_dir(room_id) / f"{month}{SEGMENT_SUFFIX}"
+                if path.exists():
+                    removed += self._rewrite_without(
+                        path=path, room_id=room_id, keep=lambda m: m.id not in ids
+                    )
+            return removed
+
+        removed = await self._executor.run(_delete)
+        if removed:
+            logger.bind(room_id=room_id, count=removed).debug(
+                "Archived messages deleted"
+            )
+
+    async def delete_user_messages(self, room_id: UUID, user_id: UUID) -> None:
+        def _delete() -> int:
+            room_dir = self._room_dir(room_id)
+            if not room_dir.is_dir():
+                return 0
+            return sum(
+                self._rewrite_without(
+                    path=path, room_id=room_id, keep=lambda m: m.user_id != user_id
+                )
+                for path in room_dir.glob(f"*{SEGMENT_SUFFIX}")
+            )
+
+        removed = await self._executor.run(_delete)
+        if removed:
+            logger.bind(room_id=room_id, user_id=user_id, count=removed).debug(
+                "Archived user messages deleted"
+            )
+
+    @staticmethod
+    def _rewrite_without(
+        path: Path, room_id: UUID, keep: Callable[[Message], bool]
+    ) -> int:
+        with _segment_lock(path):
+            if not path.exists():
+                return 0
+            rows = read_segment(path=path, room_id=room_id)
+            kept = [m for m in rows if keep(m)]
+            if len(kept) == len(rows):
+                return 0
+            if kept:
+                write_segment(path=path, messages=kept)
+            else:
+                path.unlink(missing_ok=True)
+            return len(rows) - len(kept)
+
+    async def delete_room(self, room_id: UUID) -> None:
+        await self._executor.run(
+            lambda: shutil.rmtree(self._room_dir(room_id), ignore_errors=True)
+        )
+
+
+@lru_cache(maxsize=1)
+def get_message_archive() -> LocalSegmentArchive | None:
+    path = get_settings().message_archive_path
+    return LocalSegmentArchive(root=path) if path else None
@@ -0,0 +1,170 @@
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from uuid import UUID
+
+from app.domain.entities.message import Message
+
+# Segment layout: a fixed header, one index entry per column, then the column
+# blobs. Each column is compressed on its own so a reader can check the header
+# and the created_at column before it inflates anything else.
+MAGIC = b"LCSG"
+VERSION = 1
+HEADER = struct.Struct("<4sHIqqH")
+INDEX_ENTRY = struct.Struct("<16sQII")
+COLUMNS = ("created_at", "updated_at", "id", "user_id", "edited", "offsets", "content")
+
+EPOCH = datetime(1970, 1, 1)
+
+
+@dataclass
+class SegmentHeader:
+    row_count: int
+    min_created_at: int
+    max_created_at: int
+    columns: dict[str, tuple[int, int, int]]
+
+
+def _to_millis(value: datetime) -> int:
+    if value.tzinfo is not None:
+        value = value.astimezone(UTC).replace(tzinfo=None)
+    return (value - EPOCH) // timedelta(milliseconds=1)
+
+
+def _from_millis(value: int) -> datetime:
+    # Cassandra hands back naive UTC timestamps, archived rows look the same
+    return EPOCH + timedelta(milliseconds=value)
+
+
+def segment_month(created_at: datetime) -> str:
+    return f"{created_at.year:04d}-{created_at.month:02d}"
+
+
+def write_segment(path: Path, messages: list[Message]) -> None:
+    rows = sorted(messages, key=lambda m: _to_millis(m.created_at), reverse=True)
+    count = len(rows)
+    created = [_to_millis(m.created_at) for m in rows]
+    encoded = [m.content.encode("utf-8") for m in rows]
+    offsets = [0]
+    for content in encoded:
+        offsets.append(offsets[-1] + len(content))
+
+    raw_columns = {
+        "created_at": struct.pack(f"<{count}q", *created),
+        "updated_at": struct.pack(
+            f"<{count}q", *(_to_millis(m.updated_at) for m in rows)
+        ),
+        "id": b"".join(m.id.bytes for m in rows),
+        "user_id": b"".join(m.user_id.bytes for m in rows),
+        "edited": bytes(int(m.edited) for m in rows),
+        "offsets": struct.pack(f"<{count + 1}I", *offsets),
+        "content": b"".join(encoded),
+    }
+
+    data_offset = HEADER.size + INDEX_ENTRY.size * len(COLUMNS)
+    index, blobs = [], []
+    for name in COLUMNS:
+        raw = raw_columns[name]
+        blob = zlib.compress(raw, 6)
+        index.append(
+            INDEX_ENTRY.pack(name.encode("ascii"), data_offset, len(blob), len(raw))
+        )
+        blobs.append(blob)
+        data_offset += len(blob)
+
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        count,
+        min(created, default=0),
+        max(created, default=0),
+        len(COLUMNS),
+    )
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(header)
+            f.writelines(index)
+            f.writelines(blobs)
+            f.flush()
+            os.fsync(f.fileno())
+        # readers either see the previous segment or the complete new one
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def _read_header(buf: mmap.mmap) -> SegmentHeader:
+    magic, version, row_count, min_created, max_created, column_count = (
+        HEADER.unpack_from(buf, 0)
+    )
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a message segment")
+
+    columns = {}
+    for i in range(column_count):
+        name, offset, size, raw_size = INDEX_ENTRY.unpack_from(
+            buf, HEADER.size + i * INDEX_ENTRY.size
+        )
+        columns[name.rstrip(b"\0").decode("ascii")] = (offset, size, raw_size)
+    return SegmentHeader(
+        row_count=row_count,
+        min_created_at=min_created,
+        max_created_at=max_created,
+        columns=columns,
+    )
+
+
+def _column(buf: mmap.mmap, header: SegmentHeader, name: str) -> bytes:
+    offset, size, _ = header.columns[name]
+    return zlib.decompress(buf[offset : offset + size])
+
+
+def read_segment(
+    path: Path, room_id: UUID, limit: int | None = None, before: datetime | None = None
+) -> list[Message]:
+    with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        header = _read_header(buf)
+        count = header.row_count
+        before_ms = _to_millis(before) if before else None
+        if count == 0 or (before_ms is not None and header.min_created_at >= before_ms):
+            return []
+
+        created = struct.unpack(f"<{count}q", _column(buf, header, "created_at"))
+        start = 0
+        if before_ms is not None:
+            while start < count and created[start] >= before_ms:
+                start += 1
+        stop = count if limit is None else min(count, start + limit)
+        if start >= stop:
+            return []
+
+        updated = struct.unpack(f"<{count}q", _column(buf, header, "updated_at"))
+        ids = _column(buf, header, "id")
+        user_ids = _column(buf, header, "user_id")
+        edited = _column(buf, header, "edited")
+        offsets = struct.unpack(f"<{count + 1}I", _column(buf, header, "offsets"))
+        content = _column(buf, header, "content")
+
+    return [
+        Message(
+            id=UUID(bytes=ids[i * 16 : i * 16 + 16]),
+            room_id=room_id,
+            user_id=UUID(bytes=user_ids[i * 16 : i * 16 + 16]),
+            content=content[offsets[i] : offsets[i + 1]].decode("utf-8"),
+            edited=bool(edited[i]),
+            created_at=_from_millis(created[i]),
+            updated_at=_from_millis(updated[i]),
+        )
+        for i in range(start, stop)
+    ]
@@ -4,21 +4,33 @@ import structlog
 from pymemcache import serde
 from pymemcache.client import base
 
+from app.adapters.executor import BoundedExecutor, get_memcached_executor
+from app.core.settings import get_settings
+
 logger = structlog.get_logger(__name__)
 
 
 class MemcachedCache:
-    def __init__(self, host: str, port: int, default_ttl: int = 60):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        default_ttl: int = 60,
+        executor: BoundedExecutor | None = None,
+    ):
         self.default_ttl = default_ttl
-        self.client = base.Client(
+        self._executor = executor or get_memcached_executor()
+        # The executor runs calls from several threads, so each needs its own socket
+        self.client = base.PooledClient(
             (host, port),
+            max_pool_size=get_settings().memcached_executor_workers,
             serializer=serde.python_memcache_serializer,
             deserializer=serde.python_memcache_deserializer,
         )
 
     async def get(self, key: str) -> Any | None:
         try:
-            result = self.client.get(key)
+            result = await self._executor.run(lambda: self.client.get(key))
             if result:
                 logger.bind(key=key).debug("Memcache hit")
             else:
@@ -32,7 +44,7 @@ class MemcachedCache:
         if ttl is None:
             ttl = self.default_ttl
         try:
-            self.client.set(key, value, expire=ttl)
+            await self._executor.run(lambda: self.client.set(key, value, expire=ttl))
             logger.bind(key=key).debug("Memcache set")
         except Exception as e:
             logger.bind(e=str(e)).warning("Memcache set error")
@@ -40,7 +52,7 @@ class MemcachedCache:
 
     async def delete(self, key: str) -> None:
         try:
-            self.client.delete(key)
+            await self._executor.run(lambda: self.client.delete(key))
             logger.bind(key=key).debug("Memcache delete")
         except Exception as e:
             logger.bind(e=str(e)).warning("Memcache delete error")
@@ -48,7 +60,7 @@ class MemcachedCache:
 
     async def exists(self, key: str) -> bool:
         try:
-            result = self.client.get(key)
+            result = await self._executor.run(lambda: self.client.get(key))
             return result is not None
         except Exception as e:
             logger.bind(e=str(e)).warning("Memcache exists error")
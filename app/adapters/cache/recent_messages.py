@@ -0,0 +1,216 @@
+from datetime import UTC, datetime
+from uuid import UUID
+
+import orjson
+import structlog
+from redis.asyncio import Redis
+
+from app.adapters.db.models.redis.message import (
+    dict_to_message_dto,
+    message_dto_to_dict,
+)
+from app.core.metrics import get_metrics
+from app.core.settings import get_settings
+from app.domain.dtos.message import MessagePublicDTO
+
+logger = structlog.get_logger(__name__)
+
+# Marks a buffer that holds the whole room history. Its score sorts below every
+# message, so trimming the buffer drops it together with the oldest messages.
+COMPLETE_MARKER = "__complete__"
+
+# Messages are scored by created_at in ms, which is unique per room because it is
+# the clustering key of the room partition in Cassandra. Messages scored below the
+# retention cutoff (ARGV[6], 0 for none) have expired in Cassandra and are trimmed.
+#
+# A fill writes a snapshot read from Cassandra earlier, so it only applies while
+# the room generation (KEYS[2]) is the one read before that snapshot (ARGV[4]).
+# Edits, removals and invalidations bump it, new messages do not since a fill
+# never touches a score its snapshot does not hold.
+PUSH_SCRIPT = """
+if ARGV[5] == '1' then
+    redis.call('INCR', KEYS[2])
+    redis.call('EXPIRE', KEYS[2], ARGV[4])
+    if redis.call('ZCOUNT', KEYS[1], ARGV[1], ARGV[1]) == 0 then
+        return 0
+    end
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[1], ARGV[1], ARGV[1])
+if tonumber(ARGV[1]) >= tonumber(ARGV[6]) then
+    redis.call('ZADD', KEYS[1], ARGV[1], ARGV[2])
+end
+if ARGV[6] ~= '0' then
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], '(0', '(' .. ARGV[6])
+end
+redis.call('ZREMRANGEBYRANK', KEYS[1], 0, -(tonumber(ARGV[3]) + 1))
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return 1
+"""
+
+FILL_SCRIPT = f"""
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[4] then
+    return 0
+end
+for i = 5, #ARGV, 2 do
+    redis.call('ZREMRANGEBYSCORE', KEYS[1], ARGV[i], ARGV[i])
+    redis.call('ZADD', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+if ARGV[3] == '1' then
+    redis.call('ZADD', KEYS[1], 0, '{COMPLETE_MARKER}')
+end
+redis.call('ZREMRANGEBYRANK', KEYS[1], 0, -(tonumber(ARGV[1]) + 1))
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+
+def _score(created_at: datetime) -> int:
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=UTC)
+    return int(created_at.timestamp() * 1000)
+
+
+class RedisRecentMessagesCache:
+    def __init__(
+        self,
+        redis: Redis,
+        size: int = get_settings().recent_messages_buffer_size,
+        ttl: int = get_settings().recent_messages_buffer_ttl_seconds,
+    ) -> None:
+        self._redis = redis
+        self._size = size
+        self._ttl = ttl
+        self._push = redis.register_script(PUSH_SCRIPT)
+        self._fill = redis.register_script(FILL_SCRIPT)
+        self._hits = get_metrics().counter(
+            "recent_messages_cache_hits_total",
+            "Recent message reads served from the room ring buffer",
+        )
+        self._misses = get_metrics().counter(
+            "recent_messages_cache_misses_total",
+            "Recent message reads that fell back to Cassandra",
+        )
+
+    @staticmethod
+    def _key(room_id: UUID) -> str:
+        return f"messages:room:{room_id}:recent"
+
+    @staticmethod
+    def _generation_key(room_id: UUID) -> str:
+        return f"messages:room:{room_id}:recent:gen"
+
+    async def get_recent(
+        self,
+        room_id: UUID,
+        limit: int,
+        before: datetime | None,
+        not_before: datetime | None = None,
+    ) -> list[MessagePublicDTO] | None:
+        max_score = f"({_score(before)}" if before else "+inf"
+        min_score = _score(not_before) if not_before else "(0"
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.zrevrangebyscore(
+                    self._key(room_id), max_score, min_score, start=0, num=limit
+                )
+                pipe.zscore(self._key(room_id), COMPLETE_MARKER)
+                raw_messages, complete = await pipe.execute()
+        except Exception as e:
+            logger.bind(room_id=room_id, e=str(e)).warning("Recent messages get error")
+            raw_messages, complete = [], None
+
+        if len(raw_messages) < limit and complete is None:
+            self._misses.inc()
+            logger.bind(room_id=room_id).debug("Recent messages cache miss")
+            return None
+
+        self._hits.inc()
+        logger.bind(room_id=room_id).debug("Recent messages cache hit")
+        return [dict_to_message_dto(orjson.loads(raw)) for raw in raw_messages]
+
+    async def get_generation(self, room_id: UUID) -> int:
+        try:
+            return int(await self._redis.get(self._generation_key(room_id)) or 0)
+        except Exception as e:
+            logger.bind(room_id=room_id, e=str(e)).warning(
+                "Recent messages generation error"
+            )
+            # no fill can apply against a generation that is never stored
+            return -1
+
+    async def fill(
+        self,
+        room_id: UUID,
+        messages: list[MessagePublicDTO],
+        complete: bool,
+        generation: int,
+    ) -> None:
+        args: list[str | int] = [self._size, self._ttl, int(complete), generation]
+        for message in messages:
+            args.extend(
+                (
+                    _score(message.created_at),
+                    orjson.dumps(message_dto_to_dict(message)).decode("utf-8"),
+                )
+            )
+        try:
+            applied = await self._fill(
+                keys=[self._key(room_id), self._generation_key(room_id)], args=args
+            )
+            if not applied:
+                logger.bind(room_id=room_id).debug(
+                    "Recent messages fill skipped, buffer changed since the read"
+                )
+        except Exception as e:
+            logger.bind(room_id=room_id, e=str(e)).warning("Recent messages fill error")
+
+    async def push(
+        self,
+        message: MessagePublicDTO,
+        only_existing: bool,
+        not_before: datetime | None = None,
+    ) -> None:
+        try:
+            await self._push(
+                keys=[
+                    self._key(message.room_id),
+                    self._generation_key(message.room_id),
+                ],
+                args=[
+                    _score(message.created_at),
+                    orjson.dumps(message_dto_to_dict(message)).decode("utf-8"),
+                    self._size,
+                    self._ttl,
+                    int(only_existing),
+                    _score(not_before) if not_before else 0,
+                ],
+            )
+        except Exception as e:
+            logger.bind(room_id=message.room_id, e=str(e)).warning(
+                "Recent messages push error"
+            )
+
+    async def remove(self, room_id: UUID, created_at: datetime) -> None:
+        score = _score(created_at)
+        try:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.zremrangebyscore(self._key(room_id), score, score)
+                pipe.incr(self._generation_key(room_id))
+                pipe.expire(self._generation_key(room_id), self._ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.bind(room_id=room_id, e=str(e)).warning(
+                "Recent messages remove error"
+            )
+
+    async def invalidate(self, room_id: UUID) -> None:
+        try:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.delete(self._key(room_id))
+                pipe.incr(self._generation_key(room_id))
+                pipe.expire(self._generation_key(room_id), self._ttl)
+                await pipe.execute()
+        except Exception as e:
+            logger.bind(room_id=room_id, e=str(e)).warning(
+                "Recent messages invalidate error"
+            )
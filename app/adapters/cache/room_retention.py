@@ -0,0 +1,37 @@
+import time
+from collections import OrderedDict
+from uuid import UUID
+
+from app.core.metrics import get_metrics
+
+
+class InMemoryRoomRetentionCache:
+    def __init__(self, max_size: int, ttl: int) -> None:
+        self._max_size = max_size
+        self._ttl = ttl
+        # 0 stands for a room without retention, None from get for a miss
+        self._entries: OrderedDict[UUID, tuple[int, float]] = OrderedDict()
+        self._hits = get_metrics().counter(
+            "room_retention_cache_hits_total",
+            "Room retention resolved from the process cache",
+        )
+        self._misses = get_metrics().counter(
+            "room_retention_cache_misses_total",
+            "Room retention that had to be read from Mongo",
+        )
+
+    async def get(self, room_id: UUID) -> int | None:
+        entry = self._entries.get(room_id)
+        if entry is None or entry[1] <= time.monotonic():
+            self._entries.pop(room_id, None)
+            self._misses.inc()
+            return None
+        self._entries.move_to_end(room_id)
+        self._hits.inc()
+        return entry[0]
+
+    async def set(self, room_id: UUID, retention_days: int) -> None:
+        self._entries[room_id] = (retention_days, time.monotonic() + self._ttl)
+        self._entries.move_to_end(room_id)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
@@ -0,0 +1,54 @@
+import time
+from collections import OrderedDict
+from collections.abc import Collection, Mapping
+from uuid import UUID
+
+import structlog
+
+from app.core.metrics import get_metrics
+
+logger = structlog.get_logger(__name__)
+
+
+class InMemoryUsernameCache:
+    def __init__(self, max_size: int, ttl: int) -> None:
+        self._max_size = max_size
+        self._ttl = ttl
+        self._entries: OrderedDict[UUID, tuple[str, float]] = OrderedDict()
+        self._hits = get_metrics().counter(
+            "username_cache_hits_total", "Usernames resolved from the process cache"
+        )
+        self._misses = get_metrics().counter(
+            "username_cache_misses_total", "Usernames that had to be read from Mongo"
+        )
+
+    async def get_many(self, user_ids: Collection[UUID]) -> dict[UUID, str]:
+        now = time.monotonic()
+        found: dict[UUID, str] = {}
+        for user_id in user_ids:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                continue
+            username, expires_at = entry
+            if expires_at <= now:
+                del self._entries[user_id]
+                continue
+            self._entries.move_to_end(user_id)
+            found[user_id] = username
+
+        self._hits.inc(len(found))
+        self._misses.inc(len(user_ids) - len(found))
+        return found
+
+    async def set_many(self, usernames: Mapping[UUID, str]) -> None:
+        expires_at = time.monotonic() + self._ttl
+        for user_id, username in usernames.items():
+            self._entries[user_id] = (username, expires_at)
+            self._entries.move_to_end(user_id)
+
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+
+    async def invalidate(self, user_id: UUID) -> None:
+        self._entries.pop(user_id, None)
+        logger.bind(user_id=user_id).debug("Username cache entry invalidated")
@@ -45,6 +45,11 @@ class MessageModel(Model):  # type: ignore[misc]
         )
 
 
+class ExpiringMessageModel(MessageModel):
+    # room rows of rooms with a retention policy, every one written with a TTL
+    __table_name__ = "messages_expiring"
+
+
 class MessageByUserModel(Model):  # type: ignore[misc]
     __keyspace__ = get_settings().cassandra_keyspace
     __table_name__ = "messages_by_user"
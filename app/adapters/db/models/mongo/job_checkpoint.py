@@ -0,0 +1,23 @@
+from datetime import UTC
+from typing import Any
+
+from app.domain.entities.job_checkpoint import JobCheckpoint
+
+
+def job_checkpoint_to_document(checkpoint: JobCheckpoint) -> dict[str, Any]:
+    return {
+        "_id": checkpoint.name,
+        "watermark": checkpoint.watermark,
+        "scanned_rows": checkpoint.scanned_rows,
+        "updated_at": checkpoint.updated_at,
+    }
+
+
+def document_to_job_checkpoint(doc: dict[str, Any]) -> JobCheckpoint:
+    # the client is not tz aware, mongo hands back naive utc datetimes
+    return JobCheckpoint(
+        name=doc["_id"],
+        watermark=doc["watermark"].replace(tzinfo=UTC),
+        scanned_rows=doc.get("scanned_rows", 0),
+        updated_at=doc["updated_at"].replace(tzinfo=UTC),
+    )
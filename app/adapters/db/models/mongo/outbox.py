@@ -17,6 +17,9 @@ def outbox_to_document(outbox: Outbox) -> dict[str, Any]:
         "max_retries": outbox.max_retries,
         "sent_at": outbox.sent_at,
         "last_error": outbox.last_error,
+        "lease_owner": outbox.lease_owner,
+        "lease_expires_at": outbox.lease_expires_at,
+        "next_attempt_at": outbox.next_attempt_at,
         "created_at": outbox.created_at,
     }
 
@@ -32,5 +35,8 @@ def document_to_outbox(doc: dict[str, Any]) -> Outbox:
         max_retries=doc.get("max_retries", 5),
         sent_at=doc.get("sent_at"),
         last_error=doc.get("last_error"),
+        lease_owner=doc.get("lease_owner"),
+        lease_expires_at=doc.get("lease_expires_at"),
+        next_attempt_at=doc.get("next_attempt_at"),
         created_at=doc.get("created_at", datetime.now(UTC)),
     )
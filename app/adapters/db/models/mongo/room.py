@@ -13,6 +13,7 @@ def room_to_document(room: Room) -> dict[str, Any]:
         "created_by": str(room.created_by),
         "participants_count": room.participants_count,
         "description": room.description,
+        "retention_days": room.retention_days,
         "created_at": room.created_at,
         "updated_at": room.updated_at,
     }
@@ -26,6 +27,7 @@ def document_to_room(doc: dict[str, Any]) -> Room:
         created_by=UUID(doc["created_by"]),
         participants_count=doc["participants_count"],
         description=doc["description"],
+        retention_days=doc.get("retention_days"),
         created_at=doc.get("created_at", datetime.now(UTC)),
         updated_at=doc.get("updated_at", datetime.now(UTC)),
     )
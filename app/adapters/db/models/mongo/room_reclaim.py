@@ -0,0 +1,24 @@
+from typing import Any
+from uuid import UUID
+
+from app.domain.entities.room_reclaim import RoomReclaim
+
+
+def room_reclaim_to_document(room_reclaim: RoomReclaim) -> dict[str, Any]:
+    return {
+        "_id": str(room_reclaim.room_id),
+        "checkpoint": room_reclaim.checkpoint,
+        "reclaimed_rows": room_reclaim.reclaimed_rows,
+        "created_at": room_reclaim.created_at,
+        "updated_at": room_reclaim.updated_at,
+    }
+
+
+def document_to_room_reclaim(doc: dict[str, Any]) -> RoomReclaim:
+    return RoomReclaim(
+        room_id=UUID(doc["_id"]),
+        checkpoint=doc.get("checkpoint"),
+        reclaimed_rows=doc.get("reclaimed_rows", 0),
+        created_at=doc["created_at"],
+        updated_at=doc["updated_at"],
+    )
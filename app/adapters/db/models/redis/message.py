@@ -0,0 +1,29 @@
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+
+from app.domain.dtos.message import MessagePublicDTO
+
+
+def message_dto_to_dict(message: MessagePublicDTO) -> dict[str, Any]:
+    return {
+        "id": str(message.id),
+        "room_id": str(message.room_id),
+        "user_id": str(message.user_id),
+        "username": message.username,
+        "content": message.content,
+        "edited": message.edited,
+        "created_at": message.created_at.isoformat(),
+    }
+
+
+def dict_to_message_dto(dict_message: dict[str, Any]) -> MessagePublicDTO:
+    return MessagePublicDTO(
+        id=UUID(dict_message["id"]),
+        room_id=UUID(dict_message["room_id"]),
+        user_id=UUID(dict_message["user_id"]),
+        username=dict_message["username"],
+        content=dict_message["content"],
+        edited=dict_message["edited"],
+        created_at=datetime.fromisoformat(dict_message["created_at"]),
+    )
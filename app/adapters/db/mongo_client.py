@@ -37,6 +37,16 @@ async def ensure_indexes(db: AsyncDatabase[Any]) -> None:
     await outboxes.create_index([("status", ASCENDING)])
     await outboxes.create_index([("dedup_key", ASCENDING)], unique=False)
     await outboxes.create_index([("created_at", ASCENDING)])
+    await outboxes.create_index(
+        [("status", ASCENDING), ("lease_expires_at", ASCENDING)]
+    )
+    # claims and the lag probe of a dispatcher lane
+    await outboxes.create_index(
+        [("type", ASCENDING), ("status", ASCENDING), ("created_at", ASCENDING)]
+    )
+
+    room_reclaims = db["room_reclaims"]
+    await room_reclaims.create_index([("created_at", ASCENDING)])
 
 
 async def create_mongo_client() -> AsyncMongoClient[Any]:
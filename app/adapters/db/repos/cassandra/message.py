@@ -1,43 +1,273 @@
-import asyncio
+from collections.abc import AsyncIterator
 from datetime import datetime
+from functools import partial
 from typing import Any
 from uuid import UUID
 
+from cassandra.cqlengine import connection
+from cassandra.cqlengine.query import BatchQuery
+
+from app.adapters.archive.local import get_message_archive
 from app.adapters.db.models.cassandra.message import (
+    ExpiringMessageModel,
     MessageByIdModel,
     MessageByUserModel,
     MessageGlobalModel,
     MessageModel,
 )
+from app.adapters.executor import BoundedExecutor, get_cassandra_executor
 from app.domain.entities.message import Message
+from app.domain.ports.message_archive import MessageArchivePort
+
+
+def _page_all_rooms(
+    limit: int,
+    since: datetime | None = None,
+    before: datetime | None = None,
+    start_after: tuple[datetime, UUID] | None = None,
+    oldest_first: bool = False,
+) -> list[Message]:
+    # reversing every clustering column is the only other order cql allows
+    order = ("created_at", "id") if oldest_first else ("-created_at", "-id")
+    after: datetime | None = None
+    rows: list[MessageGlobalModel] = []
+    if start_after:
+        # cql has no OR, so the page resumes with the rows left at the timestamp
+        # of the last row and continues with the timestamps past it
+        last_created, last_id = start_after
+        tie = MessageGlobalModel.objects(partition="all", created_at=last_created)
+        tie = tie.filter(id__gt=last_id) if oldest_first else tie.filter(id__lt=last_id)
+        rows.extend(tie.order_by(*order).limit(limit))
+        if oldest_first:
+            since, after = None, last_created
+        else:
+            before = min(before, last_created) if before else last_created
+
+    if len(rows) < limit:
+        query = MessageGlobalModel.objects(partition="all")
+        if since:
+            query = query.filter(created_at__gte=since)
+        if after:
+            query = query.filter(created_at__gt=after)
+        if before:
+            query = query.filter(created_at__lt=before)
+        rows.extend(query.order_by(*order).limit(limit - len(rows)))
+    return [msg.to_entity() for msg in rows]
+
+
+# rows of rooms with a retention policy go to the expiring table, rows written
+# under an earlier policy stay where they were written and are read after the
+# table of the current policy runs out, as they are older than its rows
+ROOM_TABLES: tuple[type[MessageModel], ...] = (MessageModel, ExpiringMessageModel)
+
+
+def _room_tables(expiring: bool) -> tuple[type[MessageModel], ...]:
+    return ROOM_TABLES[::-1] if expiring else ROOM_TABLES
+
+
+def _page_room(
+    model: type[MessageModel], room_id: UUID, before: datetime | None, limit: int
+) -> list[Message]:
+    query = model.objects(room_id=room_id)
+    if before:
+        query = query.filter(created_at__lt=before)
+    return [msg.to_entity() for msg in query.limit(limit)]
+
+
+def _page_room_oldest_first(
+    model: type[MessageModel],
+    room_id: UUID,
+    until: datetime,
+    after: datetime | None,
+    limit: int,
+) -> list[Message]:
+    query = model.objects(room_id=room_id, created_at__lte=until)
+    if after:
+        query = query.filter(created_at__gt=after)
+    query = query.order_by("created_at").limit(limit)
+    return [msg.to_entity() for msg in query]
 
 
 class CassandraMessageRepository:
-    async def save(self, message: Message, db_session: Any | None = None) -> None:
+    def __init__(
+        self,
+        executor: BoundedExecutor | None = None,
+        archive: MessageArchivePort | None = None,
+    ) -> None:
+        self._executor = executor or get_cassandra_executor()
+        self._archive = archive or get_message_archive()
+
+    async def save(
+        self,
+        message: Message,
+        ttl_seconds: int | None = None,
+        db_session: Any | None = None,
+    ) -> None:
+        room_model = ExpiringMessageModel if ttl_seconds else MessageModel
+
         def _save() -> None:
-            MessageModel.from_entity(message).save()
-            MessageByUserModel.from_entity(message).save()
-            MessageByIdModel.from_entity(message).save()
-            MessageGlobalModel.from_entity(message).save()
+            room_model.from_entity(message).ttl(ttl_seconds).save()
+            MessageByUserModel.from_entity(message).ttl(ttl_seconds).save()
+            MessageByIdModel.from_entity(message).ttl(ttl_seconds).save()
+            MessageGlobalModel.from_entity(message).ttl(ttl_seconds).save()
 
-        await asyncio.to_thread(_save)
+        await self._executor.run(_save)
+
+    async def update(
+        self,
+        message: Message,
+        ttl_seconds: int | None = None,
+        db_session: Any | None = None,
+    ) -> None:
+        def _update() -> bool:
+            # an archived message only kept its lookup rows, writing the room
+            # and global rows back would pull it out of the cold tier
+            archived = True
+            for model in ROOM_TABLES:
+                if model.objects(
+                    room_id=message.room_id, created_at=message.created_at
+                ).first():
+                    model.from_entity(message).ttl(ttl_seconds).save()
+                    MessageGlobalModel.from_entity(message).ttl(ttl_seconds).save()
+                    archived = False
+                    break
+            MessageByUserModel.from_entity(message).ttl(ttl_seconds).save()
+            MessageByIdModel.from_entity(message).ttl(ttl_seconds).save()
+            return archived
+
+        if await self._executor.run(_update) and self._archive:
+            # the rewrite merges the edited row over the archived one
+            await self._archive.archive(room_id=message.room_id, messages=[message])
 
     async def get_recent_by_room(
         self,
         room_id: UUID,
         limit: int,
         before: datetime | None,
+        start_after: tuple[datetime, UUID] | None = None,
+        include_archive: bool = True,
+        expiring: bool = False,
         db_session: Any | None = None,
     ) -> list[Message]:
+        # created_at is the only clustering column of the room partition, so it
+        # identifies a row exactly and the page resumes right after it
+        bound = before
+        if start_after:
+            bound = min(start_after[0], before) if before else start_after[0]
+
         def _get() -> list[Message]:
-            query = MessageModel.objects(room_id=room_id)
-            if before:
-                query = query.filter(created_at__lt=before)
+            messages: list[Message] = []
+            for model in _room_tables(expiring):
+                messages.extend(
+                    _page_room(
+                        model=model,
+                        room_id=room_id,
+                        before=messages[-1].created_at if messages else bound,
+                        limit=limit - len(messages),
+                    )
+                )
+                if len(messages) >= limit:
+                    break
+            return messages
+
+        messages = await self._executor.run(_get)
+        if len(messages) >= limit or not include_archive or not self._archive:
+            return messages
+
+        # the partition is exhausted, older history continues in the cold tier
+        archived = await self._archive.get_recent(
+            room_id=room_id,
+            limit=limit - len(messages),
+            before=messages[-1].created_at if messages else bound,
+        )
+        return messages + archived
 
+    async def get_oldest_all_rooms(
+        self,
+        before: datetime,
+        limit: int,
+        since: datetime | None = None,
+        start_after: tuple[datetime, UUID] | None = None,
+        db_session: Any | None = None,
+    ) -> list[Message]:
+        def _get() -> list[Message]:
+            return _page_all_rooms(
+                limit=limit,
+                since=since,
+                before=before,
+                start_after=start_after,
+                oldest_first=True,
+            )
+
+        return await self._executor.run(_get)
+
+    async def get_recent_by_user(
+        self,
+        user_id: UUID,
+        limit: int,
+        start_after: datetime | None = None,
+        db_session: Any | None = None,
+    ) -> list[Message]:
+        def _get() -> list[Message]:
+            query = MessageByUserModel.objects(user_id=user_id)
+            if start_after:
+                # created_at is the only clustering column of the user partition
+                query = query.filter(created_at__lt=start_after)
             query = query.limit(limit)
             return [msg.to_entity() for msg in query]
 
-        return await asyncio.to_thread(_get)
+        return await self._executor.run(_get)
+
+    async def iter_by_user(
+        self, user_id: UUID, page_size: int, db_session: Any | None = None
+    ) -> AsyncIterator[list[Message]]:
+        start_after: datetime | None = None
+        while True:
+            messages = await self.get_recent_by_user(
+                user_id=user_id, limit=page_size, start_after=start_after
+            )
+            if messages:
+                yield messages
+            if len(messages) < page_size:
+                return
+            start_after = messages[-1].created_at
+
+    async def iter_by_room(
+        self,
+        room_id: UUID,
+        until: datetime,
+        page_size: int,
+        expiring: bool = False,
+        db_session: Any | None = None,
+    ) -> AsyncIterator[list[Message]]:
+        # archived history is older than anything left in the partitions, so it
+        # goes first and the partitions resume after the last archived row,
+        # which also skips rows archived but not yet deleted from them
+        last_created: datetime | None = None
+        if self._archive:
+            async for messages in self._archive.iter_oldest(
+                room_id=room_id, page_size=page_size
+            ):
+                yield messages
+                last_created = messages[-1].created_at
+
+        for model in reversed(_room_tables(expiring)):
+            while True:
+                messages = await self._executor.run(
+                    partial(
+                        _page_room_oldest_first,
+                        model=model,
+                        room_id=room_id,
+                        until=until,
+                        after=last_created,
+                        limit=page_size,
+                    )
+                )
+                if messages:
+                    yield messages
+                    last_created = messages[-1].created_at
+                if len(messages) < page_size:
+                    break
 
     async def get_by_id(
         self, message_id: UUID, db_session: Any | None = None
@@ -48,44 +278,53 @@ class CassandraMessageRepository:
             ).first()
             return msg and msg.to_entity()
 
-        return await asyncio.to_thread(_get)
+        return await self._executor.run(_get)
+
+    async def get_ttl(
+        self, message_id: UUID, db_session: Any | None = None
+    ) -> int | None:
+        table = MessageByIdModel.column_family_name()
+        query = f"SELECT TTL(content) AS ttl FROM {table} WHERE id = %s"  # noqa: S608
+
+        def _get() -> int | None:
+            # cqlengine cannot select TTL(), the session is the one it set up
+            row = connection.get_session().execute(query, (message_id,)).one()
+            return None if row is None or row["ttl"] is None else int(row["ttl"])
+
+        return await self._executor.run(_get)
 
     async def get_since_all_rooms(
         self,
         since: datetime,
         limit: int,
         start_after: tuple[datetime, UUID] | None = None,
+        until: datetime | None = None,
         db_session: Any | None = None,
     ) -> list[Message]:
         def _get() -> list[Message]:
-            query = MessageGlobalModel.objects(partition="all", created_at__gte=since)
-            if start_after:
-                last_created, last_id = start_after
-                query = query.filter(
-                    (MessageGlobalModel.created_at < last_created)
-                    | (
-                        (MessageGlobalModel.created_at == last_created)
-                        & (MessageGlobalModel.id < last_id)
-                    )
-                )
-            query = query.limit(limit)
-            return [msg.to_entity() for msg in query.all()]
+            return _page_all_rooms(
+                limit=limit, since=since, before=until, start_after=start_after
+            )
 
-        return await asyncio.to_thread(_get)
+        return await self._executor.run(_get)
 
     async def delete_by_id(
         self, message_id: UUID, db_session: Any | None = None
     ) -> None:
-        def _delete() -> None:
+        def _delete() -> Message | None:
             msg_by_id = MessageByIdModel.objects(id=message_id).first()
             if not msg_by_id:
-                return
+                return None
 
-            msg_main = MessageModel.objects(
-                room_id=msg_by_id.room_id, created_at=msg_by_id.created_at
-            ).first()
-            if msg_main:
-                msg_main.delete()
+            archived: Message | None = msg_by_id.to_entity()
+            for model in ROOM_TABLES:
+                msg_main = model.objects(
+                    room_id=msg_by_id.room_id, created_at=msg_by_id.created_at
+                ).first()
+                if msg_main:
+                    msg_main.delete()
+                    archived = None
+                    break
 
             msg_user = MessageByUserModel.objects(
                 user_id=msg_by_id.user_id, created_at=msg_by_id.created_at
@@ -100,5 +339,82 @@ class CassandraMessageRepository:
                 msg_global.delete()
 
             msg_by_id.delete()
+            return archived
+
+        archived = await self._executor.run(_delete)
+        if archived and self._archive:
+            await self._archive.delete_messages(
+                room_id=archived.room_id, messages=[archived]
+            )
+
+    @staticmethod
+    def _batch_delete(
+        messages: list[Message], include_room_rows: bool, include_lookup_rows: bool
+    ) -> None:
+        # every key of the four tables is known from the message itself,
+        # so the deletes go out in one batch without reading any row first
+        with BatchQuery() as batch:
+            for message in messages:
+                if include_room_rows:
+                    # the row lives in one of the tables, a delete of the other
+                    # key only writes a tombstone
+                    for model in ROOM_TABLES:
+                        model.objects(
+                            room_id=message.room_id, created_at=message.created_at
+                        ).batch(batch).delete()
+                if include_lookup_rows:
+                    MessageByUserModel.objects(
+                        user_id=message.user_id, created_at=message.created_at
+                    ).batch(batch).delete()
+                    MessageByIdModel.objects(id=message.id).batch(batch).delete()
+                MessageGlobalModel.objects(
+                    partition="all", created_at=message.created_at, id=message.id
+                ).batch(batch).delete()
+
+    async def delete_many(
+        self, messages: list[Message], db_session: Any | None = None
+    ) -> None:
+        await self._executor.run(
+            lambda: self._batch_delete(
+                messages=messages, include_room_rows=True, include_lookup_rows=True
+            )
+        )
+
+    async def delete_user_archive(
+        self, user_id: UUID, room_id: UUID, db_session: Any | None = None
+    ) -> None:
+        # one rewrite per segment for a whole purge instead of one per batch
+        if self._archive:
+            await self._archive.delete_user_messages(room_id=room_id, user_id=user_id)
+
+    async def delete_archived(
+        self, messages: list[Message], db_session: Any | None = None
+    ) -> None:
+        # the lookup rows stay, user history reads its messages from them alone
+        # and edits and deletes by id resolve archived messages through them
+        await self._executor.run(
+            lambda: self._batch_delete(
+                messages=messages, include_room_rows=True, include_lookup_rows=False
+            )
+        )
+
+    async def delete_lookup_rows(
+        self, messages: list[Message], db_session: Any | None = None
+    ) -> None:
+        await self._executor.run(
+            lambda: self._batch_delete(
+                messages=messages, include_room_rows=False, include_lookup_rows=True
+            )
+        )
+
+    async def delete_room_partition(
+        self, room_id: UUID, db_session: Any | None = None
+    ) -> None:
+        # a single partition tombstone instead of one tombstone per message row
+        def _delete() -> None:
+            for model in ROOM_TABLES:
+                model.objects(room_id=room_id).delete()
 
-        await asyncio.to_thread(_delete)
+        await self._executor.run(_delete)
+        if self._archive:
+            await self._archive.delete_room(room_id=room_id)
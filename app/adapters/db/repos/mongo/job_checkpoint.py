@@ -0,0 +1,29 @@
+from typing import Any
+
+from pymongo.asynchronous.client_session import AsyncClientSession
+from pymongo.asynchronous.database import AsyncDatabase
+
+from app.adapters.db.models.mongo.job_checkpoint import (
+    document_to_job_checkpoint,
+    job_checkpoint_to_document,
+)
+from app.domain.entities.job_checkpoint import JobCheckpoint
+
+
+class MongoJobCheckpointRepository:
+    def __init__(self, db: AsyncDatabase[Any]) -> None:
+        self._col = db["job_checkpoints"]
+
+    async def get(
+        self, name: str, db_session: AsyncClientSession | None = None
+    ) -> JobCheckpoint | None:
+        doc = await self._col.find_one({"_id": name}, session=db_session)
+        return doc and document_to_job_checkpoint(doc)
+
+    async def save(
+        self, checkpoint: JobCheckpoint, db_session: AsyncClientSession | None = None
+    ) -> None:
+        doc = job_checkpoint_to_document(checkpoint)
+        await self._col.replace_one(
+            {"_id": doc["_id"]}, doc, upsert=True, session=db_session
+        )
@@ -10,17 +10,13 @@ from app.adapters.db.models.mongo.join_request import (
     join_request_to_document,
 )
 from app.adapters.db.models.mongo.room import document_to_room
-from app.adapters.db.models.mongo.user import document_to_user
 from app.domain.entities.join_request import JoinRequest
 from app.domain.entities.room import Room
-from app.domain.entities.user import User
 
 
 class MongoJoinRequestRepository:
     def __init__(self, db: AsyncDatabase[Any]):
         self._col = db["join_requests"]
-        self._col_users = db["users"]
-        self._col_rooms = db["rooms"]
 
     async def save(
         self, request: JoinRequest, db_session: AsyncClientSession | None = None
@@ -46,56 +42,17 @@ class MongoJoinRequestRepository:
         self,
         room_id: UUID,
         db_session: AsyncClientSession | None = None,
-    ) -> list[tuple[JoinRequest, User, Room]]:
-        pipeline: Sequence[Mapping[str, Any]] = [
-            {"$match": {"room_id": str(room_id)}},
-            {
-                "$lookup": {
-                    "from": "users",
-                    "localField": "user_id",
-                    "foreignField": "_id",
-                    "as": "user_info",
-                }
-            },
-            {"$unwind": "$user_info"},
-            {
-                "$lookup": {
-                    "from": "rooms",
-                    "localField": "room_id",
-                    "foreignField": "_id",
-                    "as": "room_info",
-                }
-            },
-            {"$unwind": "$room_info"},
-        ]
-
-        cursor = await self._col.aggregate(pipeline, session=db_session)
-
-        return [
-            (
-                document_to_join_request(doc),
-                document_to_user(doc["user_info"]),
-                document_to_room(doc["room_info"]),
-            )
-            async for doc in cursor
-        ]
+    ) -> list[JoinRequest]:
+        cursor = self._col.find({"room_id": str(room_id)}, session=db_session)
+        return [document_to_join_request(doc) async for doc in cursor]
 
     async def list_by_user(
         self,
         user_id: UUID,
         db_session: AsyncClientSession | None = None,
-    ) -> list[tuple[JoinRequest, User, Room]]:
+    ) -> list[tuple[JoinRequest, Room]]:
         pipeline: Sequence[Mapping[str, Any]] = [
             {"$match": {"user_id": str(user_id)}},
-            {
-                "$lookup": {
-                    "from": "users",
-                    "localField": "user_id",
-                    "foreignField": "_id",
-                    "as": "user_info",
-                }
-            },
-            {"$unwind": "$user_info"},
             {
                 "$lookup": {
                     "from": "rooms",
@@ -109,11 +66,7 @@ class MongoJoinRequestRepository:
 
         cursor = await self._col.aggregate(pipeline, session=db_session)
         return [
-            (
-                document_to_join_request(doc),
-                document_to_user(doc["user_info"]),
-                document_to_room(doc["room_info"]),
-            )
+            (document_to_join_request(doc), document_to_room(doc["room_info"]))
             async for doc in cursor
         ]
 
@@ -1,14 +1,17 @@
-from datetime import datetime
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime, timedelta
 from typing import Any
 from uuid import UUID
 
-from pymongo import ASCENDING
+from pymongo import ASCENDING, UpdateOne
 from pymongo.asynchronous.client_session import AsyncClientSession
 from pymongo.asynchronous.database import AsyncDatabase
 
 from app.adapters.db.models.mongo.outbox import document_to_outbox, outbox_to_document
-from app.core.constants import OutboxStatus
-from app.domain.entities.outbox import Outbox
+from app.core.constants import OutboxMessageType, OutboxStatus
+from app.domain.entities.outbox import Outbox, OutboxOutcome
+
+LEASE_FIELDS = {"lease_owner": "", "lease_expires_at": ""}
 
 
 class MongoOutboxRepository:
@@ -27,6 +30,24 @@ class MongoOutboxRepository:
         )
         return outbox
 
+    async def save_many(
+        self, outboxes: list[Outbox], db_session: AsyncClientSession | None = None
+    ) -> None:
+        if not outboxes:
+            return
+        await self._col.bulk_write(
+            [
+                UpdateOne(
+                    {"dedup_key": outbox.dedup_key},
+                    {"$setOnInsert": outbox_to_document(outbox)},
+                    upsert=True,
+                )
+                for outbox in outboxes
+            ],
+            ordered=False,
+            session=db_session,
+        )
+
     async def get_by_id(
         self, outbox_id: UUID, db_session: AsyncClientSession | None = None
     ) -> Outbox | None:
@@ -43,6 +64,162 @@ class MongoOutboxRepository:
         )
         return [document_to_outbox(doc) async for doc in cursor]
 
+    async def watch_pending(self) -> AsyncIterator[Outbox]:
+        # upserts that create a document are reported as inserts as well
+        pipeline = [
+            {
+                "$match": {
+                    "operationType": "insert",
+                    "fullDocument.status": OutboxStatus.PENDING.value,
+                }
+            }
+        ]
+        async with await self._col.watch(pipeline) as stream:
+            async for change in stream:
+                yield document_to_outbox(change["fullDocument"])
+
+    async def oldest_pending_created_at(
+        self,
+        message_type: OutboxMessageType,
+        db_session: AsyncClientSession | None = None,
+    ) -> datetime | None:
+        doc = await self._col.find_one(
+            {"type": message_type.value, "status": OutboxStatus.PENDING.value},
+            {"created_at": 1},
+            sort=[("created_at", ASCENDING)],
+            session=db_session,
+        )
+        return doc and doc["created_at"]
+
+    async def claim_batch(
+        self,
+        worker_id: str,
+        limit: int,
+        lease_seconds: float,
+        message_type: OutboxMessageType | None = None,
+        db_session: AsyncClientSession | None = None,
+    ) -> list[Outbox]:
+        now = datetime.now(UTC)
+        expires_at = now + timedelta(seconds=lease_seconds)
+        # mongo keeps milliseconds, the expiry doubles as the claim marker below
+        expires_at = expires_at.replace(
+            microsecond=expires_at.microsecond // 1000 * 1000
+        )
+        claimable: dict[str, Any] = {
+            "$or": [
+                # retries wait out their backoff, items from before it have none
+                {
+                    "status": OutboxStatus.PENDING.value,
+                    "next_attempt_at": {"$not": {"$gt": now}},
+                },
+                # leases of crashed workers, including items stuck from before leases
+                {
+                    "status": OutboxStatus.IN_PROGRESS.value,
+                    "lease_expires_at": {"$not": {"$gte": now}},
+                },
+            ]
+        }
+        if message_type is not None:
+            claimable["type"] = message_type.value
+        cursor = (
+            self._col.find(claimable, {"_id": 1}, session=db_session)
+            .sort("created_at", ASCENDING)
+            .limit(limit)
+        )
+        candidate_ids = [doc["_id"] async for doc in cursor]
+        if not candidate_ids:
+            return []
+
+        # the claimable filter is re-checked per document, so of several workers
+        # racing for the same candidates exactly one ends up holding each lease
+        await self._col.update_many(
+            {"_id": {"$in": candidate_ids}, **claimable},
+            [
+                {
+                    "$set": {
+                        "retries": {
+                            "$cond": [
+                                {"$eq": ["$status", OutboxStatus.IN_PROGRESS.value]},
+                                {"$add": ["$retries", 1]},
+                                "$retries",
+                            ]
+                        },
+                        "status": OutboxStatus.IN_PROGRESS.value,
+                        "lease_owner": worker_id,
+                        "lease_expires_at": expires_at,
+                    }
+                }
+            ],
+            session=db_session,
+        )
+        cursor = self._col.find(
+            {
+                "_id": {"$in": candidate_ids},
+                "lease_owner": worker_id,
+                "lease_expires_at": expires_at,
+            },
+            session=db_session,
+        ).sort("created_at", ASCENDING)
+        return [document_to_outbox(doc) async for doc in cursor]
+
+    async def extend_leases(
+        self,
+        outbox_ids: list[UUID],
+        worker_id: str,
+        lease_seconds: float,
+        db_session: AsyncClientSession | None = None,
+    ) -> int:
+        if not outbox_ids:
+            return 0
+        result = await self._col.update_many(
+            {
+                "_id": {"$in": [str(outbox_id) for outbox_id in outbox_ids]},
+                "status": OutboxStatus.IN_PROGRESS.value,
+                "lease_owner": worker_id,
+            },
+            {
+                "$set": {
+                    "lease_expires_at": datetime.now(UTC)
+                    + timedelta(seconds=lease_seconds)
+                }
+            },
+            session=db_session,
+        )
+        return result.modified_count
+
+    async def apply_outcomes(
+        self,
+        outcomes: list[OutboxOutcome],
+        worker_id: str,
+        db_session: AsyncClientSession | None = None,
+    ) -> int:
+        if not outcomes:
+            return 0
+        operations = []
+        for outcome in outcomes:
+            update: dict[str, Any] = {
+                "$set": {"status": outcome.status.value},
+                "$unset": LEASE_FIELDS,
+            }
+            if outcome.status == OutboxStatus.SENT:
+                update["$set"]["sent_at"] = outcome.sent_at
+            else:
+                update["$set"]["last_error"] = outcome.last_error
+            if outcome.status == OutboxStatus.PENDING:
+                update["$inc"] = {"retries": 1}
+                update["$set"]["next_attempt_at"] = outcome.next_attempt_at
+            # an item whose lease was lost has been handed to another worker,
+            # that worker owns its status now
+            operations.append(
+                UpdateOne(
+                    {"_id": str(outcome.outbox_id), "lease_owner": worker_id}, update
+                )
+            )
+        result = await self._col.bulk_write(
+            operations, ordered=False, session=db_session
+        )
+        return result.modified_count
+
     async def mark_pending(
         self,
         outbox_id: UUID,
@@ -53,7 +230,7 @@ class MongoOutboxRepository:
         new_dict = {"status": OutboxStatus.PENDING.value}
         if last_error:
             new_dict.update({"last_error": last_error})
-        update_doc: dict[str, Any] = {"$set": new_dict}
+        update_doc: dict[str, Any] = {"$set": new_dict, "$unset": LEASE_FIELDS}
         if retry:
             update_doc["$inc"] = {"retries": 1}
         await self._col.update_one(
@@ -89,7 +266,8 @@ class MongoOutboxRepository:
                 "$set": {
                     "status": OutboxStatus.SENT.value,
                     "sent_at": sent_at,
-                }
+                },
+                "$unset": LEASE_FIELDS,
             },
             session=db_session,
         )
@@ -99,7 +277,10 @@ class MongoOutboxRepository:
     ) -> None:
         await self._col.update_one(
             {"_id": str(outbox_id)},
-            {"$set": {"status": OutboxStatus.FAILED.value, "last_error": error}},
+            {
+                "$set": {"status": OutboxStatus.FAILED.value, "last_error": error},
+                "$unset": LEASE_FIELDS,
+            },
             session=db_session,
         )
 
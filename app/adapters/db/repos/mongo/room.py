@@ -1,3 +1,4 @@
+from collections.abc import Collection
 from datetime import UTC, datetime
 from typing import Any
 from uuid import UUID
@@ -32,6 +33,15 @@ class MongoRoomRepository:
         doc = await self._col.find_one({"_id": str(room_id)}, session=db_session)
         return doc and document_to_room(doc)
 
+    async def get_by_ids(
+        self, room_ids: Collection[UUID], db_session: AsyncClientSession | None = None
+    ) -> list[Room]:
+        if not room_ids:
+            return []
+        ids = [str(rid) for rid in room_ids]
+        cursor = self._col.find({"_id": {"$in": ids}}, session=db_session)
+        return [document_to_room(doc) async for doc in cursor]
+
     async def search(
         self, query: str, limit: int, db_session: AsyncClientSession | None = None
     ) -> list[Room]:
@@ -0,0 +1,63 @@
+from datetime import UTC, datetime
+from typing import Any
+from uuid import UUID
+
+from pymongo import ASCENDING
+from pymongo.asynchronous.client_session import AsyncClientSession
+from pymongo.asynchronous.database import AsyncDatabase
+
+from app.adapters.db.models.mongo.room_reclaim import (
+    document_to_room_reclaim,
+    room_reclaim_to_document,
+)
+from app.domain.entities.room_reclaim import RoomReclaim
+
+
+class MongoRoomReclaimRepository:
+    def __init__(self, db: AsyncDatabase[Any]) -> None:
+        self._col = db["room_reclaims"]
+
+    async def enqueue(
+        self, room_id: UUID, db_session: AsyncClientSession | None = None
+    ) -> None:
+        doc = room_reclaim_to_document(RoomReclaim(room_id=room_id))
+        await self._col.update_one(
+            {"_id": doc["_id"]},
+            {"$setOnInsert": doc},
+            upsert=True,
+            session=db_session,
+        )
+
+    async def list_pending(
+        self, limit: int, db_session: AsyncClientSession | None = None
+    ) -> list[RoomReclaim]:
+        cursor = (
+            self._col.find({}, session=db_session)
+            .sort("created_at", ASCENDING)
+            .limit(limit)
+        )
+        return [document_to_room_reclaim(doc) async for doc in cursor]
+
+    async def save_checkpoint(
+        self,
+        room_id: UUID,
+        checkpoint: datetime,
+        reclaimed_rows: int,
+        db_session: AsyncClientSession | None = None,
+    ) -> None:
+        await self._col.update_one(
+            {"_id": str(room_id)},
+            {
+                "$set": {
+                    "checkpoint": checkpoint,
+                    "reclaimed_rows": reclaimed_rows,
+                    "updated_at": datetime.now(UTC),
+                }
+            },
+            session=db_session,
+        )
+
+    async def delete(
+        self, room_id: UUID, db_session: AsyncClientSession | None = None
+    ) -> None:
+        await self._col.delete_one({"_id": str(room_id)}, session=db_session)
@@ -0,0 +1,190 @@
+import asyncio
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import suppress
+from functools import lru_cache
+from typing import TypeVar
+
+import structlog
+
+from app.core.metrics import get_metrics
+from app.core.settings import get_settings
+from app.domain.exceptions.storage import StorageOverloaded
+
+logger = structlog.get_logger(__name__)
+
+T = TypeVar("T")
+
+QUEUE_DEPTH_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+
+class BoundedExecutor:
+    def __init__(
+        self, name: str, max_workers: int, max_queue: int, queue_timeout: float
+    ) -> None:
+        self.name = name
+        self._max_pending = max_workers + max_queue
+        self._queue_timeout = queue_timeout
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=f"{name}-io"
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+
+        metrics = get_metrics()
+        self._in_flight = metrics.gauge(
+            "storage_executor_in_flight", "Blocking storage calls queued or running"
+        )
+        self._queue_depth = metrics.histogram(
+            "storage_executor_queue_depth",
+            "Calls already waiting for a thread when a new call is submitted",
+            buckets=QUEUE_DEPTH_BUCKETS,
+        )
+        self._wait_time = metrics.histogram(
+            "storage_executor_wait_seconds", "Time a call waited for a thread"
+        )
+        self._run_time = metrics.histogram(
+            "storage_executor_run_seconds", "Time a call spent running in a thread"
+        )
+        self._rejected = metrics.counter(
+            "storage_executor_rejected_total",
+            "Calls rejected because the executor was saturated",
+        )
+
+    async def run(self, func: Callable[[], T]) -> T:
+        with self._lock:
+            if self._pending >= self._max_pending:
+                self._rejected.inc(executor=self.name, reason="queue_full")
+                logger.bind(executor=self.name).warning("Storage executor saturated")
+                raise StorageOverloaded
+            queued = self._pending - self._running
+            self._pending += 1
+        self._queue_depth.observe(queued, executor=self.name)
+        self._in_flight.inc(executor=self.name)
+
+        loop = asyncio.get_running_loop()
+        submitted_at = time.monotonic()
+        started_at: float | None = None
+        started = asyncio.Event()
+
+        def _call() -> T:
+            nonlocal started_at
+            started_at = time.monotonic()
+            with suppress(RuntimeError):
+                loop.call_soon_threadsafe(started.set)
+            # A caller that waited this long has most likely given up already, so
+            # drop the call instead of adding load to a backend that is behind
+            if started_at - submitted_at > self._queue_timeout:
+                raise StorageOverloaded
+            with self._lock:
+                self._running += 1
+            try:
+                return func()
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+        def _release(_: Future[T]) -> None:
+            # The slot is held until the call leaves the pool, a cancelled caller
+            # does not stop a call that is still queued or already running
+            finished_at = time.monotonic()
+            with self._lock:
+                self._pending -= 1
+            with suppress(RuntimeError):
+                loop.call_soon_threadsafe(
+                    self._observe, submitted_at, started_at, finished_at
+                )
+
+        try:
+            future = self._pool.submit(_call)
+        except RuntimeError:
+            with self._lock:
+                self._pending -= 1
+            self._in_flight.dec(executor=self.name)
+            raise
+        future.add_done_callback(_release)
+        result = asyncio.wrap_future(future)
+
+        # the wait for a thread is bounded here, a saturated pool would otherwise
+        # hold the caller until a worker picks the call up
+        try:
+            async with asyncio.timeout(self._queue_timeout):
+                await started.wait()
+        except TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        if not started.is_set() and future.cancel():
+            self._rejected.inc(executor=self.name, reason="queue_timeout")
+            logger.bind(executor=self.name).warning("Storage call timed out in queue")
+            raise StorageOverloaded
+
+        try:
+            return await result
+        except StorageOverloaded:
+            if started_at is not None:
+                self._rejected.inc(executor=self.name, reason="queue_timeout")
+                logger.bind(executor=self.name).warning(
+                    "Storage call timed out in queue"
+                )
+            raise
+
+    def _observe(
+        self, submitted_at: float, started_at: float | None, finished_at: float
+    ) -> None:
+        self._in_flight.dec(executor=self.name)
+        if started_at is not None:
+            self._wait_time.observe(started_at - submitted_at, executor=self.name)
+            self._run_time.observe(finished_at - started_at, executor=self.name)
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True)
+        logger.bind(executor=self.name).info("Storage executor shut down")
+
+
+@lru_cache(maxsize=1)
+def get_cassandra_executor() -> BoundedExecutor:
+    settings = get_settings()
+    return BoundedExecutor(
+        name="cassandra",
+        max_workers=settings.cassandra_executor_workers,
+        max_queue=settings.cassandra_executor_queue_size,
+        queue_timeout=settings.cassandra_executor_queue_timeout_seconds,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_memcached_executor() -> BoundedExecutor:
+    settings = get_settings()
+    return BoundedExecutor(
+        name="memcached",
+        max_workers=settings.memcached_executor_workers,
+        max_queue=settings.memcached_executor_queue_size,
+        queue_timeout=settings.memcached_executor_queue_timeout_seconds,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_archive_executor() -> BoundedExecutor:
+    settings = get_settings()
+    return BoundedExecutor(
+        name="archive",
+        max_workers=settings.message_archive_executor_workers,
+        max_queue=settings.message_archive_executor_queue_size,
+        queue_timeout=settings.message_archive_executor_queue_timeout_seconds,
+    )
+
+
+def shutdown_executors() -> None:
+    for getter in (
+        get_cassandra_executor,
+        get_memcached_executor,
+        get_archive_executor,
+    ):
+        if getter.cache_info().currsize:
+            getter().shutdown()
+            getter.cache_clear()
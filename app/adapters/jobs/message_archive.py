@@ -0,0 +1,132 @@
+import asyncio
+import time
+from collections import defaultdict
+from datetime import UTC, datetime, timedelta
+from uuid import UUID
+
+import structlog
+
+from app.domain.entities.job_checkpoint import JobCheckpoint
+from app.domain.entities.message import Message
+from app.domain.ports.message_archive import MessageArchivePort
+from app.domain.repos.job_checkpoint import JobCheckpointRepository
+from app.domain.repos.message import MessageRepository
+from app.domain.repos.room import RoomRepository
+
+logger = structlog.get_logger(__name__)
+
+
+class MessageArchiveJob:
+    checkpoint_name = "message_archive"
+
+    def __init__(
+        self,
+        message_repo: MessageRepository,
+        room_repo: RoomRepository,
+        archive: MessageArchivePort,
+        checkpoint_repo: JobCheckpointRepository,
+        archive_after_days: int = 180,
+        page_size: int = 1000,
+        flush_rows: int = 20_000,
+        max_run_seconds: float = 240.0,
+    ):
+        self._message_repo = message_repo
+        self._room_repo = room_repo
+        self._archive = archive
+        self._checkpoint_repo = checkpoint_repo
+        self._archive_after_days = archive_after_days
+        self._page_size = page_size
+        self._flush_rows = flush_rows
+        self._max_run_seconds = max_run_seconds
+
+    async def run_once(self, stop: asyncio.Event | None = None) -> None:
+        stop = stop or asyncio.Event()
+        deadline = time.monotonic() + self._max_run_seconds
+        cutoff = datetime.now(UTC) - timedelta(days=self._archive_after_days)
+        checkpoint = await self._checkpoint_repo.get(self.checkpoint_name)
+        since = checkpoint.watermark if checkpoint else None
+        logger.bind(since=str(since), cutoff=str(cutoff)).info(
+            "Starting MessageArchiveJob"
+        )
+
+        # rows go oldest first, so a partial run leaves every room with an
+        # archived prefix and its newer rows in cassandra, and history paging
+        # falls back to the archive exactly where the partition ends
+        archivable: dict[UUID, bool] = {}
+        pending: defaultdict[UUID, list[Message]] = defaultdict(list)
+        buffered = 0
+        archived = 0
+        scanned = 0
+        start_after: tuple[datetime, UUID] | None = None
+
+        while time.monotonic() < deadline and not stop.is_set():
+            messages = await self._message_repo.get_oldest_all_rooms(
+                before=cutoff,
+                limit=self._page_size,
+                since=since,
+                start_after=start_after,
+            )
+            if not messages:
+                break
+
+            scanned += len(messages)
+            await self._resolve_rooms(messages=messages, archivable=archivable)
+            for message in messages:
+                if archivable[message.room_id]:
+                    pending[message.room_id].append(message)
+                    buffered += 1
+            start_after = (messages[-1].created_at, messages[-1].id)
+
+            # segments are rewritten per flush, not per page
+            if buffered >= self._flush_rows:
+                archived += await self._flush(pending=pending)
+                buffered = 0
+            if len(messages) < self._page_size:
+                break
+
+        archived += await self._flush(pending=pending)
+        # skipped rows of rooms with a retention policy or of deleted rooms stay
+        # behind the watermark and are not scanned again
+        if start_after is not None:
+            await self._checkpoint_repo.save(
+                JobCheckpoint(
+                    name=self.checkpoint_name,
+                    watermark=start_after[0],
+                    scanned_rows=scanned,
+                )
+            )
+        logger.bind(scanned=scanned, archived=archived).info(
+            "Message archive completed"
+        )
+
+    async def _resolve_rooms(
+        self, messages: list[Message], archivable: dict[UUID, bool]
+    ) -> None:
+        unknown = {m.room_id for m in messages if m.room_id not in archivable}
+        if not unknown:
+            return
+        rooms = await self._room_repo.get_by_ids(room_ids=list(unknown))
+        # rooms with a retention policy expire through TTLs and deleted rooms
+        # are left to the reclaim job, neither belongs in the cold tier
+        for room in rooms:
+            archivable[room.id] = room.retention_days is None
+        for room_id in unknown:
+            archivable.setdefault(room_id, False)
+
+    async def _flush(self, pending: defaultdict[UUID, list[Message]]) -> int:
+        archived = 0
+        while pending:
+            room_id, room_messages = pending.popitem()
+            try:
+                # the segment is durable before any Cassandra row goes away,
+                # a crash in between only leaves rows to be archived again
+                await self._archive.archive(room_id=room_id, messages=room_messages)
+                await self._message_repo.delete_archived(messages=room_messages)
+            except Exception as e:
+                logger.bind(room_id=room_id, error=str(e)).exception(
+                    "Failed to archive room messages"
+                )
+                # the watermark must not pass rows that are still in place
+                raise
+            archived += len(room_messages)
+        return archived
@@ -0,0 +1,425 @@
+import asyncio
+import os
+import random
+import socket
+from contextlib import suppress
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from uuid import UUID
+
+import structlog
+
+from app.core.constants import (
+    AnalyticsEventType,
+    NotificationType,
+    OutboxMessageType,
+    OutboxStatus,
+)
+from app.core.metrics import get_metrics
+from app.core.settings import get_settings
+from app.domain.entities.analytics_event import AnalyticsEvent
+from app.domain.entities.notification import Notification
+from app.domain.entities.outbox import Outbox, OutboxOutcome
+from app.domain.ports.analytics import AnalyticsSinkPort, RealtimeMetricsPort
+from app.domain.ports.notification_sender import NotificationSenderPort
+from app.domain.repos.notification import NotificationRepository
+from app.domain.repos.outbox import OutboxRepository
+
+logger = structlog.get_logger(__name__)
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+def _seconds_since(moment: datetime) -> float:
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=UTC)
+    return (datetime.now(UTC) - moment).total_seconds()
+
+
+@dataclass
+class OutboxLane:
+    type: OutboxMessageType
+    weight: int = 1
+    concurrency: int = 8
+    # None falls back to the poll interval of the dispatcher
+    poll_interval: float | None = None
+
+
+def lanes_from_settings() -> list[OutboxLane]:
+    settings = get_settings()
+    return [
+        OutboxLane(
+            type=message_type,
+            weight=settings.outbox_lane_weights.get(message_type.value, 1),
+            concurrency=settings.outbox_lane_concurrency.get(message_type.value, 8),
+            poll_interval=settings.outbox_lane_poll_interval_seconds.get(
+                message_type.value
+            ),
+        )
+        for message_type in OutboxMessageType
+    ]
+
+
+class _LaneState:
+    def __init__(self, lane: OutboxLane, share: int, batch_size: int) -> None:
+        self.lane = lane
+        self.share = share
+        # a lane idle for now keeps room for one claim, a backlogged one its share
+        self.headroom = min(share, batch_size)
+        self.refill = max(self.headroom // 2, 1)
+        self.send_slots = asyncio.Semaphore(lane.concurrency)
+        self.wakeup = asyncio.Event()
+        self.slot_freed = asyncio.Event()
+        self.busy = 0
+        self.backlogged = False
+
+    @property
+    def reserved(self) -> int:
+        return max((self.share if self.backlogged else self.headroom) - self.busy, 0)
+
+
+class OutboxDispatcher:
+    def __init__(
+        self,
+        outbox_repo: OutboxRepository,
+        notification_repo: NotificationRepository,
+        notification_sender: NotificationSenderPort,
+        analytics_sink: AnalyticsSinkPort,
+        realtime_metrics: RealtimeMetricsPort | None = None,
+        lanes: list[OutboxLane] | None = None,
+        max_in_flight: int = 1000,
+        poll_interval: float = 5.0,
+        batch_size: int = 100,
+        lease_seconds: float = 30.0,
+        flush_interval: float = 0.5,
+        retry_backoff_seconds: float = 2.0,
+        retry_backoff_max_seconds: float = 300.0,
+        worker_id: str | None = None,
+    ):
+        self._outbox_repo = outbox_repo
+        self._notification_repo = notification_repo
+        self._notification_sender = notification_sender
+        self._analytics_sink = analytics_sink
+        self._realtime_metrics = realtime_metrics
+        self._poll_interval = poll_interval
+        self._batch_size = batch_size
+        self._lease_seconds = lease_seconds
+        self._flush_interval = flush_interval
+        self._retry_backoff_seconds = retry_backoff_seconds
+        self._retry_backoff_max_seconds = retry_backoff_max_seconds
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        # leases stay held until the outcome is written, busy counts items
+        # being delivered or waiting for their analytics batch to be durable
+        self._held: set[UUID] = set()
+        self._busy = 0
+        self._capacity = max(max_in_flight, batch_size)
+        lanes = lanes or [
+            OutboxLane(type=message_type) for message_type in OutboxMessageType
+        ]
+        total_weight = sum(lane.weight for lane in lanes)
+        self._lanes = {
+            lane.type: _LaneState(
+                lane=lane,
+                share=max(self._capacity * lane.weight // total_weight, 1),
+                batch_size=batch_size,
+            )
+            for lane in lanes
+        }
+        self._items: set[asyncio.Task[None]] = set()
+        self._outcomes: list[OutboxOutcome] = []
+        self._flush_requested = asyncio.Event()
+
+        metrics = get_metrics()
+        self._latency = metrics.histogram(
+            "outbox_delivery_latency_seconds",
+            "Time from outbox insert to delivery",
+            buckets=LATENCY_BUCKETS,
+        )
+        self._processed = metrics.counter(
+            "outbox_processed_total", "Outbox items processed by outcome"
+        )
+        self._lag = metrics.gauge(
+            "outbox_lane_lag_seconds", "Age of the oldest pending outbox item by lane"
+        )
+        self._in_flight = metrics.gauge(
+            "outbox_lane_in_flight", "Outbox items held by the dispatcher by lane"
+        )
+
+    async def run(self, stop: asyncio.Event) -> None:
+        feeders = [
+            *(
+                asyncio.create_task(self._claim(state))
+                for state in self._lanes.values()
+            ),
+            asyncio.create_task(self._watch()),
+        ]
+        background = [
+            asyncio.create_task(self._heartbeat()),
+            asyncio.create_task(self._flusher()),
+            asyncio.create_task(self._monitor()),
+        ]
+        logger.bind(
+            worker_id=self.worker_id,
+            lanes={
+                state.lane.type.value: state.share for state in self._lanes.values()
+            },
+        ).info("Outbox dispatcher started")
+
+        await stop.wait()
+        for task in feeders:
+            task.cancel()
+        await asyncio.gather(*feeders, return_exceptions=True)
+        # claimed items still finish, leases keep being extended meanwhile
+        await asyncio.gather(*self._items, return_exceptions=True)
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+        await self._flush()
+        logger.bind(worker_id=self.worker_id).info("Outbox dispatcher stopped")
+
+    async def process_pending(self) -> int:
+        claimed: list[Outbox] = []
+        for state in self._lanes.values():
+            claimed.extend(
+                await self._outbox_repo.claim_batch(
+                    worker_id=self.worker_id,
+                    limit=min(state.share, self._batch_size),
+                    lease_seconds=self._lease_seconds,
+                    message_type=state.lane.type,
+                )
+            )
+        for outbox in claimed:
+            self._start(outbox)
+        await asyncio.gather(*self._items, return_exceptions=True)
+        await self._flush()
+        return len(claimed)
+
+    async def dispatch(self, outbox: Outbox) -> OutboxOutcome:
+        task_logger = logger.bind(outbox_id=outbox.id, type=outbox.type.value)
+        if outbox.retries >= outbox.max_retries:
+            # the lease expired on every earlier attempt, the worker died mid-delivery
+            self._processed.inc(type=outbox.type.value, outcome="failed")
+            task_logger.error("Outbox item failed permanently")
+            return OutboxOutcome(
+                outbox_id=outbox.id,
+                status=OutboxStatus.FAILED,
+                last_error=outbox.last_error or "Lease expired",
+            )
+
+        try:
+            await self._deliver(outbox)
+        except Exception as e:
+            if outbox.retries + 1 >= outbox.max_retries:
+                self._processed.inc(type=outbox.type.value, outcome="failed")
+                task_logger.bind(e=str(e)).error("Outbox item failed permanently")
+                return OutboxOutcome(
+                    outbox_id=outbox.id, status=OutboxStatus.FAILED, last_error=str(e)
+                )
+
+            next_attempt_at = self._next_attempt_at(retries=outbox.retries)
+            self._processed.inc(type=outbox.type.value, outcome="retry")
+            task_logger.bind(e=str(e), next_attempt_at=str(next_attempt_at)).warning(
+                "Outbox item will retry"
+            )
+            return OutboxOutcome(
+                outbox_id=outbox.id,
+                status=OutboxStatus.PENDING,
+                last_error=str(e),
+                next_attempt_at=next_attempt_at,
+            )
+
+        sent_at = datetime.now(UTC)
+        latency = _seconds_since(outbox.created_at)
+        self._latency.observe(latency, type=outbox.type.value)
+        self._processed.inc(type=outbox.type.value, outcome="sent")
+        task_logger.bind(latency_ms=round(latency * 1000)).info("Outbox item delivered")
+        return OutboxOutcome(
+            outbox_id=outbox.id, status=OutboxStatus.SENT, sent_at=sent_at
+        )
+
+    def _next_attempt_at(self, retries: int) -> datetime:
+        # exponential so a short outage does not use up every retry, the jitter
+        # spreads out the items that failed together
+        delay = min(
+            self._retry_backoff_seconds * 2**retries, self._retry_backoff_max_seconds
+        )
+        delay *= random.uniform(0.5, 1.0)  # noqa: S311
+        return datetime.now(UTC) + timedelta(seconds=delay)
+
+    async def _deliver(self, outbox: Outbox) -> None:
+        payload = outbox.payload
+        logger.bind(outbox_id=str(outbox.id), payload=payload).debug(
+            "Processing outbox with given payload"
+        )
+        send_slots = self._lanes[outbox.type].send_slots
+        if outbox.type == OutboxMessageType.NOTIFICATION:
+            notification = Notification(
+                user_id=UUID(payload.get("user_id")),
+                payload=payload.get("payload", {}),
+                read=payload.get("read", False),
+                source_id=payload.get("source_id") and UUID(payload.get("source_id")),
+                id=UUID(payload.get("id")),
+                type=NotificationType(payload.get("type")),
+            )
+            async with send_slots:
+                await self._notification_repo.save(notification)
+                await self._notification_sender.send(notification)
+
+        elif outbox.type == OutboxMessageType.ANALYTICS:
+            event = AnalyticsEvent(
+                event_type=AnalyticsEventType(payload.get("event_type")),
+                user_id=payload.get("user_id") and UUID(payload.get("user_id")),
+                room_id=payload.get("room_id") and UUID(payload.get("room_id")),
+                payload=payload.get("payload") or {},
+                id=UUID(payload.get("id")),
+            )
+            async with send_slots:
+                durable = await self._analytics_sink.submit(event)
+            # the item is acknowledged only once its whole batch is in ClickHouse,
+            # the send slot is already free for the next item meanwhile
+            await durable
+            # counted after the insert so a retried item is not counted twice
+            if self._realtime_metrics is not None:
+                await self._realtime_metrics.record(event)
+
+    def _start(self, outbox: Outbox) -> None:
+        state = self._lanes[outbox.type]
+        self._held.add(outbox.id)
+        self._busy += 1
+        state.busy += 1
+        task = asyncio.create_task(self._process(outbox, state))
+        self._items.add(task)
+        task.add_done_callback(self._items.discard)
+
+    async def _process(self, outbox: Outbox, state: _LaneState) -> None:
+        try:
+            outcome = await self.dispatch(outbox)
+            self._outcomes.append(outcome)
+            if len(self._outcomes) >= self._batch_size:
+                self._flush_requested.set()
+        except Exception as e:
+            self._held.discard(outbox.id)
+            logger.bind(outbox_id=outbox.id, error=str(e)).exception(
+                "Failed to dispatch outbox item"
+            )
+        finally:
+            self._busy -= 1
+            state.busy -= 1
+            for lane_state in self._lanes.values():
+                if self._free(lane_state) >= lane_state.refill:
+                    lane_state.slot_freed.set()
+
+    def _free(self, state: _LaneState) -> int:
+        # capacity the other lanes do not hold on to, so a lane that wakes up
+        # never waits behind a backlog of another one
+        reserved = sum(
+            other.reserved for other in self._lanes.values() if other is not state
+        )
+        return self._capacity - self._busy - reserved
+
+    async def _flush(self) -> None:
+        outcomes, self._outcomes = self._outcomes, []
+        if not outcomes:
+            return
+        try:
+            await self._outbox_repo.apply_outcomes(
+                outcomes=outcomes, worker_id=self.worker_id
+            )
+        except Exception as e:
+            # the leases run out and the items are delivered again, at least once
+            logger.bind(count=len(outcomes), error=str(e)).exception(
+                "Failed to write outbox outcomes"
+            )
+        finally:
+            self._held.difference_update(outcome.outbox_id for outcome in outcomes)
+
+    async def _flusher(self) -> None:
+        while True:
+            with suppress(TimeoutError):
+                async with asyncio.timeout(self._flush_interval):
+                    await self._flush_requested.wait()
+            self._flush_requested.clear()
+            await self._flush()
+
+    async def _claim(self, state: _LaneState) -> None:
+        message_type = state.lane.type
+        poll_interval = state.lane.poll_interval or self._poll_interval
+        while True:
+            state.wakeup.clear()
+            state.slot_freed.clear()
+            limit = min(self._free(state), self._batch_size)
+            claimed: list[Outbox] = []
+            if limit > 0:
+                try:
+                    claimed = await self._outbox_repo.claim_batch(
+                        worker_id=self.worker_id,
+                        limit=limit,
+                        lease_seconds=self._lease_seconds,
+                        message_type=message_type,
+                    )
+                except Exception as e:
+                    logger.bind(type=message_type.value, error=str(e)).exception(
+                        "Failed to claim outbox items"
+                    )
+                # a full batch means more is likely pending
+                state.backlogged = len(claimed) == limit
+
+            for outbox in claimed:
+                self._start(outbox)
+
+            # keep claiming while there is room for a decent batch instead of
+            # waiting for the next insert or poll
+            if limit > 0 and state.backlogged and self._free(state) >= state.refill:
+                continue
+            event = (
+                state.wakeup if limit > 0 and not state.backlogged else state.slot_freed
+            )
+            with suppress(TimeoutError):
+                async with asyncio.timeout(poll_interval):
+                    await event.wait()
+
+    async def _watch(self) -> None:
+        while True:
+            try:
+                async for outbox in self._outbox_repo.watch_pending():
+                    state = self._lanes.get(outbox.type)
+                    if state is not None:
+                        state.wakeup.set()
+            except Exception as e:
+                # standalone mongo has no change streams, the poll keeps going
+                logger.bind(error=str(e)).warning(
+                    "Outbox change stream interrupted, relying on polling"
+                )
+            await asyncio.sleep(self._poll_interval)
+
+    async def _monitor(self) -> None:
+        while True:
+            for state in self._lanes.values():
+                message_type = state.lane.type
+                self._in_flight.set(state.busy, type=message_type.value)
+                try:
+                    oldest = await self._outbox_repo.oldest_pending_created_at(
+                        message_type
+                    )
+                except Exception as e:
+                    logger.bind(type=message_type.value, error=str(e)).warning(
+                        "Failed to read outbox lane lag"
+                    )
+                    continue
+                lag = _seconds_since(oldest) if oldest else 0.0
+                self._lag.set(max(lag, 0.0), type=message_type.value)
+            await asyncio.sleep(self._poll_interval)
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self._lease_seconds / 3)
+            if not self._held:
+                continue
+            try:
+                await self._outbox_repo.extend_leases(
+                    outbox_ids=list(self._held),
+                    worker_id=self.worker_id,
+                    lease_seconds=self._lease_seconds,
+                )
+            except Exception as e:
+                logger.bind(error=str(e)).exception("Failed to extend outbox leases")
@@ -1,114 +1,198 @@
 import asyncio
+import time
 from datetime import UTC, datetime, timedelta
+from uuid import UUID
 
 import structlog
 
 from app.core.constants import AnalyticsEventType, OutboxMessageType, OutboxStatus
+from app.core.metrics import get_metrics
 from app.domain.entities.analytics_event import AnalyticsEvent
+from app.domain.entities.job_checkpoint import JobCheckpoint
+from app.domain.entities.message import Message
 from app.domain.entities.outbox import Outbox
+from app.domain.repos.job_checkpoint import JobCheckpointRepository
 from app.domain.repos.message import MessageRepository
 from app.domain.repos.outbox import OutboxRepository
 
 logger = structlog.get_logger(__name__)
 
+SCANNED_BUCKETS = (0, 100, 1000, 10_000, 100_000, 1_000_000)
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Cassandra hands back naive UTC timestamps
+    return value if value.tzinfo else value.replace(tzinfo=UTC)
+
 
 class OutboxRepairJob:
-    dedup_mapping = (
-        ("message_sent", AnalyticsEventType.MESSAGE_SENT),
-        ("message_deleted", AnalyticsEventType.MESSAGE_DELETED),
-        ("message_edited", AnalyticsEventType.MESSAGE_EDITED),
-    )
+    checkpoint_name = "outbox_repair"
 
     def __init__(
         self,
         message_repo: MessageRepository,
         outbox_repo: OutboxRepository,
+        checkpoint_repo: JobCheckpointRepository,
         window_minutes: int = 3,
+        overlap_seconds: float = 120.0,
+        max_scan_minutes: int = 60,
         batch_size: int = 200,
         delay_between_batches: float = 0.1,
+        max_run_seconds: float = 240.0,
     ):
         self._message_repo = message_repo
         self._outbox_repo = outbox_repo
-        self._window_minutes = window_minutes
+        self._checkpoint_repo = checkpoint_repo
+        self._window = timedelta(minutes=window_minutes)
+        self._overlap = timedelta(seconds=overlap_seconds)
+        self._max_scan = timedelta(minutes=max_scan_minutes)
         self._batch_size = batch_size
         self._delay_between_batches = delay_between_batches
-
-    async def run_once(self) -> None:
-        since = datetime.now(UTC) - timedelta(minutes=self._window_minutes)
-        logger.bind(since=str(since)).info("Starting OutboxRepairJob")
-
+        self._max_run_seconds = max_run_seconds
+
+        metrics = get_metrics()
+        self._lag = metrics.gauge(
+            "outbox_repair_lag_seconds", "Age of the outbox repair watermark"
+        )
+        self._scanned = metrics.histogram(
+            "outbox_repair_scanned_rows",
+            "Messages scanned per outbox repair run",
+            buckets=SCANNED_BUCKETS,
+        )
+        self._repaired = metrics.counter(
+            "outbox_repaired_total", "Outbox events inserted by the repair job"
+        )
+
+    async def run_once(self, stop: asyncio.Event | None = None) -> None:
+        stop = stop or asyncio.Event()
+        deadline = time.monotonic() + self._max_run_seconds
+        now = datetime.now(UTC)
+        checkpoint = await self._checkpoint_repo.get(self.checkpoint_name)
+        watermark = checkpoint.watermark if checkpoint else now - self._window
+        since = watermark - self._overlap if checkpoint else watermark
+        # a backlog left by an outage is caught up over several bounded runs
+        until = min(now, since + self._max_scan)
+        logger.bind(since=str(since), until=str(until)).info("Starting OutboxRepairJob")
+
+        scanned = 0
         repaired = 0
-        start_after = None
+        complete = False
+        failed = False
+        start_after: tuple[datetime, UUID] | None = None
 
-        while True:
+        # rows go oldest first, so a run stopped early still moves the watermark
+        # up to the last row it scanned
+        while time.monotonic() < deadline and not stop.is_set():
             try:
-                messages = await self._message_repo.get_since_all_rooms(
-                    since=since, limit=self._batch_size, start_after=start_after
+                messages = await self._message_repo.get_oldest_all_rooms(
+                    since=since,
+                    before=until,
+                    limit=self._batch_size,
+                    start_after=start_after,
                 )
             except Exception as e:
                 logger.bind(error=str(e)).exception(
                     "Failed to fetch messages from repository"
                 )
+                failed = True
                 break
 
-            if not messages:
-                break
-
-            all_keys: list[str] = []
-            for msg in messages:
-                all_keys.extend(
-                    (
-                        f"message_sent:{msg.id}",
-                        f"message_deleted:{msg.id}",
-                        f"message_edited:{msg.id}",
+            scanned += len(messages)
+            if messages:
+                try:
+                    repaired += await self._repair(messages)
+                except Exception as e:
+                    logger.bind(count=len(messages), error=str(e)).exception(
+                        "Failed to repair outbox events"
                     )
-                )
-
-            try:
-                existing_keys = set(
-                    await self._outbox_repo.exists_by_dedup_keys(all_keys)
-                )
-            except Exception as e:
-                logger.bind(error=str(e)).exception(
-                    "Failed to check existing outbox keys"
-                )
-                existing_keys = set()
-
-            for msg in messages:
-                for prefix, event_type in OutboxRepairJob.dedup_mapping:
-                    dedup_key = f"{prefix}:{msg.id}"
-                    if dedup_key in existing_keys:
-                        continue
-
-                    try:
-                        analytics = AnalyticsEvent(
-                            event_type=event_type,
-                            user_id=msg.user_id,
-                            room_id=msg.room_id,
-                            payload={"message": msg.content},
-                        )
-                        outbox = Outbox(
-                            type=OutboxMessageType.ANALYTICS,
-                            status=OutboxStatus.PENDING,
-                            payload=analytics.to_payload(),
-                            dedup_key=dedup_key,
-                        )
-                        await self._outbox_repo.save(outbox=outbox)
-                        repaired += 1
-
-                    except Exception as e:
-                        logger.bind(
-                            message_id=msg.id, dedup_key=dedup_key, error=str(e)
-                        ).exception("Failed to repair outbox event")
+                    failed = True
+                    break
 
-            await asyncio.sleep(self._delay_between_batches)
+            if len(messages) < self._batch_size:
+                complete = True
+                break
 
             last_msg = messages[-1]
             start_after = (last_msg.created_at, last_msg.id)
-            if len(messages) < self._batch_size:
-                break
+            await asyncio.sleep(self._delay_between_batches)
 
-        logger.bind(repaired=repaired).info("Outbox repair completed")
+        # a failed run is scanned again from the previous watermark
+        progress = until if complete else None
+        if start_after is not None and not complete and not failed:
+            progress = _as_utc(start_after[0])
+        if progress is not None:
+            watermark = progress
+            await self._checkpoint_repo.save(
+                JobCheckpoint(
+                    name=self.checkpoint_name, watermark=watermark, scanned_rows=scanned
+                )
+            )
+
+        lag = (datetime.now(UTC) - watermark).total_seconds()
+        self._lag.set(lag)
+        self._scanned.observe(scanned)
+        self._repaired.inc(repaired)
+        logger.bind(
+            scanned=scanned,
+            repaired=repaired,
+            complete=complete,
+            lag_seconds=round(lag, 1),
+        ).info("Outbox repair completed")
+
+    @staticmethod
+    def _expected_events(msg: Message) -> list[tuple[str, AnalyticsEvent]]:
+        # deleted messages are gone from messages_global, only sends and edits
+        # can be told apart here
+        events = [
+            (
+                f"message_sent:{msg.id}",
+                AnalyticsEvent(
+                    event_type=AnalyticsEventType.MESSAGE_SENT,
+                    user_id=msg.user_id,
+                    room_id=msg.room_id,
+                    payload={"message": msg.content},
+                ),
+            )
+        ]
+        if msg.edited:
+            events.append(
+                (
+                    f"message_edited:{msg.id}",
+                    AnalyticsEvent(
+                        event_type=AnalyticsEventType.MESSAGE_EDITED,
+                        user_id=msg.user_id,
+                        room_id=msg.room_id,
+                        payload={"new_message": msg.content},
+                    ),
+                )
+            )
+        return events
+
+    async def _repair(self, messages: list[Message]) -> int:
+        expected = [event for msg in messages for event in self._expected_events(msg)]
+        try:
+            existing_keys = set(
+                await self._outbox_repo.exists_by_dedup_keys(
+                    [dedup_key for dedup_key, _ in expected]
+                )
+            )
+        except Exception as e:
+            # the inserts only apply to missing keys, checking just saves writes
+            logger.bind(error=str(e)).exception("Failed to check existing outbox keys")
+            existing_keys = set()
+
+        missing = [
+            Outbox(
+                type=OutboxMessageType.ANALYTICS,
+                status=OutboxStatus.PENDING,
+                payload=analytics.to_payload(),
+                dedup_key=dedup_key,
+            )
+            for dedup_key, analytics in expected
+            if dedup_key not in existing_keys
+        ]
+        await self._outbox_repo.save_many(outboxes=missing)
+        return len(missing)
 
     async def run_forever(self, interval_seconds: int = 60) -> None:
         while True:
@@ -0,0 +1,67 @@
+from typing import Any
+
+import structlog
+from clickhouse_connect.driver.asyncclient import AsyncClient
+from pymongo import AsyncMongoClient
+from pymongo.asynchronous.database import AsyncDatabase
+from redis.asyncio import Redis
+
+from app.adapters.analytics.clickhouse_client import create_clickhouse_client
+from app.adapters.analytics.sink import BufferedAnalyticsSink
+from app.adapters.db.mongo_client import create_mongo_client
+from app.core.settings import get_settings
+
+logger = structlog.get_logger(__name__)
+
+
+class WorkerResources:
+    def __init__(
+        self,
+        redis: Redis,
+        app_redis: Redis,
+        mongo_client: AsyncMongoClient[Any],
+        clickhouse: AsyncClient,
+        analytics_sink: BufferedAnalyticsSink,
+    ) -> None:
+        # redis holds the job locks, app_redis the data the api reads
+        self.redis = redis
+        self.app_redis = app_redis
+        self.mongo_client = mongo_client
+        self.clickhouse = clickhouse
+        self.analytics_sink = analytics_sink
+
+    @property
+    def mongo_db(self) -> AsyncDatabase[Any]:
+        return self.mongo_client[get_settings().mongo_dbname]
+
+    @classmethod
+    async def create(cls) -> "WorkerResources":
+        settings = get_settings()
+        # the create_* helpers ensure indexes and tables, once per process here
+        mongo_client = await create_mongo_client()
+        clickhouse = await create_clickhouse_client()
+        analytics_sink = BufferedAnalyticsSink(
+            client=clickhouse,
+            max_batch_size=settings.analytics_sink_batch_size,
+            max_buffer_size=settings.analytics_sink_buffer_size,
+            max_age_seconds=settings.analytics_sink_max_age_seconds,
+        )
+        await analytics_sink.start()
+        logger.info("Worker resources initialized")
+        return cls(
+            redis=Redis.from_url(settings.redis_jobs_dsn),
+            app_redis=Redis.from_url(
+                settings.redis_app_dsn, encoding="utf-8", decode_responses=True
+            ),
+            mongo_client=mongo_client,
+            clickhouse=clickhouse,
+            analytics_sink=analytics_sink,
+        )
+
+    async def close(self) -> None:
+        await self.analytics_sink.close()
+        await self.mongo_client.close()
+        await self.redis.aclose()
+        await self.app_redis.aclose()
+        await self.clickhouse.close()
+        logger.info("Worker resources closed")
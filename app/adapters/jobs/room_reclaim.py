@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+import structlog
+
+from app.domain.entities.room_reclaim import RoomReclaim
+from app.domain.repos.message import MessageRepository
+from app.domain.repos.room_reclaim import RoomReclaimRepository
+
+logger = structlog.get_logger(__name__)
+
+
+class RoomReclaimJob:
+    def __init__(
+        self,
+        message_repo: MessageRepository,
+        reclaim_repo: RoomReclaimRepository,
+        rooms_per_run: int = 20,
+        page_size: int = 500,
+        rows_per_second: float = 2000.0,
+        max_run_seconds: float = 240.0,
+    ):
+        self._message_repo = message_repo
+        self._reclaim_repo = reclaim_repo
+        self._rooms_per_run = rooms_per_run
+        self._page_size = page_size
+        self._rows_per_second = rows_per_second
+        self._max_run_seconds = max_run_seconds
+
+    async def run_once(self, stop: asyncio.Event | None = None) -> None:
+        stop = stop or asyncio.Event()
+        deadline = time.monotonic() + self._max_run_seconds
+        pending = await self._reclaim_repo.list_pending(limit=self._rooms_per_run)
+        logger.bind(rooms=len(pending)).info("Starting RoomReclaimJob")
+
+        reclaimed_rooms = 0
+        for reclaim in pending:
+            if time.monotonic() >= deadline or stop.is_set():
+                break
+            try:
+                if await self._reclaim_room(
+                    reclaim=reclaim, deadline=deadline, stop=stop
+                ):
+                    reclaimed_rooms += 1
+            except Exception as e:
+                logger.bind(room_id=reclaim.room_id, error=str(e)).exception(
+                    "Failed to reclaim room messages"
+                )
+
+        logger.bind(reclaimed_rooms=reclaimed_rooms).info("Room reclaim completed")
+
+    async def _reclaim_room(
+        self, reclaim: RoomReclaim, deadline: float, stop: asyncio.Event
+    ) -> bool:
+        room_id = reclaim.room_id
+        checkpoint = reclaim.checkpoint
+        reclaimed_rows = reclaim.reclaimed_rows
+        if checkpoint:
+            logger.bind(room_id=room_id, checkpoint=str(checkpoint)).info(
+                "Resuming room reclaim"
+            )
+
+        while True:
+            if time.monotonic() >= deadline or stop.is_set():
+                logger.bind(room_id=room_id, reclaimed_rows=reclaimed_rows).info(
+                    "Room reclaim paused, will resume from checkpoint"
+                )
+                return False
+
+            started = time.monotonic()
+            # the room partition and its archive are only read here and dropped
+            # at the end, so the checkpoint stays valid whatever happened to the
+            # lookup tables. Archived messages still have their lookup rows.
+            # Rows written after a retention policy was set are newer than the
+            # ones read first and may be passed over, their lookup rows expire.
+            messages = await self._message_repo.get_recent_by_room(
+                room_id=room_id, limit=self._page_size, before=checkpoint
+            )
+            if not messages:
+                break
+
+            await self._message_repo.delete_lookup_rows(messages=messages)
+            checkpoint = messages[-1].created_at
+            reclaimed_rows += len(messages)
+            await self._reclaim_repo.save_checkpoint(
+                room_id=room_id, checkpoint=checkpoint, reclaimed_rows=reclaimed_rows
+            )
+
+            if len(messages) < self._page_size:
+                break
+
+            pause = len(messages) / self._rows_per_second - (time.monotonic() - started)
+            if pause > 0:
+                await asyncio.sleep(pause)
+
+        await self._message_repo.delete_room_partition(room_id=room_id)
+        await self._reclaim_repo.delete(room_id=room_id)
+        logger.bind(room_id=room_id, reclaimed_rows=reclaimed_rows).info(
+            "Room messages reclaimed"
+        )
+        return True
@@ -0,0 +1,237 @@
+import asyncio
+import signal
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+import structlog
+from redis.asyncio.lock import Lock
+from redis.exceptions import LockError
+
+from app.adapters.db.cassandra_engine import CassandraEngine
+from app.adapters.executor import shutdown_executors
+from app.adapters.jobs.resources import WorkerResources
+from app.adapters.jobs.schedule import CronSchedule, IntervalSchedule
+from app.adapters.jobs.tasks import (
+    archive_messages,
+    build_outbox_dispatcher,
+    reclaim_rooms,
+    repair_outbox,
+)
+from app.core.logger import prepare_logger
+from app.core.metrics import get_metrics
+from app.core.settings import get_settings
+
+logger = structlog.get_logger(__name__)
+
+DURATION_BUCKETS = (0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[[WorkerResources, asyncio.Event], Awaitable[None]]
+    # None runs the job for the whole life of the runner, restarting it if it exits
+    schedule: IntervalSchedule | CronSchedule | None = None
+    lock_key: str | None = None
+    lock_timeout: float = 60 * 5
+    max_instances: int = 1
+
+
+class JobRunner:
+    def __init__(
+        self,
+        resources: WorkerResources,
+        jobs: list[Job],
+        shutdown_grace_seconds: float = 30.0,
+        restart_delay_seconds: float = 5.0,
+    ):
+        self._resources = resources
+        self._jobs = jobs
+        self._shutdown_grace_seconds = shutdown_grace_seconds
+        self._restart_delay_seconds = restart_delay_seconds
+        self._running: dict[str, set[asyncio.Task[None]]] = {
+            job.name: set() for job in jobs
+        }
+
+        metrics = get_metrics()
+        self._duration = metrics.histogram(
+            "job_duration_seconds", "Background job run time", buckets=DURATION_BUCKETS
+        )
+        self._runs = metrics.counter("job_runs_total", "Background job runs by status")
+
+    async def run(self, stop: asyncio.Event) -> None:
+        logger.bind(jobs=[job.name for job in self._jobs]).info("Job runner started")
+        # schedulers return once stop is set, running jobs are left to finish
+        await asyncio.gather(*(self._schedule(job, stop) for job in self._jobs))
+
+        running = {task for tasks in self._running.values() for task in tasks}
+        if running:
+            _, pending = await asyncio.wait(
+                running, timeout=self._shutdown_grace_seconds
+            )
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            if pending:
+                logger.bind(cancelled=len(pending)).warning(
+                    "Jobs cancelled after the shutdown grace period"
+                )
+        logger.info("Job runner stopped")
+
+    async def _schedule(self, job: Job, stop: asyncio.Event) -> None:
+        if job.schedule is None:
+            while not stop.is_set():
+                task = self._launch(job, stop)
+                stopped = asyncio.create_task(stop.wait())
+                # on stop the job is left running, run() gives it the grace period
+                await asyncio.wait([task, stopped], return_when=asyncio.FIRST_COMPLETED)
+                stopped.cancel()
+                await self._sleep(self._restart_delay_seconds, stop)
+            return
+
+        next_run = job.schedule.next_after(datetime.now(UTC))
+        while not await self._sleep(
+            (next_run - datetime.now(UTC)).total_seconds(), stop
+        ):
+            if len(self._running[job.name]) >= job.max_instances:
+                self._runs.inc(job=job.name, status="overlapped")
+                logger.bind(job=job.name).warning("Job still running, skipping run")
+            else:
+                self._launch(job, stop)
+            # a run that was late does not fire again for the ticks it missed
+            next_run = job.schedule.next_after(max(next_run, datetime.now(UTC)))
+
+    def _launch(self, job: Job, stop: asyncio.Event) -> asyncio.Task[None]:
+        task = asyncio.create_task(self._execute(job, stop))
+        self._running[job.name].add(task)
+        task.add_done_callback(self._running[job.name].discard)
+        return task
+
+    async def _execute(self, job: Job, stop: asyncio.Event) -> None:
+        lock = None
+        if job.lock_key is not None:
+            lock = self._resources.redis.lock(job.lock_key, timeout=job.lock_timeout)
+            if not await lock.acquire(blocking=False):
+                self._runs.inc(job=job.name, status="locked")
+                logger.bind(job=job.name).info("Job running elsewhere, skipping run")
+                return
+
+        renewal = (
+            asyncio.create_task(self._renew_lock(job, lock))
+            if lock is not None
+            else None
+        )
+        started = time.monotonic()
+        status = "failed"
+        try:
+            await job.func(self._resources, stop)
+            status = "succeeded"
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        except Exception as e:
+            logger.bind(job=job.name, error=str(e)).exception("Job failed")
+        finally:
+            elapsed = time.monotonic() - started
+            self._duration.observe(elapsed, job=job.name)
+            self._runs.inc(job=job.name, status=status)
+            logger.bind(job=job.name, status=status, seconds=round(elapsed, 3)).info(
+                "Job finished"
+            )
+            if renewal is not None:
+                renewal.cancel()
+                await asyncio.gather(renewal, return_exceptions=True)
+            if lock is not None:
+                # the lock is gone if a renewal failed for longer than its timeout
+                with suppress(LockError):
+                    await lock.release()
+
+    @staticmethod
+    async def _renew_lock(job: Job, lock: Lock) -> None:
+        # a run may take longer than the lock timeout, so the lock is extended
+        # while it runs instead of expiring under it
+        while True:
+            await asyncio.sleep(job.lock_timeout / 3)
+            try:
+                await lock.extend(job.lock_timeout, replace_ttl=True)
+            except LockError:
+                logger.bind(job=job.name).error("Job lock lost while running")
+                return
+            except Exception as e:
+                logger.bind(job=job.name, error=str(e)).warning(
+                    "Job lock renewal failed, retrying"
+                )
+
+    @staticmethod
+    async def _sleep(seconds: float, stop: asyncio.Event) -> bool:
+        with suppress(TimeoutError):
+            async with asyncio.timeout(max(seconds, 0.0)):
+                await stop.wait()
+        return stop.is_set()
+
+
+async def _dispatch_outbox(resources: WorkerResources, stop: asyncio.Event) -> None:
+    await build_outbox_dispatcher(resources).run(stop)
+
+
+def build_jobs() -> list[Job]:
+    settings = get_settings()
+    return [
+        Job(name="outbox-dispatcher", func=_dispatch_outbox),
+        Job(
+            name="outbox-repair",
+            func=repair_outbox,
+            schedule=IntervalSchedule(settings.job_outbox_repair_interval_seconds),
+            lock_key=settings.job_outbox_repair_lock_key,
+            lock_timeout=settings.job_outbox_repair_lock_timeout,
+        ),
+        Job(
+            name="room-reclaim",
+            func=reclaim_rooms,
+            schedule=CronSchedule(settings.job_room_reclaim_cron),
+            lock_key=settings.job_room_reclaim_lock_key,
+            lock_timeout=settings.job_room_reclaim_lock_timeout,
+        ),
+        Job(
+            name="message-archive",
+            func=archive_messages,
+            schedule=CronSchedule(settings.job_message_archive_cron),
+            lock_key=settings.job_message_archive_lock_key,
+            lock_timeout=settings.job_message_archive_lock_timeout,
+        ),
+    ]
+
+
+async def main() -> None:
+    settings = get_settings()
+    prepare_logger(log_level=settings.log_level)
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        with suppress(NotImplementedError):
+            loop.add_signal_handler(sig, stop.set)
+
+    jobs = build_jobs()
+    cassandra_engine = CassandraEngine()
+    resources = await WorkerResources.create()
+    try:
+        runner = JobRunner(
+            resources=resources,
+            jobs=jobs,
+            shutdown_grace_seconds=settings.job_runner_shutdown_grace_seconds,
+            restart_delay_seconds=settings.job_runner_restart_delay_seconds,
+        )
+        await runner.run(stop)
+    finally:
+        # flush-on-shutdown happens in close, after the last job has returned
+        await resources.close()
+        cassandra_engine.shutdown()
+        shutdown_executors()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+# bounds of the cron fields: minute, hour, day of month, month, weekday
+FIELD_BOUNDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+MAX_LOOKAHEAD = timedelta(days=366 * 5)
+
+
+def _parse_field(field: str, low: int, high: int) -> set[int]:
+    values: set[int] = set()
+    for part in field.split(","):
+        range_part, _, step_part = part.partition("/")
+        step = int(step_part) if step_part else 1
+        if range_part == "*":
+            start, stop = low, high
+        elif "-" in range_part:
+            first, last = range_part.split("-")
+            start, stop = int(first), int(last)
+        else:
+            start = int(range_part)
+            stop = high if step_part else start
+        if not low <= start <= stop <= high or step < 1:
+            raise ValueError(f"Invalid cron field {field!r}")
+        values.update(range(start, stop + 1, step))
+    return values
+
+
+class IntervalSchedule:
+    def __init__(self, seconds: float) -> None:
+        if seconds <= 0:
+            raise ValueError("Interval must be positive")
+        self._interval = timedelta(seconds=seconds)
+
+    def next_after(self, moment: datetime) -> datetime:
+        return moment + self._interval
+
+
+class CronSchedule:
+    def __init__(self, expression: str) -> None:
+        fields = expression.split()
+        if len(fields) != len(FIELD_BOUNDS):
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        minutes, hours, days, months, weekdays = (
+            _parse_field(field, low, high)
+            for field, (low, high) in zip(fields, FIELD_BOUNDS, strict=True)
+        )
+        self._minutes = minutes
+        self._hours = hours
+        self._days = days
+        self._months = months
+        # cron counts sunday as 0 and 7, isoweekday % 7 gives the same numbering
+        self._weekdays = {day % 7 for day in weekdays}
+        # like cron, a day matches either field when both are restricted
+        self._days_any = fields[2] == "*"
+        self._weekdays_any = fields[4] == "*"
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day = moment.day in self._days
+        weekday = moment.isoweekday() % 7 in self._weekdays
+        if self._days_any or self._weekdays_any:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, moment: datetime) -> datetime:
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + MAX_LOOKAHEAD
+        while candidate <= limit:
+            if candidate.month not in self._months or not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self._hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self._minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError("Cron expression never matches")
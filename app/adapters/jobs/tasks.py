@@ -0,0 +1,93 @@
+import asyncio
+
+import structlog
+
+from app.adapters.analytics.realtime import RedisRealtimeMetrics
+from app.adapters.archive.local import get_message_archive
+from app.adapters.connection.redis_connection import RedisConnectionPort
+from app.adapters.db.repos.cassandra.message import CassandraMessageRepository
+from app.adapters.db.repos.mongo.job_checkpoint import MongoJobCheckpointRepository
+from app.adapters.db.repos.mongo.notification import MongoNotificationRepository
+from app.adapters.db.repos.mongo.outbox import MongoOutboxRepository
+from app.adapters.db.repos.mongo.room import MongoRoomRepository
+from app.adapters.db.repos.mongo.room_reclaim import MongoRoomReclaimRepository
+from app.adapters.jobs.message_archive import MessageArchiveJob
+from app.adapters.jobs.outbox_dispatcher import OutboxDispatcher, lanes_from_settings
+from app.adapters.jobs.outbox_repair import OutboxRepairJob
+from app.adapters.jobs.resources import WorkerResources
+from app.adapters.jobs.room_reclaim import RoomReclaimJob
+from app.adapters.notification_sender.websocket_sender import (
+    WebSocketNotificationSender,
+)
+from app.core.settings import get_settings
+
+logger = structlog.get_logger(__name__)
+
+
+def build_outbox_dispatcher(resources: WorkerResources) -> OutboxDispatcher:
+    settings = get_settings()
+    return OutboxDispatcher(
+        outbox_repo=MongoOutboxRepository(db=resources.mongo_db),
+        notification_repo=MongoNotificationRepository(db=resources.mongo_db),
+        notification_sender=WebSocketNotificationSender(
+            connection_port=RedisConnectionPort(redis=resources.app_redis)
+        ),
+        analytics_sink=resources.analytics_sink,
+        realtime_metrics=RedisRealtimeMetrics(redis=resources.app_redis),
+        lanes=lanes_from_settings(),
+        max_in_flight=settings.outbox_dispatcher_max_in_flight,
+        poll_interval=settings.outbox_dispatcher_poll_interval_seconds,
+        batch_size=settings.outbox_dispatcher_batch_size,
+        lease_seconds=settings.outbox_lease_seconds,
+        flush_interval=settings.outbox_dispatcher_flush_interval_seconds,
+        retry_backoff_seconds=settings.outbox_retry_backoff_seconds,
+        retry_backoff_max_seconds=settings.outbox_retry_backoff_max_seconds,
+    )
+
+
+async def repair_outbox(resources: WorkerResources, stop: asyncio.Event) -> None:
+    settings = get_settings()
+    job = OutboxRepairJob(
+        message_repo=CassandraMessageRepository(),
+        outbox_repo=MongoOutboxRepository(db=resources.mongo_db),
+        checkpoint_repo=MongoJobCheckpointRepository(db=resources.mongo_db),
+        window_minutes=settings.outbox_repair_initial_window_minutes,
+        overlap_seconds=settings.outbox_repair_overlap_seconds,
+        max_scan_minutes=settings.outbox_repair_max_scan_minutes,
+        batch_size=settings.outbox_repair_batch_size,
+        max_run_seconds=settings.outbox_repair_max_run_seconds,
+    )
+    await job.run_once(stop)
+    logger.info("OutboxRepairJob completed")
+
+
+async def reclaim_rooms(resources: WorkerResources, stop: asyncio.Event) -> None:
+    job = RoomReclaimJob(
+        message_repo=CassandraMessageRepository(),
+        reclaim_repo=MongoRoomReclaimRepository(db=resources.mongo_db),
+        rooms_per_run=get_settings().room_reclaim_rooms_per_run,
+        page_size=get_settings().room_reclaim_page_size,
+        rows_per_second=get_settings().room_reclaim_rows_per_second,
+        max_run_seconds=get_settings().room_reclaim_max_run_seconds,
+    )
+    await job.run_once(stop)
+    logger.info("RoomReclaimJob completed")
+
+
+async def archive_messages(resources: WorkerResources, stop: asyncio.Event) -> None:
+    archive = get_message_archive()
+    if archive is None:
+        return
+
+    job = MessageArchiveJob(
+        message_repo=CassandraMessageRepository(),
+        room_repo=MongoRoomRepository(db=resources.mongo_db),
+        archive=archive,
+        checkpoint_repo=MongoJobCheckpointRepository(db=resources.mongo_db),
+        archive_after_days=get_settings().message_archive_after_days,
+        page_size=get_settings().message_archive_page_size,
+        flush_rows=get_settings().message_archive_flush_rows,
+        max_run_seconds=get_settings().message_archive_max_run_seconds,
+    )
+    await job.run_once(stop)
+    logger.info("MessageArchiveJob completed")
@@ -11,7 +11,7 @@ class WebSocketNotificationSender:
         self._conn = connection_port
 
     async def send(self, notification: Notification) -> None:
-        payload = {
+        payload: dict[str, str | list[str]] = {
             "notification_type": notification.type.value,
             "user_id": str(notification.user_id),
         }
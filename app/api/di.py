@@ -8,7 +8,13 @@ from redis.asyncio import Redis
 from starlette.websockets import WebSocket
 
 from app.adapters.analytics.analytics import ClickHouseAnalyticsRepository
+from app.adapters.analytics.cache import (
+    AnalyticsResultCache,
+    CachedAnalyticsRepository,
+)
+from app.adapters.analytics.realtime import RedisRealtimeMetrics
 from app.adapters.cache.memcache import MemcachedCache
+from app.adapters.cache.recent_messages import RedisRecentMessagesCache
 from app.adapters.connection.redis_connection import RedisConnectionPort
 from app.adapters.db.cassandra_engine import CassandraEngine
 from app.adapters.db.mongo_trans_manager import MongoTransactionManager
@@ -18,6 +24,7 @@ from app.adapters.db.repos.mongo.notification import MongoNotificationRepository
 from app.adapters.db.repos.mongo.outbox import MongoOutboxRepository
 from app.adapters.db.repos.mongo.room import MongoRoomRepository
 from app.adapters.db.repos.mongo.room_membership import MongoRoomMembershipRepository
+from app.adapters.db.repos.mongo.room_reclaim import MongoRoomReclaimRepository
 from app.adapters.db.repos.mongo.user import MongoUserRepository
 from app.adapters.db.repos.redis.user_session import RedisSessionRepository
 from app.adapters.db.repos.redis.websocket_session import (
@@ -26,18 +33,23 @@ from app.adapters.db.repos.redis.websocket_session import (
 from app.adapters.notification_sender.websocket_sender import (
     WebSocketNotificationSender,
 )
-from app.domain.ports.analytics import AnalyticsPort
+from app.core.settings import get_settings
+from app.domain.ports.analytics import AnalyticsPort, RealtimeMetricsPort
 from app.domain.ports.cache import CachePort
 from app.domain.ports.connection import ConnectionPort
 from app.domain.ports.notification_sender import NotificationSenderPort
 from app.domain.ports.password_hasher import PasswordHasherPort
+from app.domain.ports.recent_messages_cache import RecentMessagesCachePort
+from app.domain.ports.room_retention_cache import RoomRetentionCachePort
 from app.domain.ports.transaction_manager import TransactionManager
+from app.domain.ports.username_cache import UsernameCachePort
 from app.domain.repos.join_request import JoinRequestRepository
 from app.domain.repos.message import MessageRepository
 from app.domain.repos.notification import NotificationRepository
 from app.domain.repos.outbox import OutboxRepository
 from app.domain.repos.room import RoomRepository
 from app.domain.repos.room_membership import RoomMembershipRepository
+from app.domain.repos.room_reclaim import RoomReclaimRepository
 from app.domain.repos.user import UserRepository
 from app.domain.repos.user_session import UserSessionRepository
 from app.domain.repos.websocket_session import WebSocketSessionRepository
@@ -73,10 +85,33 @@ def get_clickhouse(request: Request) -> AsyncClient:
     return request.app.state.clickhouse  # type: ignore[no-any-return]
 
 
+def get_username_cache(request: Request) -> UsernameCachePort:
+    return request.app.state.username_cache  # type: ignore[no-any-return]
+
+
+def get_room_retention_cache(request: Request) -> RoomRetentionCachePort:
+    return request.app.state.room_retention_cache  # type: ignore[no-any-return]
+
+
+def get_analytics_cache(request: Request) -> AnalyticsResultCache:
+    return request.app.state.analytics_cache  # type: ignore[no-any-return]
+
+
 def get_analytics(
     client: AsyncClient = Depends(get_clickhouse),
+    cache: AnalyticsResultCache = Depends(get_analytics_cache),
 ) -> AnalyticsPort:
-    return ClickHouseAnalyticsRepository(client=client)
+    return CachedAnalyticsRepository(
+        analytics=ClickHouseAnalyticsRepository(
+            client=client, sample_rate=get_settings().analytics_sample_rate
+        ),
+        cache=cache,
+        ttl_seconds=get_settings().analytics_cache_ttl_seconds,
+    )
+
+
+def get_realtime_metrics(redis: Redis = Depends(get_redis)) -> RealtimeMetricsPort:
+    return RedisRealtimeMetrics(redis=redis)
 
 
 def get_connection(
@@ -85,6 +120,12 @@ def get_connection(
     return RedisConnectionPort(redis=redis)
 
 
+def get_recent_messages_cache(
+    redis: Redis = Depends(get_redis),
+) -> RecentMessagesCachePort:
+    return RedisRecentMessagesCache(redis=redis)
+
+
 def get_notification_sender(
     connection_port: ConnectionPort = Depends(get_connection),
 ) -> NotificationSenderPort:
@@ -131,6 +172,12 @@ def get_room_membership_repo(
     return MongoRoomMembershipRepository(db=db)
 
 
+def get_room_reclaim_repo(
+    db: AsyncDatabase[Any] = Depends(get_mongo_db),
+) -> RoomReclaimRepository:
+    return MongoRoomReclaimRepository(db=db)
+
+
 def get_user_repo(db: AsyncDatabase[Any] = Depends(get_mongo_db)) -> UserRepository:
     return MongoUserRepository(db=db)
 
@@ -148,17 +195,25 @@ def get_websocket_session_repo(
 def get_message_service(
     message_repo: MessageRepository = Depends(get_message_repo),
     user_repo: UserRepository = Depends(get_user_repo),
+    room_repo: RoomRepository = Depends(get_room_repo),
     membership_repo: RoomMembershipRepository = Depends(get_room_membership_repo),
     outbox_repo: OutboxRepository = Depends(get_outbox_repo),
     connection_port: ConnectionPort = Depends(get_connection),
+    recent_messages_cache: RecentMessagesCachePort = Depends(get_recent_messages_cache),
+    username_cache: UsernameCachePort = Depends(get_username_cache),
+    room_retention_cache: RoomRetentionCachePort = Depends(get_room_retention_cache),
     transaction_manager: TransactionManager = Depends(get_transaction_manager),
 ) -> MessageService:
     return MessageService(
         message_repo=message_repo,
         user_repo=user_repo,
+        room_repo=room_repo,
         membership_repo=membership_repo,
         outbox_repo=outbox_repo,
         connection_port=connection_port,
+        recent_messages_cache=recent_messages_cache,
+        username_cache=username_cache,
+        room_retention_cache=room_retention_cache,
         transaction_manager=transaction_manager,
     )
 
@@ -166,11 +221,15 @@ def get_message_service(
 def get_notification_service(
     notification_repo: NotificationRepository = Depends(get_notification_repo),
     outbox_repo: OutboxRepository = Depends(get_outbox_repo),
+    user_repo: UserRepository = Depends(get_user_repo),
+    username_cache: UsernameCachePort = Depends(get_username_cache),
     transaction_manager: TransactionManager = Depends(get_transaction_manager),
 ) -> NotificationService:
     return NotificationService(
         notification_repo=notification_repo,
         outbox_repo=outbox_repo,
+        user_repo=user_repo,
+        username_cache=username_cache,
         transaction_manager=transaction_manager,
     )
 
@@ -182,6 +241,8 @@ def get_room_service(
     room_membership_repo: RoomMembershipRepository = Depends(get_room_membership_repo),
     outbox_repo: OutboxRepository = Depends(get_outbox_repo),
     connection_port: ConnectionPort = Depends(get_connection),
+    username_cache: UsernameCachePort = Depends(get_username_cache),
+    room_reclaim_repo: RoomReclaimRepository = Depends(get_room_reclaim_repo),
     transaction_manager: TransactionManager = Depends(get_transaction_manager),
 ) -> RoomService:
     return RoomService(
@@ -191,6 +252,8 @@ def get_room_service(
         room_membership_repo=room_membership_repo,
         outbox_repo=outbox_repo,
         connection_port=connection_port,
+        username_cache=username_cache,
+        room_reclaim_repo=room_reclaim_repo,
         transaction_manager=transaction_manager,
     )
 
@@ -260,5 +323,8 @@ def get_websocket_service_from_websocket(
 
 def get_analytics_service(
     analytics_port: AnalyticsPort = Depends(get_analytics),
+    realtime_metrics: RealtimeMetricsPort = Depends(get_realtime_metrics),
 ) -> AnalyticsService:
-    return AnalyticsService(analytics_port=analytics_port)
+    return AnalyticsService(
+        analytics_port=analytics_port, realtime_metrics=realtime_metrics
+    )
@@ -2,13 +2,19 @@ from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from starlette import status
 
-from app.domain.exceptions.analytics import RoomStatsNotFound, UserActivityNotFound
+from app.domain.exceptions.analytics import (
+    InvalidTimeRange,
+    RoomStatsNotFound,
+    UnsupportedAccuracy,
+    UserActivityNotFound,
+)
 from app.domain.exceptions.join_request import (
     JoinRequestAlreadyExists,
     JoinRequestAlreadyHandled,
     JoinRequestNotFound,
 )
 from app.domain.exceptions.message import (
+    InvalidCursor,
     MessageNotFound,
     MessagePermissionError,
 )
@@ -22,6 +28,7 @@ from app.domain.exceptions.room import (
     RoomNotFound,
     RoomPermissionError,
 )
+from app.domain.exceptions.storage import StorageOverloaded
 from app.domain.exceptions.user import (
     UserAlreadyExists,
     UserInvalidCredentials,
@@ -57,8 +64,12 @@ EXCEPTION_STATUS_MAP: dict[type[Exception], int] = {
     NotificationPermissionError: status.HTTP_403_FORBIDDEN,
     MessageNotFound: status.HTTP_404_NOT_FOUND,
     MessagePermissionError: status.HTTP_403_FORBIDDEN,
+    InvalidCursor: status.HTTP_400_BAD_REQUEST,
     RoomStatsNotFound: status.HTTP_404_NOT_FOUND,
     UserActivityNotFound: status.HTTP_404_NOT_FOUND,
+    InvalidTimeRange: status.HTTP_400_BAD_REQUEST,
+    UnsupportedAccuracy: status.HTTP_400_BAD_REQUEST,
+    StorageOverloaded: status.HTTP_503_SERVICE_UNAVAILABLE,
 }
 
 
@@ -1,11 +1,15 @@
+from datetime import date, datetime
 from typing import Any
 from uuid import UUID
 
 import structlog
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Response
 
 from app.api.dependencies import get_current_user_id
 from app.api.di import get_analytics_service
+from app.core.constants import Accuracy, AnalyticsEventType, TimeBucket
+from app.domain.entities.retention import RetentionMatrix
+from app.domain.entities.room_activity import RoomActivitySeries
 from app.domain.entities.room_stats import RoomStats
 from app.domain.services.analytics import AnalyticsService
 
@@ -16,26 +20,50 @@ router = APIRouter(
 )
 
 
+def report_accuracy(
+    response: Response, analytics_service: AnalyticsService, accuracy: Accuracy
+) -> None:
+    bounds = analytics_service.accuracy_bounds(accuracy)
+    response.headers["X-Analytics-Accuracy"] = bounds.accuracy.value
+    response.headers["X-Analytics-Sample-Rate"] = str(bounds.sample_rate)
+    if bounds.relative_error is not None:
+        response.headers["X-Analytics-Relative-Error"] = str(bounds.relative_error)
+
+
 @router.get("/get-room-stats")
 async def room_stats(
-    room_id: UUID, analytics_service: AnalyticsService = Depends(get_analytics_service)
+    room_id: UUID,
+    response: Response,
+    accuracy: Accuracy = Query(Accuracy.EXACT),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
 ) -> RoomStats:
-    return await analytics_service.room_stats(room_id=room_id)
+    stats = await analytics_service.room_stats(room_id=room_id, accuracy=accuracy)
+    report_accuracy(response, analytics_service, accuracy)
+    return stats
 
 
 @router.get("/get-user-activity")
 async def user_activity(
-    user_id: UUID, analytics_service: AnalyticsService = Depends(get_analytics_service)
+    user_id: UUID,
+    response: Response,
+    accuracy: Accuracy = Query(Accuracy.EXACT),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
 ) -> dict[str, int]:
-    return await analytics_service.user_activity(user_id=user_id)
+    activity = await analytics_service.user_activity(user_id=user_id, accuracy=accuracy)
+    report_accuracy(response, analytics_service, accuracy)
+    return activity
 
 
 @router.get("/get-top-active-rooms")
 async def top_active_rooms(
+    response: Response,
     limit: int = Query(default=50, ge=1, le=200),
+    accuracy: Accuracy = Query(Accuracy.EXACT),
     analytics_service: AnalyticsService = Depends(get_analytics_service),
 ) -> list[RoomStats]:
-    return await analytics_service.top_active_rooms(limit=limit)
+    rooms = await analytics_service.top_active_rooms(limit=limit, accuracy=accuracy)
+    report_accuracy(response, analytics_service, accuracy)
+    return rooms
 
 
 @router.get("/get-message-per-minutes")
@@ -49,12 +77,67 @@ async def messages_per_minute(
     )
 
 
+@router.get("/get-room-activity")
+async def room_activity(
+    room_id: UUID,
+    start: datetime,
+    end: datetime | None = Query(None),
+    bucket: TimeBucket = Query(TimeBucket.MINUTE),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
+) -> RoomActivitySeries:
+    return await analytics_service.room_activity(
+        room_id=room_id, start=start, end=end, bucket=bucket
+    )
+
+
+@router.get("/realtime/active-users")
+async def realtime_active_users(
+    minutes: int = Query(default=60, ge=1),
+    room_id: UUID | None = Query(None),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
+) -> int:
+    return await analytics_service.realtime_active_users(
+        minutes=minutes, room_id=room_id
+    )
+
+
+@router.get("/realtime/event-counts")
+async def realtime_event_counts(
+    event_type: AnalyticsEventType = Query(AnalyticsEventType.MESSAGE_SENT),
+    minutes: int = Query(default=5, ge=1),
+    room_id: UUID | None = Query(None),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
+) -> list[int]:
+    return await analytics_service.realtime_event_counts(
+        event_type=event_type, minutes=minutes, room_id=room_id
+    )
+
+
 @router.get("/get-user-retention")
 async def user_retention(
     days: int,
+    response: Response,
+    accuracy: Accuracy = Query(Accuracy.EXACT),
     analytics_service: AnalyticsService = Depends(get_analytics_service),
 ) -> float:
-    return await analytics_service.user_retention(days=days)
+    retention = await analytics_service.user_retention(days=days, accuracy=accuracy)
+    report_accuracy(response, analytics_service, accuracy)
+    return retention
+
+
+@router.get("/get-retention-cohorts")
+async def retention_cohorts(
+    start: date,
+    response: Response,
+    end: date | None = Query(None),
+    accuracy: Accuracy = Query(Accuracy.EXACT),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
+) -> RetentionMatrix:
+    matrix = await analytics_service.retention_cohorts(
+        start=start, end=end, accuracy=accuracy
+    )
+    report_accuracy(response, analytics_service, accuracy)
+    return matrix
 
 
 @router.get("/get-message-edit-delete-ratio")
@@ -67,6 +150,10 @@ async def message_edit_delete_ratio(
 @router.get("/get-top-social-users")
 async def top_social_users(
     limit: int,
+    response: Response,
+    accuracy: Accuracy = Query(Accuracy.EXACT),
     analytics_service: AnalyticsService = Depends(get_analytics_service),
 ) -> list[dict[str, Any]]:
-    return await analytics_service.top_social_users(limit=limit)
+    users = await analytics_service.top_social_users(limit=limit, accuracy=accuracy)
+    report_accuracy(response, analytics_service, accuracy)
+    return users
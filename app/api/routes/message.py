@@ -1,17 +1,25 @@
+import zlib
+from collections.abc import AsyncIterator
 from dataclasses import asdict
 from datetime import datetime
 from uuid import UUID
 
+import orjson
 import structlog
 from fastapi import APIRouter, Depends, Query, Response, status
+from fastapi.responses import StreamingResponse
 
 from app.api.dependencies import get_current_user_id
 from app.api.di import get_message_service
 from app.api.schemas.message import (
     EditMessageRequest,
+    MessagePage,
     MessagePublic,
+    MessagePurgeResult,
     SendMessageRequest,
+    UserMessagePage,
 )
+from app.domain.dtos.message import MessagePublicDTO
 from app.domain.services.message import MessageService
 
 logger = structlog.get_logger(__name__)
@@ -87,3 +95,103 @@ async def get_recent_messages(
         "Fetched recent messages"
     )
     return [MessagePublic.model_validate(asdict(message)) for message in messages]
+
+
+@router.get("/get-messages-page/{room_id}")
+async def get_messages_page(
+    room_id: UUID,
+    cursor: str | None = Query(None),
+    limit: int = Query(default=50, ge=1, le=200),
+    current_user_id: UUID = Depends(get_current_user_id),
+    message_service: MessageService = Depends(get_message_service),
+) -> MessagePage:
+    logger.bind(room_id=room_id, limit=limit, user_id=current_user_id).debug(
+        "Fetching messages page..."
+    )
+    page = await message_service.get_messages_page(
+        room_id=room_id, user_id=current_user_id, limit=limit, cursor=cursor
+    )
+    logger.bind(room_id=room_id, count=len(page.items), user_id=current_user_id).debug(
+        "Fetched messages page"
+    )
+    return MessagePage.model_validate(asdict(page))
+
+
+@router.get("/get-user-messages/{user_id}")
+async def get_user_messages(
+    user_id: UUID,
+    cursor: str | None = Query(None),
+    limit: int = Query(default=50, ge=1, le=200),
+    current_user_id: UUID = Depends(get_current_user_id),
+    message_service: MessageService = Depends(get_message_service),
+) -> UserMessagePage:
+    logger.bind(user_id=user_id, limit=limit, requested_by=current_user_id).debug(
+        "Fetching user messages..."
+    )
+    page = await message_service.get_user_messages(
+        user_id=user_id, requested_by=current_user_id, limit=limit, cursor=cursor
+    )
+    logger.bind(user_id=user_id, count=len(page.items)).debug("Fetched user messages")
+    return UserMessagePage.model_validate(asdict(page))
+
+
+@router.delete("/purge-user-messages/{user_id}")
+async def purge_user_messages(
+    user_id: UUID,
+    current_user_id: UUID = Depends(get_current_user_id),
+    message_service: MessageService = Depends(get_message_service),
+) -> MessagePurgeResult:
+    logger.bind(user_id=user_id, requested_by=current_user_id).debug(
+        "Purging user messages..."
+    )
+    result = await message_service.purge_user_messages(
+        user_id=user_id, requested_by=current_user_id
+    )
+    logger.bind(user_id=user_id, deleted=result.deleted_count).debug(
+        "User messages purged"
+    )
+    return MessagePurgeResult.model_validate(asdict(result))
+
+
+async def _encode_ndjson(
+    pages: AsyncIterator[list[MessagePublicDTO]], compress: bool
+) -> AsyncIterator[bytes]:
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    async for messages in pages:
+        chunk = b"".join(
+            orjson.dumps(
+                message, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NAIVE_UTC
+            )
+            for message in messages
+        )
+        if compressor:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+    if compressor:
+        yield compressor.flush()
+
+
+@router.get("/export-messages/{room_id}")
+async def export_messages(
+    room_id: UUID,
+    compress: bool = Query(default=False),
+    current_user_id: UUID = Depends(get_current_user_id),
+    message_service: MessageService = Depends(get_message_service),
+) -> StreamingResponse:
+    logger.bind(room_id=room_id, compress=compress, user_id=current_user_id).debug(
+        "Exporting messages..."
+    )
+    pages = await message_service.export_room_messages(
+        room_id=room_id, user_id=current_user_id
+    )
+    headers = {"Content-Disposition": f'attachment; filename="room-{room_id}.ndjson"'}
+    if compress:
+        # GZipMiddleware leaves responses that already carry an encoding untouched
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        _encode_ndjson(pages=pages, compress=compress),
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Response, status
+import hmac
+from typing import Any
+
+from fastapi import APIRouter, Header, Response, status
 from fastapi.openapi.docs import get_swagger_ui_html
 from starlette.responses import HTMLResponse
 
 from app.core.constants import Environment
+from app.core.metrics import get_metrics
 from app.core.settings import get_settings
 
 router = APIRouter(tags=["status"])
@@ -25,3 +29,17 @@ if not is_production:
 @router.get("/health")
 async def health_check() -> Response:
     return Response(status_code=status.HTTP_200_OK)
+
+
+# The snapshot only covers the worker process serving the request, scrape every
+# worker (or sum per-worker scrapes) to get totals.
+@router.get("/internal/metrics", include_in_schema=False, response_model=None)
+async def metrics(
+    authorization: str = Header(default=""),
+) -> dict[str, Any] | Response:
+    token = get_settings().metrics_token
+    if not token or not hmac.compare_digest(
+        authorization.encode("utf-8"), f"Bearer {token}".encode()
+    ):
+        return Response(status_code=status.HTTP_404_NOT_FOUND)
+    return get_metrics().snapshot()
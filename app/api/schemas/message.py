@@ -14,6 +14,32 @@ class MessagePublic(BaseModel):
     created_at: datetime
 
 
+class MessagePage(BaseModel):
+    items: list[MessagePublic]
+    next_cursor: str | None
+
+
+class UserMessagePublic(BaseModel):
+    room_id: UUID
+    room_name: str | None
+    user_id: UUID
+    username: str
+    content: str
+    edited: bool
+    id: UUID
+    created_at: datetime
+
+
+class UserMessagePage(BaseModel):
+    items: list[UserMessagePublic]
+    next_cursor: str | None
+
+
+class MessagePurgeResult(BaseModel):
+    deleted_count: int
+    room_count: int
+
+
 class SendMessageRequest(BaseModel):
     content: str = Field(max_length=256)
 
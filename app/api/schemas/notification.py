@@ -8,6 +8,7 @@ class NotificationPublic(BaseModel):
     payload: dict[str, str]
     read: bool
     source_id: UUID | None
+    source_username: str | None = None
     id: UUID
 
 
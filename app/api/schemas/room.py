@@ -11,6 +11,7 @@ class RoomCreate(BaseModel):
     name: str = Field(max_length=32)
     description: str | None = None
     is_public: bool = True
+    retention_days: int | None = Field(default=None, ge=1, le=3650)
 
     def to_dto(self, created_by: UUID) -> RoomCreateDTO:
         return RoomCreateDTO(
@@ -18,18 +19,22 @@ class RoomCreate(BaseModel):
             description=self.description,
             is_public=self.is_public,
             created_by=created_by,
+            retention_days=self.retention_days,
         )
 
 
 class RoomUpdate(BaseModel):
     description: str | None = None
     is_public: bool | None = None
+    # 0 switches retention off and keeps messages forever
+    retention_days: int | None = Field(default=None, ge=0, le=3650)
 
     def to_dto(self, created_by: UUID) -> RoomUpdateDTO:
         return RoomUpdateDTO(
             description=self.description,
             is_public=self.is_public,
             created_by=created_by,
+            retention_days=self.retention_days,
         )
 
 
@@ -40,6 +45,7 @@ class RoomPublic(BaseModel):
     is_public: bool
     created_by: UUID
     participants_count: int
+    retention_days: int | None
     created_at: datetime
     updated_at: datetime
 
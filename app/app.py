@@ -7,10 +7,14 @@ from fastapi import FastAPI
 from redis.asyncio import Redis
 from starlette.staticfiles import StaticFiles
 
+from app.adapters.analytics.cache import AnalyticsResultCache
 from app.adapters.analytics.clickhouse_client import create_clickhouse_client
 from app.adapters.cache.memcache import MemcachedCache
+from app.adapters.cache.room_retention import InMemoryRoomRetentionCache
+from app.adapters.cache.username_cache import InMemoryUsernameCache
 from app.adapters.db.cassandra_engine import CassandraEngine
 from app.adapters.db.mongo_client import create_mongo_client
+from app.adapters.executor import shutdown_executors
 from app.adapters.security.password_hasher import BcryptPasswordHasher
 from app.api.exception_handler import register_exception_handlers
 from app.api.main_router import get_main_router
@@ -39,6 +43,10 @@ def get_app_config(settings: Settings) -> dict[Any, Any]:
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, Any]:
+    if not get_settings().cursor_secret_key:
+        # an empty key makes pagination cursors forgeable
+        raise RuntimeError("CURSOR_SECRET_KEY must be set")
+
     app.state.bcrypt_password_hasher = BcryptPasswordHasher()
     app.state.mongo_client = await create_mongo_client()
     app.state.mongo_db = app.state.mongo_client[get_settings().mongo_dbname]
@@ -48,8 +56,21 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, Any]:
     app.state.memcache = MemcachedCache(
         host=get_settings().memcached_host, port=get_settings().memcached_port
     )
+    app.state.username_cache = InMemoryUsernameCache(
+        max_size=get_settings().username_cache_max_size,
+        ttl=get_settings().username_cache_ttl_seconds,
+    )
+    app.state.room_retention_cache = InMemoryRoomRetentionCache(
+        max_size=get_settings().room_retention_cache_max_size,
+        ttl=get_settings().room_retention_cache_ttl_seconds,
+    )
     app.state.cassandra_engine = CassandraEngine()
     app.state.clickhouse = await create_clickhouse_client()
+    app.state.analytics_cache = AnalyticsResultCache(
+        max_size=get_settings().analytics_cache_max_size,
+        stale_seconds=get_settings().analytics_cache_stale_seconds,
+        max_concurrency=get_settings().analytics_cache_max_concurrency,
+    )
 
     logger.info("Startup completed")
     yield
@@ -57,6 +78,7 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, Any]:
     await app.state.redis.aclose()
     app.state.cassandra_engine.shutdown()
     await app.state.clickhouse.close()
+    shutdown_executors()
 
     logger.debug("Server stopped")
 
@@ -36,6 +36,18 @@ class AnalyticsEventType(Enum):
     NOTIFICATIONS_ALL_READ = "NOTIFICATIONS_ALL_READ"
 
 
+class TimeBucket(Enum):
+    MINUTE = "minute"
+    HOUR = "hour"
+    DAY = "day"
+
+
+class Accuracy(Enum):
+    EXACT = "exact"
+    APPROXIMATE = "approximate"
+    SAMPLED = "sampled"
+
+
 class NotificationType(Enum):
     JOIN_REQUEST_CREATED = "JOIN_REQUEST_CREATED"
     JOIN_REQUEST_ACCEPTED = "JOIN_REQUEST_ACCEPTED"
@@ -63,6 +75,7 @@ class BroadcastEventType(Enum):
     MESSAGE_CREATED = "MESSAGE_CREATED"
     MESSAGE_EDITED = "MESSAGE_EDITED"
     MESSAGE_DELETED = "MESSAGE_DELETED"
+    MESSAGES_PURGED = "MESSAGES_PURGED"
 
     USER_TYPING = "USER_TYPING"
     NOTIFICATION = "NOTIFICATION"
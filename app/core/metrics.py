@@ -0,0 +1,119 @@
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Any, TypeVar
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+def _label_key(labels: dict[str, str]) -> LabelKey:
+    return tuple(sorted(labels.items()))
+
+
+class Counter:
+    def __init__(self, name: str, description: str) -> None:
+        self.name = name
+        self.description = description
+        self._values: dict[LabelKey, float] = defaultdict(float)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        self._values[_label_key(labels)] += amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        return [
+            {"labels": dict(key), "value": value} for key, value in self._values.items()
+        ]
+
+
+class Gauge(Counter):
+    def set(self, value: float, **labels: str) -> None:
+        self._values[_label_key(labels)] = value
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self._values[_label_key(labels)] -= amount
+
+
+class Histogram:
+    default_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(
+        self, name: str, description: str, buckets: tuple[float, ...] | None = None
+    ) -> None:
+        self.name = name
+        self.description = description
+        self._buckets = buckets or self.default_buckets
+        self._counts: dict[LabelKey, list[int]] = {}
+        self._sums: dict[LabelKey, float] = defaultdict(float)
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _label_key(labels)
+        counts = self._counts.setdefault(key, [0] * (len(self._buckets) + 1))
+        counts[bisect_left(self._buckets, value)] += 1
+        self._sums[key] += value
+
+    def count(self, **labels: str) -> int:
+        return sum(self._counts.get(_label_key(labels), []))
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        result = []
+        for key, counts in self._counts.items():
+            bounds = [*map(str, self._buckets), "+Inf"]
+            result.append(
+                {
+                    "labels": dict(key),
+                    "buckets": dict(zip(bounds, counts, strict=True)),
+                    "count": sum(counts),
+                    "sum": self._sums[key],
+                }
+            )
+        return result
+
+
+MetricT = TypeVar("MetricT", bound="Counter | Histogram")
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Counter | Histogram] = {}
+
+    def _get_or_create(
+        self, name: str, kind: type[MetricT], factory: Callable[[], MetricT]
+    ) -> MetricT:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = factory()
+        if not isinstance(metric, kind):
+            raise TypeError(f"Metric {name} is registered as {type(metric).__name__}")
+        return metric
+
+    def counter(self, name: str, description: str) -> Counter:
+        return self._get_or_create(name, Counter, lambda: Counter(name, description))
+
+    def gauge(self, name: str, description: str) -> Gauge:
+        return self._get_or_create(name, Gauge, lambda: Gauge(name, description))
+
+    def histogram(
+        self, name: str, description: str, buckets: tuple[float, ...] | None = None
+    ) -> Histogram:
+        return self._get_or_create(
+            name, Histogram, lambda: Histogram(name, description, buckets)
+        )
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            name: {
+                "type": type(metric).__name__.lower(),
+                "description": metric.description,
+                "values": metric.snapshot(),
+            }
+            for name, metric in self._metrics.items()
+        }
+
+
+@lru_cache(maxsize=1)
+def get_metrics() -> MetricsRegistry:
+    return MetricsRegistry()
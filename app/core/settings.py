@@ -1,5 +1,6 @@
 from functools import lru_cache
 from pathlib import Path
+from uuid import UUID
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -30,6 +31,9 @@ class Settings(BaseSettings):
     domain: str = "localhost"  # "living-chat.online"
     domain_https: str = f"https://{domain}"
     domain_wss: str = f"wss://{domain}"
+    cursor_secret_key: str = ""
+    admin_user_ids: list[UUID] = []
+    metrics_token: str = ""
 
     @property
     def allowed_origins(self) -> list[str]:
@@ -66,40 +70,90 @@ class Settings(BaseSettings):
     redis_host: str = "localhost"
     redis_port: int = 6379
     redis_db_app: int = 0
-    redis_db_celery_broker: int = 1
-    redis_db_celery_backend: int = 2
+    # job locks, kept apart from the data the api reads
+    redis_db_jobs: int = 2
     user_session_ttl_seconds: int = 60 * 60
     web_socket_session_ttl_seconds: int = 1800
+    recent_messages_buffer_size: int = 200
+    recent_messages_buffer_ttl_seconds: int = 60 * 60
 
     @property
     def redis_app_dsn(self) -> str:
         return f"redis://{self.redis_host}:{self.redis_port}/{self.redis_db_app}"
 
-    celery_redis_repair_lock_key: str = "outbox_repair_lock"
-    celery_redis_repair_lock_key_timeout: int = 60 * 5
-    celery_redis_worker_lock_key: str = "outbox_worker_lock"
-    celery_redis_worker_lock_key_timeout: int = 60 * 5
-    celery_schedule: float = 60.0
+    job_outbox_repair_lock_key: str = "outbox_repair_lock"
+    job_outbox_repair_lock_timeout: int = 60 * 5
+    job_room_reclaim_lock_key: str = "room_reclaim_lock"
+    job_room_reclaim_lock_timeout: int = 60 * 5
+    job_message_archive_lock_key: str = "message_archive_lock"
+    job_message_archive_lock_timeout: int = 60 * 5
+    job_runner_shutdown_grace_seconds: float = 30.0
+    job_runner_restart_delay_seconds: float = 5.0
+    job_outbox_repair_interval_seconds: float = 60.0
+    outbox_repair_initial_window_minutes: int = 3
+    # rescanned behind the watermark for messages written after their created_at
+    outbox_repair_overlap_seconds: float = 120.0
+    outbox_repair_max_scan_minutes: int = 60
+    outbox_repair_batch_size: int = 200
+    outbox_repair_max_run_seconds: float = 60 * 4
+    job_room_reclaim_cron: str = "* * * * *"
+    job_message_archive_cron: str = "* * * * *"
+    # one dispatcher lane per outbox message type: weight is the share of the
+    # in-flight capacity it keeps while backlogged, concurrency caps its sends
+    outbox_lane_weights: dict[str, int] = {"NOTIFICATION": 3, "ANALYTICS": 1}
+    outbox_lane_concurrency: dict[str, int] = {"NOTIFICATION": 8, "ANALYTICS": 8}
+    outbox_lane_poll_interval_seconds: dict[str, float] = {
+        "NOTIFICATION": 0.5,
+        "ANALYTICS": 5.0,
+    }
+    outbox_dispatcher_poll_interval_seconds: float = 5.0
+    outbox_dispatcher_batch_size: int = 100
+    outbox_lease_seconds: float = 30.0
+    outbox_retry_backoff_seconds: float = 2.0
+    outbox_retry_backoff_max_seconds: float = 300.0
+    outbox_dispatcher_flush_interval_seconds: float = 0.5
+    outbox_dispatcher_max_in_flight: int = 1000
 
     @property
-    def redis_celery_broker_dsn(self) -> str:
-        return (
-            f"redis://{self.redis_host}:{self.redis_port}/{self.redis_db_celery_broker}"
-        )
-
-    @property
-    def redis_celery_backend_dsn(self) -> str:
-        return f"redis://{self.redis_host}:{self.redis_port}/{self.redis_db_celery_backend}"
+    def redis_jobs_dsn(self) -> str:
+        return f"redis://{self.redis_host}:{self.redis_port}/{self.redis_db_jobs}"
 
     memcached_host: str = "localhost"
     memcached_port: int = 11211
     user_cache_key_ttl: int = 60 * 60
+    username_cache_max_size: int = 10_000
+    username_cache_ttl_seconds: int = 60 * 10
+    # a retention change reaches other processes once their entry expires
+    room_retention_cache_max_size: int = 10_000
+    room_retention_cache_ttl_seconds: int = 30
+    memcached_executor_workers: int = 4
+    memcached_executor_queue_size: int = 64
+    memcached_executor_queue_timeout_seconds: float = 0.5
 
     cassandra_contact_point: str = "localhost"
     cassandra_port: int = 9042
     cassandra_keyspace: str = "livechat"
     cassandra_user: str | None = None
     cassandra_password: str | None = None
+    cassandra_executor_workers: int = 16
+    cassandra_executor_queue_size: int = 256
+    cassandra_executor_queue_timeout_seconds: float = 2.0
+    message_export_page_size: int = 500
+    message_purge_page_size: int = 500
+    message_purge_batch_size: int = 20
+    message_purge_concurrency: int = 4
+    room_reclaim_rooms_per_run: int = 20
+    room_reclaim_page_size: int = 500
+    room_reclaim_rows_per_second: float = 2000.0
+    room_reclaim_max_run_seconds: float = 60 * 4
+    message_archive_path: Path | None = None
+    message_archive_after_days: int = 180
+    message_archive_page_size: int = 1000
+    message_archive_flush_rows: int = 20_000
+    message_archive_max_run_seconds: float = 60 * 4
+    message_archive_executor_workers: int = 4
+    message_archive_executor_queue_size: int = 64
+    message_archive_executor_queue_timeout_seconds: float = 2.0
 
     clickhouse_host: str = "localhost"
     clickhouse_tcp_port: int = 8123
@@ -107,6 +161,29 @@ class Settings(BaseSettings):
     clickhouse_user: str = "clickhouse"
     clickhouse_password: str = ""
     clickhouse_db: str = "analytics"
+    clickhouse_rollup_claim_timeout_seconds: int = 3600
+    analytics_sink_batch_size: int = 1000
+    analytics_sink_buffer_size: int = 10_000
+    analytics_sink_max_age_seconds: float = 1.0
+    analytics_series_max_points: int = 1500
+    analytics_cohort_max_days: int = 366
+    analytics_sample_rate: float = 0.1
+    realtime_metrics_window_minutes: int = 60
+    analytics_cache_ttl_seconds: dict[str, float] = {
+        "get_room_stats": 30,
+        "get_user_activity": 30,
+        "top_active_rooms": 60,
+        "messages_per_minute": 5,
+        "get_room_activity": 10,
+        "get_user_retention": 300,
+        "get_cohort_sizes": 300,
+        "get_cohort_activity": 300,
+        "message_edit_delete_ratio": 60,
+        "top_social_users": 60,
+    }
+    analytics_cache_stale_seconds: float = 120
+    analytics_cache_max_size: int = 2000
+    analytics_cache_max_concurrency: int = 4
 
 
 @lru_cache
@@ -26,3 +26,48 @@ def message_to_dto(message: Message, username: str) -> MessagePublicDTO:
         id=message.id,
         created_at=message.created_at,
     )
+
+
+@dataclass
+class MessagePageDTO:
+    items: list[MessagePublicDTO]
+    next_cursor: str | None
+
+
+@dataclass
+class UserMessagePublicDTO:
+    room_id: UUID
+    room_name: str | None
+    user_id: UUID
+    username: str
+    content: str
+    edited: bool
+    id: UUID
+    created_at: datetime
+
+
+def user_message_to_dto(
+    message: Message, username: str, room_name: str | None
+) -> UserMessagePublicDTO:
+    return UserMessagePublicDTO(
+        room_id=message.room_id,
+        room_name=room_name,
+        user_id=message.user_id,
+        username=username,
+        content=message.content,
+        edited=message.edited,
+        id=message.id,
+        created_at=message.created_at,
+    )
+
+
+@dataclass
+class UserMessagePageDTO:
+    items: list[UserMessagePublicDTO]
+    next_cursor: str | None
+
+
+@dataclass
+class MessagePurgeResultDTO:
+    deleted_count: int
+    room_count: int
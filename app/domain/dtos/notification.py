@@ -11,14 +11,18 @@ class NotificationPublicDTO:
     payload: dict[str, str]
     read: bool
     source_id: UUID | None
+    source_username: str | None
     id: UUID
 
 
-def notification_to_dto(notification: Notification) -> NotificationPublicDTO:
+def notification_to_dto(
+    notification: Notification, source_username: str | None = None
+) -> NotificationPublicDTO:
     return NotificationPublicDTO(
         type=notification.type,
         payload=notification.payload,
         read=notification.read,
         source_id=notification.source_id,
+        source_username=source_username,
         id=notification.id,
     )
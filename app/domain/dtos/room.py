@@ -11,6 +11,7 @@ class RoomCreateDTO:
     description: str | None
     is_public: bool
     created_by: UUID
+    retention_days: int | None = None
 
 
 @dataclass
@@ -18,6 +19,7 @@ class RoomUpdateDTO:
     created_by: UUID
     description: str | None = None
     is_public: bool | None = None
+    retention_days: int | None = None
 
 
 @dataclass
@@ -27,6 +29,7 @@ class RoomPublicDTO:
     is_public: bool
     created_by: UUID
     participants_count: int
+    retention_days: int | None
     created_at: datetime
     updated_at: datetime
     id: UUID
@@ -39,6 +42,7 @@ def room_to_dto(room: Room) -> RoomPublicDTO:
         is_public=room.is_public,
         created_by=room.created_by,
         participants_count=room.participants_count,
+        retention_days=room.retention_days,
         created_at=room.created_at,
         updated_at=room.updated_at,
         id=room.id,
@@ -0,0 +1,10 @@
+from dataclasses import dataclass
+
+from app.core.constants import Accuracy
+
+
+@dataclass
+class AccuracyBounds:
+    accuracy: Accuracy
+    sample_rate: float
+    relative_error: float | None
@@ -4,4 +4,4 @@ from dataclasses import dataclass
 @dataclass
 class EventPayload:
     timestamp: str
-    payload: dict[str, str]
+    payload: dict[str, str | list[str]]
@@ -0,0 +1,11 @@
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from functools import partial
+
+
+@dataclass
+class JobCheckpoint:
+    name: str
+    watermark: datetime
+    scanned_rows: int = 0
+    updated_at: datetime = field(default_factory=partial(datetime.now, UTC))
@@ -17,5 +17,17 @@ class Outbox:
     max_retries: int = 5
     sent_at: datetime | None = None
     last_error: str | None = None
+    lease_owner: str | None = None
+    lease_expires_at: datetime | None = None
+    next_attempt_at: datetime | None = None
     created_at: datetime = field(default_factory=partial(datetime.now, UTC))
     id: UUID = field(default_factory=uuid4)
+
+
+@dataclass
+class OutboxOutcome:
+    outbox_id: UUID
+    status: OutboxStatus
+    sent_at: datetime | None = None
+    last_error: str | None = None
+    next_attempt_at: datetime | None = None
@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+from datetime import date
+
+
+@dataclass
+class RetentionCohort:
+    cohort_day: date
+    users: int
+    retained: list[int]
+
+
+@dataclass
+class RetentionMatrix:
+    start: date
+    end: date
+    cohorts: list[RetentionCohort]
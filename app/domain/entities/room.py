@@ -11,6 +11,7 @@ class Room:
     created_by: UUID
     participants_count: int = 0
     description: str | None = None
+    retention_days: int | None = None
     created_at: datetime = field(default_factory=partial(datetime.now, UTC))
     updated_at: datetime = field(default_factory=partial(datetime.now, UTC))
     id: UUID = field(default_factory=uuid4)
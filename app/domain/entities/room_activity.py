@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+from datetime import datetime
+from uuid import UUID
+
+from app.core.constants import TimeBucket
+
+
+@dataclass
+class RoomActivitySeries:
+    room_id: UUID
+    bucket: TimeBucket
+    start: datetime
+    counts: list[int]
@@ -0,0 +1,13 @@
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from functools import partial
+from uuid import UUID
+
+
+@dataclass
+class RoomReclaim:
+    room_id: UUID
+    checkpoint: datetime | None = None
+    reclaimed_rows: int = 0
+    created_at: datetime = field(default_factory=partial(datetime.now, UTC))
+    updated_at: datetime = field(default_factory=partial(datetime.now, UTC))
@@ -9,3 +9,13 @@ class RoomStatsNotFound(DomainException):
 class UserActivityNotFound(DomainException):
     def __init__(self, message: str = "User activity not found") -> None:
         super().__init__(message)
+
+
+class InvalidTimeRange(DomainException):
+    def __init__(self, message: str = "Invalid time range") -> None:
+        super().__init__(message)
+
+
+class UnsupportedAccuracy(DomainException):
+    def __init__(self, message: str = "Accuracy not supported here") -> None:
+        super().__init__(message)
@@ -9,3 +9,8 @@ class MessageNotFound(DomainException):
 class MessagePermissionError(DomainException):
     def __init__(self, message: str = "Cannot access user's message") -> None:
         super().__init__(message)
+
+
+class InvalidCursor(DomainException):
+    def __init__(self, message: str = "Invalid pagination cursor") -> None:
+        super().__init__(message)
@@ -0,0 +1,6 @@
+from app.domain.exceptions.base import DomainException
+
+
+class StorageOverloaded(DomainException):
+    def __init__(self, message: str = "Storage is overloaded, try again later") -> None:
+        super().__init__(message)
@@ -1,6 +1,9 @@
+from collections.abc import Awaitable
+from datetime import date, datetime
 from typing import Any, Protocol
 from uuid import UUID
 
+from app.core.constants import Accuracy, AnalyticsEventType, TimeBucket
 from app.domain.entities.analytics_event import AnalyticsEvent
 from app.domain.entities.room_stats import RoomStats
 
@@ -8,16 +11,57 @@ from app.domain.entities.room_stats import RoomStats
 class AnalyticsPort(Protocol):
     async def publish_event(self, event: AnalyticsEvent) -> None: ...
 
-    async def get_room_stats(self, room_id: UUID) -> RoomStats | None: ...
+    async def get_room_stats(
+        self, room_id: UUID, accuracy: Accuracy = Accuracy.EXACT
+    ) -> RoomStats | None: ...
 
-    async def get_user_activity(self, user_id: UUID) -> dict[str, int] | None: ...
+    async def get_user_activity(
+        self, user_id: UUID, accuracy: Accuracy = Accuracy.EXACT
+    ) -> dict[str, int] | None: ...
 
-    async def top_active_rooms(self, limit: int) -> list[RoomStats]: ...
+    async def top_active_rooms(
+        self, limit: int, accuracy: Accuracy = Accuracy.EXACT
+    ) -> list[RoomStats]: ...
 
     async def messages_per_minute(self, room_id: UUID, since_minutes: int) -> int: ...
 
-    async def get_user_retention(self, days: int) -> float: ...
+    async def get_room_activity(
+        self, room_id: UUID, start: datetime, end: datetime, bucket: TimeBucket
+    ) -> list[tuple[datetime, int]]: ...
+
+    async def get_user_retention(
+        self, days: int, accuracy: Accuracy = Accuracy.EXACT
+    ) -> float: ...
+
+    async def get_cohort_sizes(
+        self, start: date, end: date, accuracy: Accuracy = Accuracy.EXACT
+    ) -> dict[date, int]: ...
+
+    async def get_cohort_activity(
+        self, start: date, end: date, accuracy: Accuracy = Accuracy.EXACT
+    ) -> list[tuple[date, int, int]]: ...
 
     async def message_edit_delete_ratio(self) -> dict[str, float]: ...
 
-    async def top_social_users(self, limit: int = 10) -> list[dict[str, Any]]: ...
+    async def top_social_users(
+        self, limit: int = 10, accuracy: Accuracy = Accuracy.EXACT
+    ) -> list[dict[str, Any]]: ...
+
+
+class AnalyticsSinkPort(Protocol):
+    async def submit(self, event: AnalyticsEvent) -> Awaitable[None]: ...
+
+    async def publish_event(self, event: AnalyticsEvent) -> None: ...
+
+
+class RealtimeMetricsPort(Protocol):
+    async def record(self, event: AnalyticsEvent) -> None: ...
+
+    async def active_users(self, minutes: int, room_id: UUID | None = None) -> int: ...
+
+    async def event_counts(
+        self,
+        event_type: AnalyticsEventType,
+        minutes: int,
+        room_id: UUID | None = None,
+    ) -> list[int]: ...
@@ -0,0 +1,24 @@
+from collections.abc import AsyncIterator
+from datetime import datetime
+from typing import Protocol
+from uuid import UUID
+
+from app.domain.entities.message import Message
+
+
+class MessageArchivePort(Protocol):
+    async def archive(self, room_id: UUID, messages: list[Message]) -> None: ...
+
+    async def get_recent(
+        self, room_id: UUID, limit: int, before: datetime | None
+    ) -> list[Message]: ...
+
+    def iter_oldest(
+        self, room_id: UUID, page_size: int
+    ) -> AsyncIterator[list[Message]]: ...
+
+    async def delete_messages(self, room_id: UUID, messages: list[Message]) -> None: ...
+
+    async def delete_user_messages(self, room_id: UUID, user_id: UUID) -> None: ...
+
+    async def delete_room(self, room_id: UUID) -> None: ...
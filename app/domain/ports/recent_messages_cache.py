@@ -0,0 +1,36 @@
+from datetime import datetime
+from typing import Protocol
+from uuid import UUID
+
+from app.domain.dtos.message import MessagePublicDTO
+
+
+class RecentMessagesCachePort(Protocol):
+    async def get_recent(
+        self,
+        room_id: UUID,
+        limit: int,
+        before: datetime | None,
+        not_before: datetime | None = None,
+    ) -> list[MessagePublicDTO] | None: ...
+
+    async def get_generation(self, room_id: UUID) -> int: ...
+
+    async def fill(
+        self,
+        room_id: UUID,
+        messages: list[MessagePublicDTO],
+        complete: bool,
+        generation: int,
+    ) -> None: ...
+
+    async def push(
+        self,
+        message: MessagePublicDTO,
+        only_existing: bool,
+        not_before: datetime | None = None,
+    ) -> None: ...
+
+    async def remove(self, room_id: UUID, created_at: datetime) -> None: ...
+
+    async def invalidate(self, room_id: UUID) -> None: ...
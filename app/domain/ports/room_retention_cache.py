@@ -0,0 +1,8 @@
+from typing import Protocol
+from uuid import UUID
+
+
+class RoomRetentionCachePort(Protocol):
+    async def get(self, room_id: UUID) -> int | None: ...
+
+    async def set(self, room_id: UUID, retention_days: int) -> None: ...
@@ -0,0 +1,11 @@
+from collections.abc import Collection, Mapping
+from typing import Protocol
+from uuid import UUID
+
+
+class UsernameCachePort(Protocol):
+    async def get_many(self, user_ids: Collection[UUID]) -> dict[UUID, str]: ...
+
+    async def set_many(self, usernames: Mapping[UUID, str]) -> None: ...
+
+    async def invalidate(self, user_id: UUID) -> None: ...
@@ -0,0 +1,13 @@
+from typing import Any, Protocol
+
+from app.domain.entities.job_checkpoint import JobCheckpoint
+
+
+class JobCheckpointRepository(Protocol):
+    async def get(
+        self, name: str, db_session: Any | None = None
+    ) -> JobCheckpoint | None: ...
+
+    async def save(
+        self, checkpoint: JobCheckpoint, db_session: Any | None = None
+    ) -> None: ...
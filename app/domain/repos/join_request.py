@@ -3,7 +3,6 @@ from uuid import UUID
 
 from app.domain.entities.join_request import JoinRequest
 from app.domain.entities.room import Room
-from app.domain.entities.user import User
 
 
 class JoinRequestRepository(Protocol):
@@ -21,11 +20,11 @@ class JoinRequestRepository(Protocol):
 
     async def list_by_room(
         self, room_id: UUID, db_session: Any | None = None
-    ) -> list[tuple[JoinRequest, User, Room]]: ...
+    ) -> list[JoinRequest]: ...
 
     async def list_by_user(
         self, user_id: UUID, db_session: Any | None = None
-    ) -> list[tuple[JoinRequest, User, Room]]: ...
+    ) -> list[tuple[JoinRequest, Room]]: ...
 
     async def exists(
         self, room_id: UUID, user_id: UUID, db_session: Any | None = None
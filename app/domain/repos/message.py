@@ -1,3 +1,4 @@
+from collections.abc import AsyncIterator
 from datetime import datetime
 from typing import Any, Protocol
 from uuid import UUID
@@ -6,21 +7,67 @@ from app.domain.entities.message import Message
 
 
 class MessageRepository(Protocol):
-    async def save(self, message: Message, db_session: Any | None = None) -> None: ...
+    async def save(
+        self,
+        message: Message,
+        ttl_seconds: int | None = None,
+        db_session: Any | None = None,
+    ) -> None: ...
+
+    async def update(
+        self,
+        message: Message,
+        ttl_seconds: int | None = None,
+        db_session: Any | None = None,
+    ) -> None: ...
 
     async def get_recent_by_room(
         self,
         room_id: UUID,
         limit: int,
         before: datetime | None,
+        start_after: tuple[datetime, UUID] | None = None,
+        include_archive: bool = True,
+        expiring: bool = False,
+        db_session: Any | None = None,
+    ) -> list[Message]: ...
+
+    async def get_oldest_all_rooms(
+        self,
+        before: datetime,
+        limit: int,
+        since: datetime | None = None,
+        start_after: tuple[datetime, UUID] | None = None,
+        db_session: Any | None = None,
+    ) -> list[Message]: ...
+
+    async def get_recent_by_user(
+        self,
+        user_id: UUID,
+        limit: int,
+        start_after: datetime | None = None,
         db_session: Any | None = None,
     ) -> list[Message]: ...
 
+    def iter_by_user(
+        self, user_id: UUID, page_size: int, db_session: Any | None = None
+    ) -> AsyncIterator[list[Message]]: ...
+
+    def iter_by_room(
+        self,
+        room_id: UUID,
+        until: datetime,
+        page_size: int,
+        expiring: bool = False,
+        db_session: Any | None = None,
+    ) -> AsyncIterator[list[Message]]: ...
+
     async def get_since_all_rooms(
         self,
         since: datetime,
         limit: int,
         start_after: tuple[datetime, UUID] | None = None,
+        until: datetime | None = None,
         db_session: Any | None = None,
     ) -> list[Message]: ...
 
@@ -28,6 +75,30 @@ class MessageRepository(Protocol):
         self, message_id: UUID, db_session: Any | None = None
     ) -> Message | None: ...
 
+    async def get_ttl(
+        self, message_id: UUID, db_session: Any | None = None
+    ) -> int | None: ...
+
     async def delete_by_id(
         self, message_id: UUID, db_session: Any | None = None
     ) -> None: ...
+
+    async def delete_many(
+        self, messages: list[Message], db_session: Any | None = None
+    ) -> None: ...
+
+    async def delete_user_archive(
+        self, user_id: UUID, room_id: UUID, db_session: Any | None = None
+    ) -> None: ...
+
+    async def delete_archived(
+        self, messages: list[Message], db_session: Any | None = None
+    ) -> None: ...
+
+    async def delete_lookup_rows(
+        self, messages: list[Message], db_session: Any | None = None
+    ) -> None: ...
+
+    async def delete_room_partition(
+        self, room_id: UUID, db_session: Any | None = None
+    ) -> None: ...
@@ -1,13 +1,19 @@
+from collections.abc import AsyncIterator
 from datetime import datetime
 from typing import Any, Protocol
 from uuid import UUID
 
-from app.domain.entities.outbox import Outbox
+from app.core.constants import OutboxMessageType
+from app.domain.entities.outbox import Outbox, OutboxOutcome
 
 
 class OutboxRepository(Protocol):
     async def save(self, outbox: Outbox, db_session: Any | None = None) -> Outbox: ...
 
+    async def save_many(
+        self, outboxes: list[Outbox], db_session: Any | None = None
+    ) -> None: ...
+
     async def get_by_id(
         self, outbox_id: UUID, db_session: Any | None = None
     ) -> Outbox | None: ...
@@ -16,6 +22,36 @@ class OutboxRepository(Protocol):
         self, limit: int, db_session: Any | None = None
     ) -> list[Outbox]: ...
 
+    def watch_pending(self) -> AsyncIterator[Outbox]: ...
+
+    async def oldest_pending_created_at(
+        self, message_type: OutboxMessageType, db_session: Any | None = None
+    ) -> datetime | None: ...
+
+    async def claim_batch(
+        self,
+        worker_id: str,
+        limit: int,
+        lease_seconds: float,
+        message_type: OutboxMessageType | None = None,
+        db_session: Any | None = None,
+    ) -> list[Outbox]: ...
+
+    async def extend_leases(
+        self,
+        outbox_ids: list[UUID],
+        worker_id: str,
+        lease_seconds: float,
+        db_session: Any | None = None,
+    ) -> int: ...
+
+    async def apply_outcomes(
+        self,
+        outcomes: list[OutboxOutcome],
+        worker_id: str,
+        db_session: Any | None = None,
+    ) -> int: ...
+
     async def mark_in_progress(
         self, outbox_id: UUID, db_session: Any | None = None
     ) -> None: ...
@@ -1,3 +1,4 @@
+from collections.abc import Collection
 from typing import Any, Protocol
 from uuid import UUID
 
@@ -11,6 +12,10 @@ class RoomRepository(Protocol):
         self, room_id: UUID, db_session: Any | None = None
     ) -> Room | None: ...
 
+    async def get_by_ids(
+        self, room_ids: Collection[UUID], db_session: Any | None = None
+    ) -> list[Room]: ...
+
     async def search(
         self, query: str, limit: int, db_session: Any | None = None
     ) -> list[Room]: ...
@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import Any, Protocol
+from uuid import UUID
+
+from app.domain.entities.room_reclaim import RoomReclaim
+
+
+class RoomReclaimRepository(Protocol):
+    async def enqueue(self, room_id: UUID, db_session: Any | None = None) -> None: ...
+
+    async def list_pending(
+        self, limit: int, db_session: Any | None = None
+    ) -> list[RoomReclaim]: ...
+
+    async def save_checkpoint(
+        self,
+        room_id: UUID,
+        checkpoint: datetime,
+        reclaimed_rows: int,
+        db_session: Any | None = None,
+    ) -> None: ...
+
+    async def delete(self, room_id: UUID, db_session: Any | None = None) -> None: ...
@@ -1,45 +1,200 @@
+from datetime import UTC, date, datetime, timedelta
 from typing import Any
 from uuid import UUID
 
+from app.core.constants import Accuracy, AnalyticsEventType, TimeBucket
+from app.core.settings import get_settings
+from app.domain.entities.accuracy import AccuracyBounds
+from app.domain.entities.retention import RetentionCohort, RetentionMatrix
+from app.domain.entities.room_activity import RoomActivitySeries
 from app.domain.entities.room_stats import RoomStats
-from app.domain.exceptions.analytics import RoomStatsNotFound, UserActivityNotFound
-from app.domain.ports.analytics import AnalyticsPort
+from app.domain.exceptions.analytics import (
+    InvalidTimeRange,
+    RoomStatsNotFound,
+    UnsupportedAccuracy,
+    UserActivityNotFound,
+)
+from app.domain.ports.analytics import AnalyticsPort, RealtimeMetricsPort
+
+BUCKET_STEPS = {
+    TimeBucket.MINUTE: timedelta(minutes=1),
+    TimeBucket.HOUR: timedelta(hours=1),
+    TimeBucket.DAY: timedelta(days=1),
+}
+EPOCH = datetime(1970, 1, 1)
+# relative standard error of the HyperLogLog stage of uniqCombined (2^17 cells)
+APPROXIMATE_RELATIVE_ERROR = 0.0029
+
+
+def _to_naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(UTC).replace(tzinfo=None)
 
 
 class AnalyticsService:
     def __init__(
         self,
         analytics_port: AnalyticsPort,
+        realtime_metrics: RealtimeMetricsPort,
     ):
         self._analytics = analytics_port
+        self._realtime = realtime_metrics
 
-    async def room_stats(self, room_id: UUID) -> RoomStats:
-        rooms_stats = await self._analytics.get_room_stats(room_id=room_id)
+    def accuracy_bounds(self, accuracy: Accuracy) -> AccuracyBounds:
+        if accuracy is Accuracy.APPROXIMATE:
+            return AccuracyBounds(
+                accuracy=accuracy,
+                sample_rate=1.0,
+                relative_error=APPROXIMATE_RELATIVE_ERROR,
+            )
+        if accuracy is Accuracy.SAMPLED:
+            # the error of a sampled count depends on the count itself
+            return AccuracyBounds(
+                accuracy=accuracy,
+                sample_rate=get_settings().analytics_sample_rate,
+                relative_error=None,
+            )
+        return AccuracyBounds(accuracy=accuracy, sample_rate=1.0, relative_error=0.0)
+
+    @staticmethod
+    def _check_rollup_accuracy(accuracy: Accuracy) -> None:
+        # rollups are keyed by room or user, a user-hash sample of them means
+        # nothing, approximate states are kept next to the exact ones instead
+        if accuracy is Accuracy.SAMPLED:
+            raise UnsupportedAccuracy("Sampled accuracy is only served for retention")
+
+    async def room_stats(
+        self, room_id: UUID, accuracy: Accuracy = Accuracy.EXACT
+    ) -> RoomStats:
+        self._check_rollup_accuracy(accuracy)
+        rooms_stats = await self._analytics.get_room_stats(
+            room_id=room_id, accuracy=accuracy
+        )
         if not rooms_stats:
             raise RoomStatsNotFound
 
         return rooms_stats
 
-    async def user_activity(self, user_id: UUID) -> dict[str, int]:
-        user_activity = await self._analytics.get_user_activity(user_id=user_id)
+    async def user_activity(
+        self, user_id: UUID, accuracy: Accuracy = Accuracy.EXACT
+    ) -> dict[str, int]:
+        self._check_rollup_accuracy(accuracy)
+        user_activity = await self._analytics.get_user_activity(
+            user_id=user_id, accuracy=accuracy
+        )
         if not user_activity:
             raise UserActivityNotFound
 
         return user_activity
 
-    async def top_active_rooms(self, limit: int) -> list[RoomStats]:
-        return await self._analytics.top_active_rooms(limit=limit)
+    async def top_active_rooms(
+        self, limit: int, accuracy: Accuracy = Accuracy.EXACT
+    ) -> list[RoomStats]:
+        self._check_rollup_accuracy(accuracy)
+        return await self._analytics.top_active_rooms(limit=limit, accuracy=accuracy)
 
     async def messages_per_minute(self, room_id: UUID, since_minutes: int) -> int:
         return await self._analytics.messages_per_minute(
             room_id=room_id, since_minutes=since_minutes
         )
 
-    async def user_retention(self, days: int) -> float:
-        return await self._analytics.get_user_retention(days=days)
+    async def room_activity(
+        self,
+        room_id: UUID,
+        start: datetime,
+        end: datetime | None,
+        bucket: TimeBucket,
+    ) -> RoomActivitySeries:
+        step = BUCKET_STEPS[bucket]
+        # clickhouse stores naive utc and aligns buckets to the epoch, so do we
+        start = _to_naive_utc(start)
+        start = EPOCH + (start - EPOCH) // step * step
+        if end is None:
+            # up to the end of the current bucket, so repeated calls within it
+            # ask for the same range
+            now = _to_naive_utc(datetime.now(UTC))
+            end = EPOCH + ((now - EPOCH) // step + 1) * step
+        end = _to_naive_utc(end)
+        if end <= start:
+            raise InvalidTimeRange("Range end must be after its start")
+        points = -(-(end - start) // step)
+        if points > get_settings().analytics_series_max_points:
+            raise InvalidTimeRange("Range has too many points for this bucket")
+
+        counts = [0] * points
+        for bucket_start, messages in await self._analytics.get_room_activity(
+            room_id=room_id, start=start, end=end, bucket=bucket
+        ):
+            index = (_to_naive_utc(bucket_start) - start) // step
+            if 0 <= index < points:
+                counts[index] = messages
+
+        return RoomActivitySeries(
+            room_id=room_id, bucket=bucket, start=start, counts=counts
+        )
+
+    @staticmethod
+    def _check_realtime_window(minutes: int) -> None:
+        if not 1 <= minutes <= get_settings().realtime_metrics_window_minutes:
+            raise InvalidTimeRange("Window is outside the realtime metrics range")
+
+    async def realtime_active_users(
+        self, minutes: int, room_id: UUID | None = None
+    ) -> int:
+        self._check_realtime_window(minutes)
+        return await self._realtime.active_users(minutes=minutes, room_id=room_id)
+
+    async def realtime_event_counts(
+        self,
+        event_type: AnalyticsEventType,
+        minutes: int,
+        room_id: UUID | None = None,
+    ) -> list[int]:
+        self._check_realtime_window(minutes)
+        return await self._realtime.event_counts(
+            event_type=event_type, minutes=minutes, room_id=room_id
+        )
+
+    async def user_retention(
+        self, days: int, accuracy: Accuracy = Accuracy.EXACT
+    ) -> float:
+        return await self._analytics.get_user_retention(days=days, accuracy=accuracy)
+
+    async def retention_cohorts(
+        self, start: date, end: date | None, accuracy: Accuracy = Accuracy.EXACT
+    ) -> RetentionMatrix:
+        end = end or datetime.now(UTC).date()
+        if end < start:
+            raise InvalidTimeRange("Range end must not be before its start")
+        if (end - start).days >= get_settings().analytics_cohort_max_days:
+            raise InvalidTimeRange("Range has too many cohorts")
+
+        sizes = await self._analytics.get_cohort_sizes(
+            start=start, end=end, accuracy=accuracy
+        )
+        cohorts = {
+            cohort_day: RetentionCohort(
+                cohort_day=cohort_day,
+                users=users,
+                retained=[0] * ((end - cohort_day).days + 1),
+            )
+            for cohort_day, users in sorted(sizes.items())
+        }
+        for cohort_day, day_offset, users in await self._analytics.get_cohort_activity(
+            start=start, end=end, accuracy=accuracy
+        ):
+            cohort = cohorts.get(cohort_day)
+            if cohort is not None and day_offset < len(cohort.retained):
+                cohort.retained[day_offset] = users
+
+        return RetentionMatrix(start=start, end=end, cohorts=list(cohorts.values()))
 
     async def message_edit_delete_ratio(self) -> dict[str, float]:
         return await self._analytics.message_edit_delete_ratio()
 
-    async def top_social_users(self, limit: int = 10) -> list[dict[str, Any]]:
-        return await self._analytics.top_social_users(limit=limit)
+    async def top_social_users(
+        self, limit: int = 10, accuracy: Accuracy = Accuracy.EXACT
+    ) -> list[dict[str, Any]]:
+        self._check_rollup_accuracy(accuracy)
+        return await self._analytics.top_social_users(limit=limit, accuracy=accuracy)
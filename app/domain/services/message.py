@@ -1,4 +1,7 @@
-from datetime import UTC, datetime
+import asyncio
+from collections import defaultdict
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime, timedelta
 from typing import Any
 from uuid import UUID
 
@@ -8,19 +11,40 @@ from app.core.constants import (
     AnalyticsEventType,
     BroadcastEventType,
 )
-from app.domain.dtos.message import MessagePublicDTO, message_to_dto
+from app.core.settings import get_settings
+from app.domain.dtos.message import (
+    MessagePageDTO,
+    MessagePublicDTO,
+    MessagePurgeResultDTO,
+    UserMessagePageDTO,
+    message_to_dto,
+    user_message_to_dto,
+)
 from app.domain.entities.event_payload import EventPayload
 from app.domain.entities.message import Message
-from app.domain.entities.user import User
-from app.domain.exceptions.message import MessageNotFound, MessagePermissionError
+from app.domain.exceptions.message import (
+    InvalidCursor,
+    MessageNotFound,
+    MessagePermissionError,
+)
 from app.domain.exceptions.user import UserNotFound
 from app.domain.ports.connection import ConnectionPort
+from app.domain.ports.recent_messages_cache import RecentMessagesCachePort
+from app.domain.ports.room_retention_cache import RoomRetentionCachePort
 from app.domain.ports.transaction_manager import TransactionManager
+from app.domain.ports.username_cache import UsernameCachePort
 from app.domain.repos.message import MessageRepository
 from app.domain.repos.outbox import OutboxRepository
+from app.domain.repos.room import RoomRepository
 from app.domain.repos.room_membership import RoomMembershipRepository
 from app.domain.repos.user import UserRepository
-from app.domain.services.utils import create_outbox_analytics_event
+from app.domain.services.utils import (
+    build_outbox_analytics_event,
+    create_outbox_analytics_event,
+    decode_cursor,
+    encode_cursor,
+    resolve_usernames,
+)
 
 logger = structlog.get_logger(__name__)
 
@@ -30,23 +54,36 @@ class MessageService:
         self,
         message_repo: MessageRepository,
         user_repo: UserRepository,
+        room_repo: RoomRepository,
         membership_repo: RoomMembershipRepository,
         outbox_repo: OutboxRepository,
         connection_port: ConnectionPort,
+        recent_messages_cache: RecentMessagesCachePort,
+        username_cache: UsernameCachePort,
+        room_retention_cache: RoomRetentionCachePort,
         transaction_manager: TransactionManager,
     ):
         self._message_repo = message_repo
         self._user_repo = user_repo
+        self._room_repo = room_repo
         self._membership_repo = membership_repo
         self._outbox_repo = outbox_repo
         self._conn = connection_port
+        self._recent_cache = recent_messages_cache
+        self._username_cache = username_cache
+        self._room_retention_cache = room_retention_cache
         self._tm = transaction_manager
 
     async def _validate_user(
         self, user_id: UUID, room_id: UUID, creator_id: UUID | None = None
-    ) -> User:
-        user = await self._user_repo.get_by_id(user_id=user_id)
-        if user is None:
+    ) -> str:
+        usernames = await resolve_usernames(
+            user_repo=self._user_repo,
+            username_cache=self._username_cache,
+            user_ids={user_id},
+        )
+        username = usernames.get(user_id)
+        if username is None:
             raise UserNotFound
 
         membership = await self._membership_repo.exists(
@@ -58,16 +95,38 @@ class MessageService:
         if creator_id and creator_id != user_id:
             raise MessagePermissionError
 
-        return user
+        return username
+
+    async def _retention_days(self, room_id: UUID) -> int:
+        retention_days = await self._room_retention_cache.get(room_id=room_id)
+        if retention_days is None:
+            room = await self._room_repo.get_by_id(room_id=room_id)
+            retention_days = (room and room.retention_days) or 0
+            await self._room_retention_cache.set(
+                room_id=room_id, retention_days=retention_days
+            )
+        return retention_days
+
+    async def _message_ttl(self, room_id: UUID) -> int | None:
+        retention_days = await self._retention_days(room_id=room_id)
+        return int(timedelta(days=retention_days).total_seconds()) or None
+
+    async def _retention_cutoff(self, room_id: UUID) -> datetime | None:
+        # the ring buffer has no per-message TTL, so messages older than the
+        # room retention are trimmed by score to match what Cassandra expired
+        retention_days = await self._retention_days(room_id=room_id)
+        if not retention_days:
+            return None
+        return datetime.now(UTC) - timedelta(days=retention_days)
 
     @staticmethod
-    def _create_message_event_payload(message: Message, user: User) -> EventPayload:
+    def _create_message_event_payload(message: Message, username: str) -> EventPayload:
         return EventPayload(
             payload={
                 "message": message.content,
                 "message_id": str(message.id),
-                "user_id": str(user.id),
-                "username": user.username,
+                "user_id": str(message.user_id),
+                "username": username,
             },
             timestamp=datetime.now(UTC).isoformat(),
         )
@@ -75,15 +134,16 @@ class MessageService:
     async def send_message(
         self, room_id: UUID, user_id: UUID, content: str
     ) -> MessagePublicDTO:
-        user = await self._validate_user(user_id=user_id, room_id=room_id)
+        message = Message(room_id=room_id, user_id=user_id, content=content)
+        username, ttl_seconds = await asyncio.gather(
+            self._validate_user(user_id=user_id, room_id=room_id),
+            self._message_ttl(room_id=room_id),
+        )
 
         async def _txn(db_session: Any) -> Message:
-            message = Message(
-                room_id=room_id,
-                user_id=user_id,
-                content=content,
+            await self._message_repo.save(
+                message=message, ttl_seconds=ttl_seconds, db_session=db_session
             )
-            await self._message_repo.save(message=message, db_session=db_session)
 
             # If writing to the Outbox fails (e.g., Mongo is unavailable), the analytics event won't be sent,
             # but the Message itself is persisted. Missing events will be recovered later by the Outbox Repair Job.
@@ -103,16 +163,26 @@ class MessageService:
             return message
 
         message_create: Message = await self._tm.run_in_transaction(_txn)
+        message_dto = message_to_dto(message=message_create, username=username)
+        await self._recent_cache.push(
+            message=message_dto,
+            only_existing=False,
+            not_before=(
+                message_create.created_at - timedelta(seconds=ttl_seconds)
+                if ttl_seconds
+                else None
+            ),
+        )
 
         event_payload = self._create_message_event_payload(
-            message=message_create, user=user
+            message=message_create, username=username
         )
         await self._conn.broadcast_event(
             room_id=room_id,
             event_type=BroadcastEventType.MESSAGE_CREATED,
             event_payload=event_payload,
         )
-        return message_to_dto(message=message_create, username=user.username)
+        return message_dto
 
     async def edit_message(
         self, message_id: UUID, user_id: UUID, new_content: str
@@ -121,15 +191,22 @@ class MessageService:
         if not message:
             raise MessageNotFound
 
-        user = await self._validate_user(
-            user_id=user_id, room_id=message.room_id, creator_id=message.user_id
+        username, ttl_seconds = await asyncio.gather(
+            self._validate_user(
+                user_id=user_id, room_id=message.room_id, creator_id=message.user_id
+            ),
+            # the rewrite keeps the TTL the row was written with, a retention
+            # set later only applies to new messages
+            self._message_repo.get_ttl(message_id=message.id),
         )
 
         async def _txn(db_session: Any) -> Message:
             message.content = new_content
             message.edited = True
             message.updated_at = datetime.now(UTC)
-            await self._message_repo.save(message=message, db_session=db_session)
+            await self._message_repo.update(
+                message=message, ttl_seconds=ttl_seconds, db_session=db_session
+            )
 
             await create_outbox_analytics_event(
                 outbox_repo=self._outbox_repo,
@@ -144,23 +221,29 @@ class MessageService:
             return message
 
         message_update = await self._tm.run_in_transaction(_txn)
+        message_dto = message_to_dto(message=message_update, username=username)
+        await self._recent_cache.push(
+            message=message_dto,
+            only_existing=True,
+            not_before=await self._retention_cutoff(room_id=message.room_id),
+        )
 
         event_payload = self._create_message_event_payload(
-            message=message_update, user=user
+            message=message_update, username=username
         )
         await self._conn.broadcast_event(
             room_id=message.room_id,
             event_type=BroadcastEventType.MESSAGE_EDITED,
             event_payload=event_payload,
         )
-        return message_to_dto(message=message_update, username=user.username)
+        return message_dto
 
     async def delete_message(self, message_id: UUID, user_id: UUID) -> None:
         message = await self._message_repo.get_by_id(message_id=message_id)
         if not message:
             raise MessageNotFound
 
-        user = await self._validate_user(
+        username = await self._validate_user(
             user_id=user_id, room_id=message.room_id, creator_id=message.user_id
         )
 
@@ -181,29 +264,312 @@ class MessageService:
             logger.bind(message_id=message.id).info("Message deleted")
 
         await self._tm.run_in_transaction(_txn)
+        await self._recent_cache.remove(
+            room_id=message.room_id, created_at=message.created_at
+        )
 
-        event_payload = self._create_message_event_payload(message=message, user=user)
+        event_payload = self._create_message_event_payload(
+            message=message, username=username
+        )
         await self._conn.broadcast_event(
             room_id=message.room_id,
             event_type=BroadcastEventType.MESSAGE_DELETED,
             event_payload=event_payload,
         )
 
+    async def _to_dtos(self, messages: list[Message]) -> list[MessagePublicDTO]:
+        if not messages:
+            return []
+
+        users_map = await resolve_usernames(
+            user_repo=self._user_repo,
+            username_cache=self._username_cache,
+            user_ids={msg.user_id for msg in messages},
+        )
+        return [
+            message_to_dto(message=msg, username=users_map.get(msg.user_id, "Unknown"))
+            for msg in messages
+        ]
+
+    async def _load_recent(
+        self,
+        room_id: UUID,
+        limit: int,
+        before: datetime | None,
+        start_after: tuple[datetime, UUID] | None = None,
+    ) -> list[MessagePublicDTO]:
+        boundary = start_after[0] if start_after else before
+        not_before = await self._retention_cutoff(room_id=room_id)
+        cached = await self._recent_cache.get_recent(
+            room_id=room_id, limit=limit, before=boundary, not_before=not_before
+        )
+        if cached is not None:
+            return cached
+
+        if boundary is None:
+            # warm the whole ring buffer on a miss so later opens of the room hit it
+            buffer_size = max(limit, get_settings().recent_messages_buffer_size)
+            # read before the snapshot, the fill is dropped if an edit or delete
+            # reached the buffer in between
+            generation = await self._recent_cache.get_generation(room_id=room_id)
+            messages = await self._message_repo.get_recent_by_room(
+                room_id=room_id,
+                limit=buffer_size,
+                before=None,
+                expiring=not_before is not None,
+            )
+            message_dtos = await self._to_dtos(messages=messages)
+            await self._recent_cache.fill(
+                room_id=room_id,
+                messages=message_dtos,
+                complete=len(messages) < buffer_size,
+                generation=generation,
+            )
+            return message_dtos[:limit]
+
+        messages = await self._message_repo.get_recent_by_room(
+            room_id=room_id,
+            limit=limit,
+            before=before,
+            start_after=start_after,
+            expiring=not_before is not None,
+        )
+        return await self._to_dtos(messages=messages)
+
+    @staticmethod
+    def _to_millis(created_at: datetime) -> int:
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=UTC)
+        return int(created_at.timestamp() * 1000)
+
+    def _encode_message_cursor(self, message: MessagePublicDTO) -> str:
+        return encode_cursor(
+            {
+                "room_id": str(message.room_id),
+                "created_at": self._to_millis(message.created_at),
+                "id": str(message.id),
+            }
+        )
+
+    @staticmethod
+    def _decode_message_cursor(cursor: str, room_id: UUID) -> tuple[datetime, UUID]:
+        values = decode_cursor(cursor)
+        try:
+            cursor_room_id = UUID(values["room_id"])
+            created_at = datetime.fromtimestamp(values["created_at"] / 1000, UTC)
+            message_id = UUID(values["id"])
+        except (KeyError, TypeError, ValueError):
+            raise InvalidCursor from None
+
+        if cursor_room_id != room_id:
+            raise InvalidCursor
+        return created_at, message_id
+
     async def get_recent_messages(
         self, room_id: UUID, user_id: UUID, limit: int, before: datetime | None
     ) -> list[MessagePublicDTO]:
         await self._validate_user(user_id=user_id, room_id=room_id)
 
-        messages = await self._message_repo.get_recent_by_room(
-            room_id=room_id, limit=limit, before=before
+        return await self._load_recent(room_id=room_id, limit=limit, before=before)
+
+    async def get_messages_page(
+        self, room_id: UUID, user_id: UUID, limit: int, cursor: str | None
+    ) -> MessagePageDTO:
+        start_after = (
+            self._decode_message_cursor(cursor=cursor, room_id=room_id)
+            if cursor
+            else None
         )
-        if not messages:
-            return []
+        await self._validate_user(user_id=user_id, room_id=room_id)
 
-        user_ids = {msg.user_id for msg in messages}
-        users = await self._user_repo.get_by_ids(user_ids=user_ids)
-        users_map = {user.id: user.username for user in users}
-        return [
-            message_to_dto(message=msg, username=users_map.get(msg.user_id, "Unknown"))
+        # one extra row tells whether another page exists without a second query
+        messages = await self._load_recent(
+            room_id=room_id, limit=limit + 1, before=None, start_after=start_after
+        )
+        next_cursor = None
+        if len(messages) > limit:
+            messages = messages[:limit]
+            next_cursor = self._encode_message_cursor(message=messages[-1])
+
+        return MessagePageDTO(items=messages, next_cursor=next_cursor)
+
+    async def export_room_messages(
+        self, room_id: UUID, user_id: UUID
+    ) -> AsyncIterator[list[MessagePublicDTO]]:
+        _, retention_days = await asyncio.gather(
+            self._validate_user(user_id=user_id, room_id=room_id),
+            self._retention_days(room_id=room_id),
+        )
+        return self._iter_export(
+            room_id=room_id, until=datetime.now(UTC), expiring=retention_days > 0
+        )
+
+    async def _iter_export(
+        self, room_id: UUID, until: datetime, expiring: bool
+    ) -> AsyncIterator[list[MessagePublicDTO]]:
+        exported = 0
+        async for messages in self._message_repo.iter_by_room(
+            room_id=room_id,
+            until=until,
+            page_size=get_settings().message_export_page_size,
+            expiring=expiring,
+        ):
+            yield await self._to_dtos(messages=messages)
+            exported += len(messages)
+
+        logger.bind(room_id=room_id, count=exported).info("Room messages exported")
+
+    @staticmethod
+    def _is_admin(user_id: UUID) -> bool:
+        return user_id in get_settings().admin_user_ids
+
+    def _encode_user_message_cursor(self, message: Message) -> str:
+        return encode_cursor(
+            {
+                "user_id": str(message.user_id),
+                "created_at": self._to_millis(message.created_at),
+            }
+        )
+
+    @staticmethod
+    def _decode_user_message_cursor(cursor: str, user_id: UUID) -> datetime:
+        values = decode_cursor(cursor)
+        try:
+            cursor_user_id = UUID(values["user_id"])
+            created_at = datetime.fromtimestamp(values["created_at"] / 1000, UTC)
+        except (KeyError, TypeError, ValueError):
+            raise InvalidCursor from None
+
+        if cursor_user_id != user_id:
+            raise InvalidCursor
+        return created_at
+
+    async def get_user_messages(
+        self, user_id: UUID, requested_by: UUID, limit: int, cursor: str | None
+    ) -> UserMessagePageDTO:
+        if requested_by != user_id and not self._is_admin(user_id=requested_by):
+            raise MessagePermissionError
+
+        start_after = (
+            self._decode_user_message_cursor(cursor=cursor, user_id=user_id)
+            if cursor
+            else None
+        )
+        messages = await self._message_repo.get_recent_by_user(
+            user_id=user_id, limit=limit + 1, start_after=start_after
+        )
+        next_cursor = None
+        if len(messages) > limit:
+            messages = messages[:limit]
+            next_cursor = self._encode_user_message_cursor(message=messages[-1])
+
+        usernames, rooms = await asyncio.gather(
+            resolve_usernames(
+                user_repo=self._user_repo,
+                username_cache=self._username_cache,
+                user_ids={user_id},
+            ),
+            self._room_repo.get_by_ids(room_ids={msg.room_id for msg in messages}),
+        )
+        room_names = {room.id: room.name for room in rooms}
+
+        items = [
+            user_message_to_dto(
+                message=msg,
+                username=usernames.get(msg.user_id, "Unknown"),
+                room_name=room_names.get(msg.room_id),
+            )
             for msg in messages
         ]
+        logger.bind(user_id=user_id, requested_by=requested_by, count=len(items)).debug(
+            "Fetched user messages"
+        )
+        return UserMessagePageDTO(items=items, next_cursor=next_cursor)
+
+    async def purge_user_messages(
+        self, user_id: UUID, requested_by: UUID
+    ) -> MessagePurgeResultDTO:
+        if not self._is_admin(user_id=requested_by):
+            raise MessagePermissionError
+
+        settings = get_settings()
+        semaphore = asyncio.Semaphore(settings.message_purge_concurrency)
+        deleted_count = 0
+        room_ids: set[UUID] = set()
+
+        try:
+            async for messages in self._message_repo.iter_by_user(
+                user_id=user_id, page_size=settings.message_purge_page_size
+            ):
+                room_ids.update(message.room_id for message in messages)
+                deleted_count += await self._purge_page(
+                    user_id=user_id, messages=messages, semaphore=semaphore
+                )
+        finally:
+            # user history keeps archived messages, so a purge reaches them too.
+            # Rows already gone from the user table cannot lead a rerun back to
+            # their rooms, so this also runs when the purge stops early
+            for room_id in room_ids:
+                await self._message_repo.delete_user_archive(
+                    user_id=user_id, room_id=room_id
+                )
+
+        logger.bind(
+            user_id=user_id,
+            requested_by=requested_by,
+            deleted=deleted_count,
+            rooms=len(room_ids),
+        ).info("User messages purged")
+        return MessagePurgeResultDTO(
+            deleted_count=deleted_count, room_count=len(room_ids)
+        )
+
+    async def _purge_page(
+        self, user_id: UUID, messages: list[Message], semaphore: asyncio.Semaphore
+    ) -> int:
+        # analytics go out first, the dedup keys make a rerun after a failure
+        # record each deletion once
+        await self._outbox_repo.save_many(
+            outboxes=[
+                build_outbox_analytics_event(
+                    event_type=AnalyticsEventType.MESSAGE_DELETED,
+                    user_id=user_id,
+                    room_id=message.room_id,
+                    payload={"message": message.content},
+                    dedup_key=f"message_deleted:{message.id}",
+                )
+                for message in messages
+            ]
+        )
+
+        deleted_by_room: defaultdict[UUID, list[str]] = defaultdict(list)
+
+        async def _delete_batch(batch: list[Message]) -> None:
+            async with semaphore:
+                await self._message_repo.delete_many(messages=batch)
+            for message in batch:
+                deleted_by_room[message.room_id].append(str(message.id))
+
+        batch_size = get_settings().message_purge_batch_size
+        try:
+            await asyncio.gather(
+                *(
+                    _delete_batch(messages[i : i + batch_size])
+                    for i in range(0, len(messages), batch_size)
+                )
+            )
+        finally:
+            # buffers and clients catch up on every batch that went through,
+            # even when another batch of the page failed
+            for room_id in {message.room_id for message in messages}:
+                await self._recent_cache.invalidate(room_id=room_id)
+            for room_id, message_ids in deleted_by_room.items():
+                await self._conn.broadcast_event(
+                    room_id=room_id,
+                    event_type=BroadcastEventType.MESSAGES_PURGED,
+                    event_payload=EventPayload(
+                        payload={"message_ids": message_ids, "user_id": str(user_id)},
+                        timestamp=datetime.now(UTC).isoformat(),
+                    ),
+                )
+        return sum(map(len, deleted_by_room.values()))
@@ -10,9 +10,11 @@ from app.domain.exceptions.notification import (
     NotificationPermissionError,
 )
 from app.domain.ports.transaction_manager import TransactionManager
+from app.domain.ports.username_cache import UsernameCachePort
 from app.domain.repos.notification import NotificationRepository
 from app.domain.repos.outbox import OutboxRepository
-from app.domain.services.utils import create_outbox_analytics_event
+from app.domain.repos.user import UserRepository
+from app.domain.services.utils import create_outbox_analytics_event, resolve_usernames
 
 logger = structlog.get_logger(__name__)
 
@@ -22,10 +24,14 @@ class NotificationService:
         self,
         notification_repo: NotificationRepository,
         outbox_repo: OutboxRepository,
+        user_repo: UserRepository,
+        username_cache: UsernameCachePort,
         transaction_manager: TransactionManager,
     ) -> None:
         self._notif_repo = notification_repo
         self._outbox_repo = outbox_repo
+        self._user_repo = user_repo
+        self._username_cache = username_cache
         self._tm = transaction_manager
 
     async def list_user_notifications(
@@ -37,7 +43,22 @@ class NotificationService:
         logger.bind(user_id=user_id, amount=len(notifications)).debug(
             "Fetched notifications"
         )
-        return [notification_to_dto(notification) for notification in notifications]
+        usernames = await resolve_usernames(
+            user_repo=self._user_repo,
+            username_cache=self._username_cache,
+            user_ids={n.source_id for n in notifications if n.source_id is not None},
+        )
+        return [
+            notification_to_dto(
+                notification=notification,
+                source_username=(
+                    usernames.get(notification.source_id)
+                    if notification.source_id
+                    else None
+                ),
+            )
+            for notification in notifications
+        ]
 
     async def mark_as_read(self, notification_id: UUID, user_id: UUID) -> None:
         notification = await self._notif_repo.get_by_id(notification_id=notification_id)
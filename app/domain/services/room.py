@@ -39,14 +39,17 @@ from app.domain.exceptions.room import (
 from app.domain.exceptions.user import UserNotFound
 from app.domain.ports.connection import ConnectionPort
 from app.domain.ports.transaction_manager import TransactionManager
+from app.domain.ports.username_cache import UsernameCachePort
 from app.domain.repos.join_request import JoinRequestRepository
 from app.domain.repos.outbox import OutboxRepository
 from app.domain.repos.room import RoomRepository
 from app.domain.repos.room_membership import RoomMembershipRepository
+from app.domain.repos.room_reclaim import RoomReclaimRepository
 from app.domain.repos.user import UserRepository
 from app.domain.services.utils import (
     create_outbox_analytics_event,
     create_outbox_notification_event,
+    resolve_usernames,
 )
 
 logger = structlog.get_logger(__name__)
@@ -61,6 +64,8 @@ class RoomService:
         room_membership_repo: RoomMembershipRepository,
         outbox_repo: OutboxRepository,
         connection_port: ConnectionPort,
+        username_cache: UsernameCachePort,
+        room_reclaim_repo: RoomReclaimRepository,
         transaction_manager: TransactionManager,
     ):
         self._room_repo = room_repo
@@ -69,6 +74,8 @@ class RoomService:
         self._membership_repo = room_membership_repo
         self._outbox_repo = outbox_repo
         self._conn = connection_port
+        self._username_cache = username_cache
+        self._reclaim_repo = room_reclaim_repo
         self._tm = transaction_manager
 
     async def _check_permissions(self, user_id: UUID, room_id: UUID) -> Room:
@@ -94,6 +101,7 @@ class RoomService:
                 description=room_data.description,
                 is_public=room_data.is_public,
                 created_by=room_data.created_by,
+                retention_days=room_data.retention_days,
             )
             room = await self._room_repo.save(room=room, db_session=db_session)
             await self._add_participant(
@@ -135,6 +143,11 @@ class RoomService:
         if room_data.is_public is not None and room.is_public != room_data.is_public:
             room.is_public = room_data.is_public
             changed = True
+        if room_data.retention_days is not None:
+            retention_days = room_data.retention_days or None
+            if room.retention_days != retention_days:
+                room.retention_days = retention_days
+                changed = True
         if not changed:
             raise NoChangesDetected
 
@@ -165,6 +178,7 @@ class RoomService:
             await self._membership_repo.delete_by_room(
                 room_id=room_id, db_session=db_session
             )
+            await self._reclaim_repo.enqueue(room_id=room_id, db_session=db_session)
 
             await create_outbox_analytics_event(
                 outbox_repo=self._outbox_repo,
@@ -211,26 +225,46 @@ class RoomService:
     async def list_room_join_requests(
         self, room_id: UUID, created_by: UUID
     ) -> list[JoinRequestPublicDTO]:
-        await self._check_permissions(user_id=created_by, room_id=room_id)
+        room = await self._check_permissions(user_id=created_by, room_id=room_id)
 
         join_requests = await self._join_repo.list_by_room(room_id=room_id)
+        usernames = await resolve_usernames(
+            user_repo=self._user_repo,
+            username_cache=self._username_cache,
+            user_ids={join_request.user_id for join_request in join_requests},
+        )
         return [
             join_request_to_dto(
-                join_request=join_request, room_name=room.name, username=user.username
+                join_request=join_request,
+                room_name=room.name,
+                username=usernames[join_request.user_id],
             )
-            for join_request, user, room in join_requests
+            for join_request in join_requests
+            if join_request.user_id in usernames
         ]
 
     async def list_user_join_requests(
         self, user_id: UUID
     ) -> list[JoinRequestPublicDTO]:
         join_requests = await self._join_repo.list_by_user(user_id=user_id)
+        if not join_requests:
+            return []
+
+        usernames = await resolve_usernames(
+            user_repo=self._user_repo,
+            username_cache=self._username_cache,
+            user_ids={user_id},
+        )
+        if user_id not in usernames:
+            return []
 
         return [
             join_request_to_dto(
-                join_request=join_request, room_name=room.name, username=user.username
+                join_request=join_request,
+                room_name=room.name,
+                username=usernames[user_id],
             )
-            for join_request, user, room in join_requests
+            for join_request, room in join_requests
         ]
 
     async def search_rooms(self, query: str, limit: int) -> list[RoomPublicDTO]:
@@ -480,6 +514,7 @@ class RoomService:
                 await self._membership_repo.delete_by_room(
                     room_id=room_id, db_session=db_session
                 )
+                await self._reclaim_repo.enqueue(room_id=room_id, db_session=db_session)
                 logger.bind(room_id=room_id, user_id=user_id).debug(
                     "Room was deleted as creator left"
                 )
@@ -1,39 +1,65 @@
+import base64
+import hashlib
+import hmac
+from collections.abc import Collection
 from typing import Any
 from uuid import UUID
 
+import orjson
+
 from app.core.constants import (
     AnalyticsEventType,
     NotificationType,
     OutboxMessageType,
     OutboxStatus,
 )
+from app.core.settings import get_settings
 from app.domain.entities.analytics_event import AnalyticsEvent
 from app.domain.entities.notification import Notification
 from app.domain.entities.outbox import Outbox
+from app.domain.exceptions.message import InvalidCursor
+from app.domain.ports.username_cache import UsernameCachePort
 from app.domain.repos.outbox import OutboxRepository
+from app.domain.repos.user import UserRepository
 
 
-async def create_outbox_analytics_event(
-    outbox_repo: OutboxRepository,
+def build_outbox_analytics_event(
     event_type: AnalyticsEventType,
     user_id: UUID | None = None,
     room_id: UUID | None = None,
     payload: dict[str, str] | None = None,
     dedup_key: str | None = None,
-    db_session: Any | None = None,
-) -> None:
+) -> Outbox:
     analytics = AnalyticsEvent(
         event_type=event_type,
         user_id=user_id,
         room_id=room_id,
         payload=payload,
     )
-    outbox = Outbox(
+    return Outbox(
         type=OutboxMessageType.ANALYTICS,
         status=OutboxStatus.PENDING,
         payload=analytics.to_payload(),
         dedup_key=dedup_key,
     )
+
+
+async def create_outbox_analytics_event(
+    outbox_repo: OutboxRepository,
+    event_type: AnalyticsEventType,
+    user_id: UUID | None = None,
+    room_id: UUID | None = None,
+    payload: dict[str, str] | None = None,
+    dedup_key: str | None = None,
+    db_session: Any | None = None,
+) -> None:
+    outbox = build_outbox_analytics_event(
+        event_type=event_type,
+        user_id=user_id,
+        room_id=room_id,
+        payload=payload,
+        dedup_key=dedup_key,
+    )
     await outbox_repo.save(outbox=outbox, db_session=db_session)
 
 
@@ -59,3 +85,57 @@ async def create_outbox_notification_event(
         dedup_key=dedup_key,
     )
     await outbox_repo.save(outbox=outbox, db_session=db_session)
+
+
+async def resolve_usernames(
+    user_repo: UserRepository,
+    username_cache: UsernameCachePort,
+    user_ids: Collection[UUID],
+) -> dict[UUID, str]:
+    usernames = await username_cache.get_many(user_ids=user_ids)
+    missing = set(user_ids) - usernames.keys()
+    if missing:
+        users = await user_repo.get_by_ids(user_ids=missing)
+        fetched = {user.id: user.username for user in users}
+        await username_cache.set_many(usernames=fetched)
+        usernames.update(fetched)
+    return usernames
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _cursor_signature(body: str) -> str:
+    digest = hmac.new(
+        get_settings().cursor_secret_key.encode("utf-8"),
+        body.encode("ascii"),
+        hashlib.sha256,
+    ).digest()
+    return _b64encode(digest[:16])
+
+
+def encode_cursor(values: dict[str, Any]) -> str:
+    body = _b64encode(orjson.dumps(values))
+    return f"{body}.{_cursor_signature(body)}"
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    body, _, signature = cursor.partition(".")
+    try:
+        # both sides are compared as bytes, a non-ascii cursor fails the encode
+        if not body or not hmac.compare_digest(
+            signature.encode("ascii"), _cursor_signature(body).encode("ascii")
+        ):
+            raise InvalidCursor
+        values = orjson.loads(_b64decode(body))
+    except (ValueError, orjson.JSONDecodeError):
+        raise InvalidCursor from None
+
+    if not isinstance(values, dict):
+        raise InvalidCursor
+    return values
@@ -0,0 +1,97 @@
+import asyncio
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+from pytest_asyncio import fixture
+
+from app.adapters.analytics.cache import AnalyticsResultCache, CachedAnalyticsRepository
+from app.domain.ports.analytics import AnalyticsPort
+
+
+@fixture
+def cache():
+    return AnalyticsResultCache(max_size=2, stale_seconds=0.2, max_concurrency=4)
+
+
+class TestAnalyticsResultCache:
+    async def test_fresh_entry_is_served_from_cache(self, cache):
+        loader = AsyncMock(return_value=1)
+
+        assert await cache.get_or_load("key", 10, loader) == 1
+        assert await cache.get_or_load("key", 10, loader) == 1
+
+        loader.assert_awaited_once()
+
+    async def test_stale_entry_is_served_while_refreshing(self, cache):
+        loader = AsyncMock(side_effect=[1, 2])
+        await cache.get_or_load("key", 0.01, loader)
+        await asyncio.sleep(0.02)
+
+        assert await cache.get_or_load("key", 0.01, loader) == 1
+        await asyncio.sleep(0)
+        assert await cache.get_or_load("key", 10, loader) == 2
+        assert loader.await_count == 2
+
+    async def test_expired_entry_is_reloaded(self, cache):
+        loader = AsyncMock(side_effect=[1, 2])
+        await cache.get_or_load("key", 0.01, loader)
+        await asyncio.sleep(0.25)
+
+        assert await cache.get_or_load("key", 10, loader) == 2
+
+    async def test_concurrent_misses_share_one_load(self, cache):
+        release = asyncio.Event()
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "value"
+
+        waiters = [
+            asyncio.create_task(cache.get_or_load("key", 10, loader)) for _ in range(5)
+        ]
+        await asyncio.sleep(0.01)
+        release.set()
+
+        assert await asyncio.gather(*waiters) == ["value"] * 5
+        assert calls == 1
+
+    async def test_failed_load_is_not_cached(self, cache):
+        loader = AsyncMock(side_effect=[ConnectionError("clickhouse down"), 1])
+
+        with pytest.raises(ConnectionError, match="clickhouse down"):
+            await cache.get_or_load("key", 10, loader)
+        assert await cache.get_or_load("key", 10, loader) == 1
+
+    async def test_least_recently_used_entry_is_evicted(self, cache):
+        for key in ("a", "b", "c"):
+            await cache.get_or_load(key, 10, AsyncMock(return_value=key))
+        loader = AsyncMock(return_value="reloaded")
+
+        assert await cache.get_or_load("a", 10, loader) == "reloaded"
+        assert await cache.get_or_load("c", 10, loader) == "c"
+
+
+class TestCachedAnalyticsRepository:
+    async def test_only_methods_with_a_ttl_are_cached(self, cache):
+        analytics = AsyncMock(spec=AnalyticsPort)
+        analytics.messages_per_minute.return_value = 3
+        analytics.message_edit_delete_ratio.return_value = {"edit": 0.5}
+        repo = CachedAnalyticsRepository(
+            analytics=analytics,
+            cache=cache,
+            ttl_seconds={"messages_per_minute": 10},
+        )
+        room_id = uuid4()
+
+        for _ in range(2):
+            await repo.messages_per_minute(room_id=room_id, since_minutes=5)
+            await repo.message_edit_delete_ratio()
+
+        analytics.messages_per_minute.assert_awaited_once_with(
+            room_id=room_id, since_minutes=5
+        )
+        assert analytics.message_edit_delete_ratio.await_count == 2
@@ -0,0 +1,93 @@
+import asyncio
+from unittest.mock import AsyncMock
+from uuid import uuid4
+
+import pytest
+from clickhouse_connect.driver.asyncclient import AsyncClient
+from pytest_asyncio import fixture
+
+from app.adapters.analytics.sink import COLUMN_NAMES, BufferedAnalyticsSink
+from app.core.constants import AnalyticsEventType
+from app.domain.entities.analytics_event import AnalyticsEvent
+
+
+def _event() -> AnalyticsEvent:
+    return AnalyticsEvent(
+        event_type=AnalyticsEventType.MESSAGE_SENT,
+        user_id=uuid4(),
+        payload={"message": "hi"},
+    )
+
+
+@fixture
+def client():
+    return AsyncMock(spec=AsyncClient)
+
+
+class TestBufferedAnalyticsSink:
+    async def test_full_batch_is_inserted_column_oriented(self, client):
+        sink = BufferedAnalyticsSink(client=client, max_batch_size=2)
+        await sink.start()
+        events = [_event() for _ in range(3)]
+
+        acks = [await sink.submit(event) for event in events]
+        async with asyncio.timeout(1):
+            await asyncio.gather(*acks[:2])
+
+        client.insert.assert_awaited_once()
+        args, kwargs = client.insert.await_args
+        assert args[0] == "analytics_events"
+        assert args[1][0] == [str(events[0].id), str(events[1].id)]
+        assert args[1][3] == [None, None]
+        assert kwargs == {"column_names": COLUMN_NAMES, "column_oriented": True}
+        assert not acks[2].done()
+
+        await sink.close()
+        assert acks[2].done()
+        assert client.insert.await_count == 2
+
+    async def test_partial_batch_is_inserted_once_old_enough(self, client):
+        sink = BufferedAnalyticsSink(
+            client=client, max_batch_size=100, max_age_seconds=0.05
+        )
+        await sink.start()
+
+        ack = await sink.submit(_event())
+        async with asyncio.timeout(1):
+            await ack
+
+        client.insert.assert_awaited_once()
+        await sink.close()
+
+    async def test_failed_insert_fails_the_batch(self, client):
+        client.insert.side_effect = ConnectionError("clickhouse down")
+        sink = BufferedAnalyticsSink(client=client, max_batch_size=2)
+
+        acks = [await sink.submit(_event()) for _ in range(2)]
+        await sink.flush()
+
+        for ack in acks:
+            with pytest.raises(ConnectionError, match="clickhouse down"):
+                await ack
+
+    async def test_submit_waits_while_buffer_is_full(self, client):
+        inserted = asyncio.Event()
+
+        async def insert(*_args, **_kwargs):
+            await inserted.wait()
+
+        client.insert.side_effect = insert
+        sink = BufferedAnalyticsSink(client=client, max_batch_size=2, max_buffer_size=2)
+        await sink.submit(_event())
+        await sink.submit(_event())
+        flush = asyncio.create_task(sink.flush())
+
+        blocked = asyncio.create_task(sink.submit(_event()))
+        await asyncio.sleep(0.01)
+        assert not blocked.done()
+
+        inserted.set()
+        await flush
+        async with asyncio.timeout(1):
+            await blocked
+        await sink.close()
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from pytest_asyncio import fixture
+
+from app.adapters.archive.local import LocalSegmentArchive
+from app.adapters.db.models.cassandra.message import (
+    ExpiringMessageModel,
+    MessageModel,
+)
+from app.adapters.db.repos.cassandra import message as message_module
+from app.adapters.db.repos.cassandra.message import CassandraMessageRepository
+from app.adapters.executor import BoundedExecutor
+from app.domain.entities.message import Message
+
+
+def _messages(room_id, count: int, oldest: datetime) -> list[Message]:
+    return [
+        Message(
+            room_id=room_id,
+            user_id=uuid4(),
+            content=f"msg {i}",
+            created_at=oldest + timedelta(days=i),
+        )
+        for i in range(count)
+    ]
+
+
+@fixture
+def executor():
+    executor = BoundedExecutor(
+        name="repo-test", max_workers=2, max_queue=16, queue_timeout=5
+    )
+    yield executor
+    executor.shutdown()
+
+
+class TestIterByRoom:
+    async def test_streams_archived_prefix_before_partition(
+        self, executor, tmp_path, monkeypatch: pytest.MonkeyPatch
+    ):
+        room_id = uuid4()
+        messages = _messages(room_id, 12, datetime(2025, 1, 30))
+        archive = LocalSegmentArchive(root=tmp_path, executor=executor)
+        await archive.archive(room_id=room_id, messages=messages[:7])
+        # the last archived row has not been deleted from the partition yet
+        partition = messages[6:]
+
+        def _page(model, room_id, until, after, limit):
+            rows = [
+                m
+                for m in (partition if model is MessageModel else [])
+                if m.room_id == room_id
+                and m.created_at <= until
+                and (after is None or m.created_at > after)
+            ]
+            return rows[:limit]
+
+        monkeypatch.setattr(message_module, "_page_room_oldest_first", _page)
+        repo = CassandraMessageRepository(executor=executor, archive=archive)
+
+        pages = [
+            page
+            async for page in repo.iter_by_room(
+                room_id=room_id, until=messages[-1].created_at, page_size=3
+            )
+        ]
+
+        assert [m.id for page in pages for m in page] == [m.id for m in messages]
+        assert all(len(page) <= 3 for page in pages)
+
+
+class TestGetRecentByRoom:
+    async def test_retention_room_continues_into_rows_of_earlier_policy(
+        self, executor, monkeypatch: pytest.MonkeyPatch
+    ):
+        room_id = uuid4()
+        messages = _messages(room_id, 6, datetime(2025, 1, 1))
+        # retention was switched on after the first four messages
+        tables = {MessageModel: messages[:4], ExpiringMessageModel: messages[4:]}
+
+        def _page(model, room_id, before, limit):
+            rows = sorted(tables[model], key=lambda m: m.created_at, reverse=True)
+            return [
+                m
+                for m in rows
+                if m.room_id == room_id and (before is None or m.created_at < before)
+            ][:limit]
+
+        monkeypatch.setattr(message_module, "_page_room", _page)
+        repo = CassandraMessageRepository(executor=executor)
+
+        first = await repo.get_recent_by_room(
+            room_id=room_id, limit=3, before=None, expiring=True
+        )
+        rest = await repo.get_recent_by_room(
+            room_id=room_id,
+            limit=5,
+            before=None,
+            start_after=(first[-1].created_at, first[-1].id),
+            expiring=True,
+        )
+
+        assert [m.id for m in first + rest] == [m.id for m in reversed(messages)]
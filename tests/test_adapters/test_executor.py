@@ -0,0 +1,75 @@
+import asyncio
+import threading
+
+import pytest
+from pytest_asyncio import fixture
+
+from app.adapters.executor import BoundedExecutor
+from app.core.metrics import get_metrics
+from app.domain.exceptions.storage import StorageOverloaded
+
+
+def _rejected(executor: str, reason: str) -> float:
+    return (
+        get_metrics()
+        .counter("storage_executor_rejected_total", "")
+        .value(executor=executor, reason=reason)
+    )
+
+
+@fixture
+def blocker():
+    release = threading.Event()
+    yield release
+    release.set()
+
+
+class TestBoundedExecutor:
+    async def test_rejects_calls_past_queue(self, blocker):
+        executor = BoundedExecutor(
+            name="reject-test", max_workers=1, max_queue=0, queue_timeout=5
+        )
+        running = asyncio.create_task(executor.run(blocker.wait))
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(StorageOverloaded):
+            await executor.run(lambda: None)
+
+        blocker.set()
+        await running
+        executor.shutdown()
+        assert _rejected("reject-test", "queue_full") == 1
+
+    async def test_queued_call_times_out_without_waiting_for_a_thread(self, blocker):
+        executor = BoundedExecutor(
+            name="timeout-test", max_workers=1, max_queue=1, queue_timeout=0.05
+        )
+        ran = threading.Event()
+        running = asyncio.create_task(executor.run(blocker.wait))
+        await asyncio.sleep(0.01)
+
+        async with asyncio.timeout(1):
+            with pytest.raises(StorageOverloaded):
+                await executor.run(ran.set)
+
+        blocker.set()
+        await running
+        executor.shutdown()
+        assert not ran.is_set()
+        assert _rejected("timeout-test", "queue_timeout") == 1
+
+    async def test_slots_are_released_after_calls_finish(self, blocker):
+        executor = BoundedExecutor(
+            name="release-test", max_workers=1, max_queue=1, queue_timeout=0.05
+        )
+        running = asyncio.create_task(executor.run(blocker.wait))
+        await asyncio.sleep(0.01)
+        with pytest.raises(StorageOverloaded):
+            await executor.run(lambda: None)
+        blocker.set()
+        await running
+
+        # both slots are free again, one for a running call and one queued
+        results = await asyncio.gather(executor.run(lambda: 1), executor.run(lambda: 2))
+        executor.shutdown()
+        assert results == [1, 2]
@@ -0,0 +1,75 @@
+import asyncio
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from pytest_asyncio import fixture
+
+from app.adapters.archive.local import LocalSegmentArchive
+from app.adapters.executor import BoundedExecutor
+from app.domain.entities.message import Message
+
+
+def _messages(room_id, user_ids, count: int) -> list[Message]:
+    oldest = datetime(2025, 1, 1)
+    return [
+        Message(
+            room_id=room_id,
+            user_id=user_ids[i % len(user_ids)],
+            content=f"msg {i}",
+            created_at=oldest + timedelta(minutes=i),
+        )
+        for i in range(count)
+    ]
+
+
+@fixture
+def archive(tmp_path):
+    executor = BoundedExecutor(
+        name="archive-test", max_workers=4, max_queue=64, queue_timeout=5
+    )
+    yield LocalSegmentArchive(root=tmp_path, executor=executor)
+    executor.shutdown()
+
+
+class TestLocalSegmentArchive:
+    async def test_concurrent_deletes_of_one_segment_all_apply(self, archive, tmp_path):
+        room_id = uuid4()
+        messages = _messages(room_id, [uuid4()], 40)
+        await archive.archive(room_id=room_id, messages=messages)
+
+        await asyncio.gather(
+            *(
+                archive.delete_messages(room_id=room_id, messages=messages[i : i + 5])
+                for i in range(0, 30, 5)
+            )
+        )
+
+        left = await archive.get_recent(room_id=room_id, limit=100, before=None)
+        assert {m.id for m in left} == {m.id for m in messages[30:]}
+        assert not list(tmp_path.rglob("*.tmp"))
+
+    async def test_delete_user_messages(self, archive):
+        room_id = uuid4()
+        purged, kept = uuid4(), uuid4()
+        await archive.archive(
+            room_id=room_id, messages=_messages(room_id, [purged, kept], 10)
+        )
+
+        await archive.delete_user_messages(room_id=room_id, user_id=purged)
+
+        left = await archive.get_recent(room_id=room_id, limit=100, before=None)
+        assert len(left) == 5
+        assert {m.user_id for m in left} == {kept}
+
+    async def test_archiving_an_edited_message_replaces_it(self, archive):
+        room_id = uuid4()
+        messages = _messages(room_id, [uuid4()], 3)
+        await archive.archive(room_id=room_id, messages=messages)
+
+        edited = messages[1]
+        edited.content, edited.edited = "edited", True
+        await archive.archive(room_id=room_id, messages=[edited])
+
+        left = await archive.get_recent(room_id=room_id, limit=100, before=None)
+        assert [m.content for m in left] == ["msg 2", "edited", "msg 0"]
+        assert len(left) == 3
@@ -149,6 +149,7 @@ def override_settings(
 ):
     test_settings = Settings(
         environment=Environment.TEST,
+        cursor_secret_key="test-cursor-secret",
         mongo_host=mongo_container["host"],
         mongo_port=mongo_container["port"],
         mongo_initdb_root_username=mongo_container["username"],
@@ -0,0 +1,56 @@
+from unittest.mock import AsyncMock
+
+from pytest_asyncio import fixture
+
+from app.domain.ports.analytics import AnalyticsSinkPort
+from app.domain.ports.message_archive import MessageArchivePort
+from app.domain.ports.notification_sender import NotificationSenderPort
+from app.domain.repos.job_checkpoint import JobCheckpointRepository
+from app.domain.repos.message import MessageRepository
+from app.domain.repos.notification import NotificationRepository
+from app.domain.repos.outbox import OutboxRepository
+from app.domain.repos.room import RoomRepository
+
+
+@fixture
+def message_repo():
+    return AsyncMock(spec=MessageRepository)
+
+
+@fixture
+def outbox_repo():
+    repo = AsyncMock(spec=OutboxRepository)
+    repo.exists_by_dedup_keys.return_value = []
+    return repo
+
+
+@fixture
+def checkpoint_repo():
+    repo = AsyncMock(spec=JobCheckpointRepository)
+    repo.get.return_value = None
+    return repo
+
+
+@fixture
+def room_repo():
+    return AsyncMock(spec=RoomRepository)
+
+
+@fixture
+def archive():
+    return AsyncMock(spec=MessageArchivePort)
+
+
+@fixture
+def notif_repo():
+    return AsyncMock(spec=NotificationRepository)
+
+
+@fixture
+def notification_sender():
+    return AsyncMock(spec=NotificationSenderPort)
+
+
+@fixture
+def analytics_sink():
+    return AsyncMock(spec=AnalyticsSinkPort)
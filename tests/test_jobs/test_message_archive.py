@@ -0,0 +1,117 @@
+import asyncio
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import pytest
+from pytest_asyncio import fixture
+
+from app.adapters.jobs.message_archive import MessageArchiveJob
+from app.domain.entities.job_checkpoint import JobCheckpoint
+from app.domain.entities.message import Message
+from app.domain.entities.room import Room
+
+
+def _room(retention_days: int | None = None) -> Room:
+    return Room(
+        name="room", is_public=True, created_by=uuid4(), retention_days=retention_days
+    )
+
+
+def _messages(room: Room, count: int, oldest: datetime) -> list[Message]:
+    return [
+        Message(
+            room_id=room.id,
+            user_id=uuid4(),
+            content="hi",
+            created_at=oldest + timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+
+
+class TestMessageArchiveJob:
+    @fixture
+    def job(self, message_repo, room_repo, archive, checkpoint_repo):
+        return MessageArchiveJob(
+            message_repo=message_repo,
+            room_repo=room_repo,
+            archive=archive,
+            checkpoint_repo=checkpoint_repo,
+            page_size=2,
+            flush_rows=10,
+        )
+
+    async def test_stop_ends_run_after_current_page(
+        self, job, message_repo, room_repo, archive, checkpoint_repo
+    ):
+        room = _room()
+        page = _messages(room, 2, datetime(2025, 1, 1))
+        stop = asyncio.Event()
+
+        async def _page(**_kwargs):
+            stop.set()
+            return page
+
+        message_repo.get_oldest_all_rooms.side_effect = _page
+        room_repo.get_by_ids.return_value = [room]
+
+        await job.run_once(stop)
+
+        message_repo.get_oldest_all_rooms.assert_awaited_once()
+        archive.archive.assert_awaited_once_with(room_id=room.id, messages=page)
+        assert checkpoint_repo.save.await_args.args[0].watermark == page[-1].created_at
+
+    async def test_archives_pages_in_one_flush_and_skips_retention_rooms(
+        self, job, message_repo, room_repo, archive, checkpoint_repo
+    ):
+        kept, expiring = _room(), _room(retention_days=30)
+        oldest = datetime(2025, 1, 1)
+        first = [*_messages(kept, 1, oldest), *_messages(expiring, 1, oldest)]
+        second = _messages(kept, 1, oldest + timedelta(minutes=1))
+        message_repo.get_oldest_all_rooms.side_effect = [first, second]
+        room_repo.get_by_ids.return_value = [kept, expiring]
+
+        await job.run_once()
+
+        archive.archive.assert_awaited_once_with(
+            room_id=kept.id, messages=[first[0], second[0]]
+        )
+        message_repo.delete_archived.assert_awaited_once_with(
+            messages=[first[0], second[0]]
+        )
+        assert message_repo.get_oldest_all_rooms.await_args_list[1].kwargs[
+            "start_after"
+        ] == (first[1].created_at, first[1].id)
+        checkpoint = checkpoint_repo.save.await_args.args[0]
+        assert checkpoint.watermark == second[0].created_at
+        assert checkpoint.scanned_rows == len(first) + len(second)
+
+    async def test_resumes_after_watermark(self, job, message_repo, checkpoint_repo):
+        watermark = datetime(2025, 1, 1)
+        checkpoint_repo.get.return_value = JobCheckpoint(
+            name=MessageArchiveJob.checkpoint_name, watermark=watermark
+        )
+        message_repo.get_oldest_all_rooms.return_value = []
+
+        await job.run_once()
+
+        assert message_repo.get_oldest_all_rooms.await_args.kwargs["since"] == (
+            watermark
+        )
+        checkpoint_repo.save.assert_not_awaited()
+
+    async def test_failed_archive_keeps_rows_and_watermark(
+        self, job, message_repo, room_repo, archive, checkpoint_repo
+    ):
+        room = _room()
+        message_repo.get_oldest_all_rooms.return_value = _messages(
+            room, 1, datetime(2025, 1, 1)
+        )
+        room_repo.get_by_ids.return_value = [room]
+        archive.archive.side_effect = OSError("disk full")
+
+        with pytest.raises(OSError, match="disk full"):
+            await job.run_once()
+
+        message_repo.delete_archived.assert_not_awaited()
+        checkpoint_repo.save.assert_not_awaited()
@@ -0,0 +1,199 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+from pytest_asyncio import fixture
+
+from app.adapters.jobs.outbox_dispatcher import OutboxDispatcher, OutboxLane
+from app.core.constants import (
+    AnalyticsEventType,
+    NotificationType,
+    OutboxMessageType,
+    OutboxStatus,
+)
+from app.domain.entities.outbox import Outbox
+
+
+def _notification(retries: int = 0) -> Outbox:
+    return Outbox(
+        type=OutboxMessageType.NOTIFICATION,
+        status=OutboxStatus.IN_PROGRESS,
+        payload={
+            "id": str(uuid4()),
+            "user_id": str(uuid4()),
+            "type": NotificationType.JOIN_REQUEST_CREATED.value,
+        },
+        retries=retries,
+    )
+
+
+def _analytics() -> Outbox:
+    return Outbox(
+        type=OutboxMessageType.ANALYTICS,
+        status=OutboxStatus.IN_PROGRESS,
+        payload={
+            "id": str(uuid4()),
+            "event_type": AnalyticsEventType.MESSAGE_SENT.value,
+        },
+    )
+
+
+def _lanes() -> list[OutboxLane]:
+    return [
+        OutboxLane(
+            type=OutboxMessageType.NOTIFICATION,
+            weight=3,
+            concurrency=100,
+            poll_interval=0.01,
+        ),
+        OutboxLane(
+            type=OutboxMessageType.ANALYTICS,
+            weight=1,
+            concurrency=100,
+            poll_interval=0.01,
+        ),
+    ]
+
+
+class TestOutboxDispatcher:
+    @fixture
+    def dispatcher(self, outbox_repo, notif_repo, notification_sender, analytics_sink):
+        return OutboxDispatcher(
+            outbox_repo=outbox_repo,
+            notification_repo=notif_repo,
+            notification_sender=notification_sender,
+            analytics_sink=analytics_sink,
+            retry_backoff_seconds=2.0,
+            retry_backoff_max_seconds=60.0,
+        )
+
+    async def test_failed_delivery_backs_off_exponentially(
+        self, dispatcher, notification_sender
+    ):
+        notification_sender.send.side_effect = ConnectionError("redis down")
+
+        first = await dispatcher.dispatch(_notification(retries=0))
+        later = await dispatcher.dispatch(_notification(retries=3))
+
+        now = datetime.now(UTC)
+        assert first.status == OutboxStatus.PENDING
+        assert now < first.next_attempt_at <= now + timedelta(seconds=2)
+        assert now + timedelta(seconds=7) < later.next_attempt_at
+        assert later.next_attempt_at <= now + timedelta(seconds=16)
+
+    async def test_backoff_is_capped(self, dispatcher, notification_sender):
+        notification_sender.send.side_effect = ConnectionError("redis down")
+        outbox = _notification(retries=10)
+        outbox.max_retries = 20
+
+        outcome = await dispatcher.dispatch(outbox)
+
+        assert outcome.next_attempt_at <= datetime.now(UTC) + timedelta(seconds=60)
+
+    async def test_last_retry_fails_permanently(self, dispatcher, notification_sender):
+        notification_sender.send.side_effect = ConnectionError("redis down")
+
+        outcome = await dispatcher.dispatch(_notification(retries=4))
+
+        assert outcome.status == OutboxStatus.FAILED
+        assert outcome.next_attempt_at is None
+
+
+class TestOutboxLanes:
+    @fixture
+    def dispatcher(self, outbox_repo, notif_repo, notification_sender, analytics_sink):
+        outbox_repo.oldest_pending_created_at.return_value = None
+        return OutboxDispatcher(
+            outbox_repo=outbox_repo,
+            notification_repo=notif_repo,
+            notification_sender=notification_sender,
+            analytics_sink=analytics_sink,
+            lanes=_lanes(),
+            max_in_flight=40,
+            batch_size=10,
+            poll_interval=0.01,
+            flush_interval=0.01,
+        )
+
+    async def test_capacity_is_shared_by_weight(self, dispatcher):
+        shares = {state.lane.type: state.share for state in dispatcher._lanes.values()}
+
+        assert shares == {
+            OutboxMessageType.NOTIFICATION: 30,
+            OutboxMessageType.ANALYTICS: 10,
+        }
+
+    async def test_analytics_backlog_does_not_hold_up_notifications(
+        self, dispatcher, outbox_repo, notification_sender, analytics_sink
+    ):
+        # analytics batches never become durable, so their items stay in flight
+        durable: list[asyncio.Future[None]] = []
+
+        async def submit(_event):
+            durable.append(asyncio.get_running_loop().create_future())
+            return durable[-1]
+
+        notifications = [_notification()]
+
+        async def claim_batch(limit, message_type, **_kwargs):
+            if message_type == OutboxMessageType.ANALYTICS:
+                return [_analytics() for _ in range(limit)]
+            await asyncio.sleep(0.05)
+            return [notifications.pop()] if notifications else []
+
+        analytics_sink.submit.side_effect = submit
+        outbox_repo.claim_batch.side_effect = claim_batch
+        stop = asyncio.Event()
+        run = asyncio.create_task(dispatcher.run(stop))
+
+        async with asyncio.timeout(1):
+            while not notification_sender.send.await_count:
+                await asyncio.sleep(0.01)
+        analytics = dispatcher._lanes[OutboxMessageType.ANALYTICS]
+
+        stop.set()
+        await asyncio.sleep(0.01)
+        for future in durable:
+            future.set_result(None)
+        await run
+
+        # the idle notification lane kept room for one claim batch
+        assert len(durable) <= 40 - 10
+        assert analytics.busy == 0
+
+    async def test_backlogged_lanes_progress_by_weight(
+        self, dispatcher, outbox_repo, notification_sender, analytics_sink
+    ):
+        delivered = dict.fromkeys(OutboxMessageType, 0)
+
+        async def send(_notification):
+            await asyncio.sleep(0.005)
+            delivered[OutboxMessageType.NOTIFICATION] += 1
+
+        async def submit(_event):
+            durable = asyncio.get_running_loop().create_future()
+            await asyncio.sleep(0.005)
+            durable.set_result(None)
+            delivered[OutboxMessageType.ANALYTICS] += 1
+            return durable
+
+        async def claim_batch(limit, message_type, **_kwargs):
+            if message_type == OutboxMessageType.ANALYTICS:
+                return [_analytics() for _ in range(limit)]
+            return [_notification() for _ in range(limit)]
+
+        notification_sender.send.side_effect = send
+        analytics_sink.submit.side_effect = submit
+        outbox_repo.claim_batch.side_effect = claim_batch
+        stop = asyncio.Event()
+        run = asyncio.create_task(dispatcher.run(stop))
+
+        await asyncio.sleep(0.3)
+        stop.set()
+        await run
+
+        ratio = (
+            delivered[OutboxMessageType.NOTIFICATION]
+            / delivered[OutboxMessageType.ANALYTICS]
+        )
+        assert 2 < ratio < 4
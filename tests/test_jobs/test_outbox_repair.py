@@ -0,0 +1,121 @@
+from datetime import UTC, datetime, timedelta
+from uuid import uuid4
+
+from pytest_asyncio import fixture
+
+from app.adapters.jobs.outbox_repair import OutboxRepairJob
+from app.domain.entities.job_checkpoint import JobCheckpoint
+from app.domain.entities.message import Message
+
+
+def _messages(count: int, newest: datetime) -> list[Message]:
+    return [
+        Message(
+            room_id=uuid4(),
+            user_id=uuid4(),
+            content="hi",
+            created_at=newest - timedelta(seconds=i),
+        )
+        for i in range(count)
+    ]
+
+
+class TestOutboxRepairJob:
+    @fixture
+    def job(self, message_repo, outbox_repo, checkpoint_repo) -> OutboxRepairJob:
+        return OutboxRepairJob(
+            message_repo=message_repo,
+            outbox_repo=outbox_repo,
+            checkpoint_repo=checkpoint_repo,
+            overlap_seconds=120,
+            batch_size=2,
+            delay_between_batches=0,
+        )
+
+    async def test_pages_through_range_and_advances_watermark(
+        self, job, message_repo, outbox_repo, checkpoint_repo
+    ):
+        messages = _messages(5, newest=datetime.now(UTC))
+        message_repo.get_oldest_all_rooms.side_effect = [
+            messages[0:2],
+            messages[2:4],
+            messages[4:5],
+        ]
+
+        await job.run_once()
+
+        calls = message_repo.get_oldest_all_rooms.await_args_list
+        assert [call.kwargs["start_after"] for call in calls] == [
+            None,
+            (messages[1].created_at, messages[1].id),
+            (messages[3].created_at, messages[3].id),
+        ]
+        assert outbox_repo.save_many.await_count == 3
+        checkpoint = checkpoint_repo.save.await_args.args[0]
+        assert checkpoint.watermark == calls[0].kwargs["before"]
+        assert checkpoint.scanned_rows == 5
+
+    async def test_resumes_from_watermark_with_overlap(
+        self, job, message_repo, checkpoint_repo
+    ):
+        watermark = datetime.now(UTC) - timedelta(minutes=10)
+        checkpoint_repo.get.return_value = JobCheckpoint(
+            name=OutboxRepairJob.checkpoint_name, watermark=watermark
+        )
+        message_repo.get_oldest_all_rooms.return_value = []
+
+        await job.run_once()
+
+        kwargs = message_repo.get_oldest_all_rooms.await_args.kwargs
+        assert kwargs["since"] == watermark - timedelta(seconds=120)
+        assert checkpoint_repo.save.await_args.args[0].watermark == kwargs["before"]
+
+    async def test_failed_page_keeps_watermark(
+        self, job, message_repo, checkpoint_repo
+    ):
+        message_repo.get_oldest_all_rooms.side_effect = [
+            _messages(2, newest=datetime.now(UTC)),
+            RuntimeError("cassandra unavailable"),
+        ]
+
+        await job.run_once()
+
+        checkpoint_repo.save.assert_not_awaited()
+
+    async def test_deadline_moves_watermark_to_last_scanned_row(
+        self, message_repo, outbox_repo, checkpoint_repo
+    ):
+        job = OutboxRepairJob(
+            message_repo=message_repo,
+            outbox_repo=outbox_repo,
+            checkpoint_repo=checkpoint_repo,
+            batch_size=2,
+            delay_between_batches=0.05,
+            max_run_seconds=0.01,
+        )
+        page = _messages(2, newest=datetime.now(UTC) - timedelta(minutes=1))
+        page.reverse()
+        message_repo.get_oldest_all_rooms.return_value = page
+
+        await job.run_once()
+
+        message_repo.get_oldest_all_rooms.assert_awaited_once()
+        checkpoint = checkpoint_repo.save.await_args.args[0]
+        assert checkpoint.watermark == page[-1].created_at
+        assert checkpoint.scanned_rows == 2
+
+    async def test_repairs_only_missing_sent_and_edited_events(
+        self, job, message_repo, outbox_repo
+    ):
+        plain, edited = _messages(2, newest=datetime.now(UTC))
+        edited.edited = True
+        message_repo.get_oldest_all_rooms.side_effect = [[plain, edited], []]
+        outbox_repo.exists_by_dedup_keys.return_value = [f"message_sent:{plain.id}"]
+
+        await job.run_once()
+
+        outboxes = outbox_repo.save_many.await_args_list[0].kwargs["outboxes"]
+        assert {outbox.dedup_key for outbox in outboxes} == {
+            f"message_sent:{edited.id}",
+            f"message_edited:{edited.id}",
+        }
@@ -0,0 +1,108 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+from app.adapters.jobs.runner import Job, JobRunner
+from app.adapters.jobs.schedule import IntervalSchedule
+from app.core.metrics import get_metrics
+
+
+def _runs(job: str, status: str) -> float:
+    return get_metrics().counter("job_runs_total", "").value(job=job, status=status)
+
+
+class TestJobRunner:
+    async def test_overlapping_run_is_skipped(self):
+        started = 0
+        release = asyncio.Event()
+
+        async def slow(_resources, _stop):
+            nonlocal started
+            started += 1
+            await release.wait()
+
+        job = Job(name="slow-job", func=slow, schedule=IntervalSchedule(0.01))
+        runner = JobRunner(resources=MagicMock(), jobs=[job])
+        stop = asyncio.Event()
+        run = asyncio.create_task(runner.run(stop))
+
+        await asyncio.sleep(0.1)
+        stop.set()
+        release.set()
+        await run
+
+        assert started == 1
+        assert _runs("slow-job", "overlapped") >= 1
+        assert _runs("slow-job", "succeeded") == 1
+
+    async def test_job_cancelled_after_grace_period(self):
+        cancelled = asyncio.Event()
+
+        async def stubborn(_resources, _stop):
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        job = Job(name="stubborn-job", func=stubborn)
+        runner = JobRunner(
+            resources=MagicMock(), jobs=[job], shutdown_grace_seconds=0.05
+        )
+        stop = asyncio.Event()
+        run = asyncio.create_task(runner.run(stop))
+
+        await asyncio.sleep(0.01)
+        stop.set()
+        async with asyncio.timeout(1):
+            await run
+
+        assert cancelled.is_set()
+        assert _runs("stubborn-job", "cancelled") == 1
+
+    async def test_job_finishing_within_grace_period_is_not_cancelled(self):
+        async def polite(_resources, stop):
+            await stop.wait()
+            await asyncio.sleep(0.01)
+
+        job = Job(name="polite-job", func=polite)
+        runner = JobRunner(resources=MagicMock(), jobs=[job], shutdown_grace_seconds=1)
+        stop = asyncio.Event()
+        run = asyncio.create_task(runner.run(stop))
+
+        await asyncio.sleep(0.01)
+        stop.set()
+        await run
+
+        assert _runs("polite-job", "succeeded") == 1
+        assert _runs("polite-job", "cancelled") == 0
+
+    async def test_lock_is_extended_while_job_runs(self):
+        lock = MagicMock()
+        lock.acquire = AsyncMock(return_value=True)
+        lock.extend = AsyncMock(return_value=True)
+        lock.release = AsyncMock()
+        resources = MagicMock()
+        resources.redis.lock.return_value = lock
+
+        async def long_run(_resources, _stop):
+            await asyncio.sleep(0.1)
+
+        job = Job(
+            name="locked-job",
+            func=long_run,
+            schedule=IntervalSchedule(0.01),
+            lock_key="locked-job-lock",
+            lock_timeout=0.03,
+        )
+        runner = JobRunner(resources=resources, jobs=[job])
+        stop = asyncio.Event()
+        run = asyncio.create_task(runner.run(stop))
+
+        await asyncio.sleep(0.02)
+        stop.set()
+        await run
+
+        assert lock.extend.await_count >= 2
+        lock.extend.assert_awaited_with(0.03, replace_ttl=True)
+        lock.release.assert_awaited_once()
+        assert _runs("locked-job", "succeeded") == 1
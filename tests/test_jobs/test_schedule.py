@@ -0,0 +1,60 @@
+from datetime import UTC, datetime
+
+import pytest
+
+from app.adapters.jobs.schedule import CronSchedule, IntervalSchedule
+
+# a thursday
+START = datetime(2026, 1, 1, 10, 7, 30, tzinfo=UTC)
+
+
+class TestCronSchedule:
+    @pytest.mark.parametrize(
+        ("expression", "expected"),
+        [
+            ("*/15 * * * *", datetime(2026, 1, 1, 10, 15, tzinfo=UTC)),
+            ("0 9-17/4 * * *", datetime(2026, 1, 1, 13, 0, tzinfo=UTC)),
+            ("30 9 * * 1", datetime(2026, 1, 5, 9, 30, tzinfo=UTC)),
+            ("0 0 13 * *", datetime(2026, 1, 13, 0, 0, tzinfo=UTC)),
+            ("0 0 * * 7", datetime(2026, 1, 4, 0, 0, tzinfo=UTC)),
+            ("0 0 1 3 *", datetime(2026, 3, 1, 0, 0, tzinfo=UTC)),
+        ],
+    )
+    def test_next_after(self, expression, expected):
+        assert CronSchedule(expression).next_after(START) == expected
+
+    def test_restricted_day_and_weekday_match_either(self):
+        schedule = CronSchedule("0 0 13 * 5")
+
+        runs = [START]
+        for _ in range(3):
+            runs.append(schedule.next_after(runs[-1]))
+
+        # fridays the 2nd and 9th, then tuesday the 13th
+        assert [run.day for run in runs[1:]] == [2, 9, 13]
+
+    def test_next_after_skips_current_minute(self):
+        moment = datetime(2026, 1, 1, 10, 15, tzinfo=UTC)
+
+        assert CronSchedule("*/15 * * * *").next_after(moment) == datetime(
+            2026, 1, 1, 10, 30, tzinfo=UTC
+        )
+
+    @pytest.mark.parametrize(
+        "expression", ["61 * * * *", "* * * *", "5-1 * * * *", "*/0 * * * *"]
+    )
+    def test_invalid_expression(self, expression):
+        with pytest.raises(ValueError, match="(?i)cron"):
+            CronSchedule(expression)
+
+    def test_never_matching_expression(self):
+        with pytest.raises(ValueError, match="never matches"):
+            CronSchedule("0 0 30 2 *").next_after(START)
+
+
+def test_interval_schedule():
+    assert IntervalSchedule(90).next_after(START) == datetime(
+        2026, 1, 1, 10, 9, tzinfo=UTC
+    )
+    with pytest.raises(ValueError, match="positive"):
+        IntervalSchedule(0)
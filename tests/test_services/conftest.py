@@ -2,18 +2,22 @@ from unittest.mock import AsyncMock
 
 from pytest_asyncio import fixture
 
-from app.domain.ports.analytics import AnalyticsPort
+from app.domain.ports.analytics import AnalyticsPort, RealtimeMetricsPort
 from app.domain.ports.cache import CachePort
 from app.domain.ports.connection import ConnectionPort
 from app.domain.ports.notification_sender import NotificationSenderPort
 from app.domain.ports.password_hasher import PasswordHasherPort
+from app.domain.ports.recent_messages_cache import RecentMessagesCachePort
+from app.domain.ports.room_retention_cache import RoomRetentionCachePort
 from app.domain.ports.transaction_manager import TransactionManager
+from app.domain.ports.username_cache import UsernameCachePort
 from app.domain.repos.join_request import JoinRequestRepository
 from app.domain.repos.message import MessageRepository
 from app.domain.repos.notification import NotificationRepository
 from app.domain.repos.outbox import OutboxRepository
 from app.domain.repos.room import RoomRepository
 from app.domain.repos.room_membership import RoomMembershipRepository
+from app.domain.repos.room_reclaim import RoomReclaimRepository
 from app.domain.repos.user import UserRepository
 from app.domain.repos.user_session import UserSessionRepository
 from app.domain.repos.websocket_session import WebSocketSessionRepository
@@ -24,6 +28,11 @@ def room_repo():
     return AsyncMock(spec=RoomRepository)
 
 
+@fixture
+def reclaim_repo():
+    return AsyncMock(spec=RoomReclaimRepository)
+
+
 @fixture
 def ws_session_repo():
     return AsyncMock(spec=WebSocketSessionRepository)
@@ -69,6 +78,11 @@ def analytics_port():
     return AsyncMock(spec=AnalyticsPort)
 
 
+@fixture
+def realtime_metrics():
+    return AsyncMock(spec=RealtimeMetricsPort)
+
+
 @fixture
 def notification_port():
     return AsyncMock(spec=NotificationSenderPort)
@@ -84,6 +98,28 @@ def cache_port():
     return AsyncMock(spec=CachePort)
 
 
+@fixture
+def recent_messages_cache():
+    cache = AsyncMock(spec=RecentMessagesCachePort)
+    cache.get_recent.return_value = None
+    cache.get_generation.return_value = 0
+    return cache
+
+
+@fixture
+def username_cache():
+    cache = AsyncMock(spec=UsernameCachePort)
+    cache.get_many.return_value = {}
+    return cache
+
+
+@fixture
+def room_retention_cache():
+    cache = AsyncMock(spec=RoomRetentionCachePort)
+    cache.get.return_value = None
+    return cache
+
+
 @fixture
 def password_hasher():
     hasher = AsyncMock(spec=PasswordHasherPort)
@@ -0,0 +1,121 @@
+from datetime import date, datetime
+from uuid import uuid4
+
+import pytest
+from pytest_asyncio import fixture
+
+from app.core.constants import Accuracy, AnalyticsEventType, TimeBucket
+from app.domain.exceptions.analytics import InvalidTimeRange, UnsupportedAccuracy
+from app.domain.services.analytics import AnalyticsService
+
+
+class TestAnalyticsService:
+    @fixture
+    def service(self, analytics_port, realtime_metrics) -> AnalyticsService:
+        return AnalyticsService(
+            analytics_port=analytics_port, realtime_metrics=realtime_metrics
+        )
+
+    async def test_room_activity_fills_missing_buckets(self, service, analytics_port):
+        room_id = uuid4()
+        analytics_port.get_room_activity.return_value = [
+            (datetime(2025, 1, 1, 10), 3),
+            (datetime(2025, 1, 1, 12), 5),
+        ]
+
+        result = await service.room_activity(
+            room_id=room_id,
+            start=datetime(2025, 1, 1, 10, 30),
+            end=datetime(2025, 1, 1, 13, 15),
+            bucket=TimeBucket.HOUR,
+        )
+
+        assert result.start == datetime(2025, 1, 1, 10)
+        assert result.counts == [3, 0, 5, 0]
+        analytics_port.get_room_activity.assert_awaited_once_with(
+            room_id=room_id,
+            start=datetime(2025, 1, 1, 10),
+            end=datetime(2025, 1, 1, 13, 15),
+            bucket=TimeBucket.HOUR,
+        )
+
+    @pytest.mark.parametrize(
+        ("start", "end", "bucket"),
+        [
+            (datetime(2025, 1, 2), datetime(2025, 1, 1), TimeBucket.DAY),
+            (datetime(2025, 1, 1), datetime(2025, 2, 1), TimeBucket.MINUTE),
+        ],
+    )
+    async def test_room_activity_invalid_range(
+        self, service, analytics_port, start, end, bucket
+    ):
+        with pytest.raises(InvalidTimeRange):
+            await service.room_activity(
+                room_id=uuid4(), start=start, end=end, bucket=bucket
+            )
+        analytics_port.get_room_activity.assert_not_awaited()
+
+    async def test_retention_cohorts_builds_matrix(self, service, analytics_port):
+        analytics_port.get_cohort_sizes.return_value = {
+            date(2025, 1, 2): 4,
+            date(2025, 1, 1): 10,
+        }
+        analytics_port.get_cohort_activity.return_value = [
+            (date(2025, 1, 1), 0, 10),
+            (date(2025, 1, 1), 2, 3),
+            (date(2025, 1, 2), 1, 2),
+        ]
+
+        result = await service.retention_cohorts(
+            start=date(2025, 1, 1), end=date(2025, 1, 3)
+        )
+
+        assert [cohort.cohort_day for cohort in result.cohorts] == [
+            date(2025, 1, 1),
+            date(2025, 1, 2),
+        ]
+        assert result.cohorts[0].users == 10
+        assert result.cohorts[0].retained == [10, 0, 3]
+        assert result.cohorts[1].retained == [0, 2]
+
+    async def test_retention_cohorts_invalid_range(self, service, analytics_port):
+        with pytest.raises(InvalidTimeRange):
+            await service.retention_cohorts(
+                start=date(2025, 1, 2), end=date(2025, 1, 1)
+            )
+        analytics_port.get_cohort_sizes.assert_not_awaited()
+
+    async def test_rollup_rejects_sampled_accuracy(self, service, analytics_port):
+        with pytest.raises(UnsupportedAccuracy):
+            await service.room_stats(room_id=uuid4(), accuracy=Accuracy.SAMPLED)
+        analytics_port.get_room_stats.assert_not_awaited()
+
+    async def test_retention_passes_accuracy(self, service, analytics_port):
+        analytics_port.get_user_retention.return_value = 42.0
+
+        result = await service.user_retention(days=7, accuracy=Accuracy.SAMPLED)
+
+        assert result == 42.0
+        analytics_port.get_user_retention.assert_awaited_once_with(
+            days=7, accuracy=Accuracy.SAMPLED
+        )
+        assert service.accuracy_bounds(Accuracy.SAMPLED).relative_error is None
+        assert service.accuracy_bounds(Accuracy.EXACT).relative_error == 0.0
+
+    async def test_realtime_event_counts(self, service, realtime_metrics):
+        room_id = uuid4()
+        realtime_metrics.event_counts.return_value = [1, 0, 4]
+
+        result = await service.realtime_event_counts(
+            event_type=AnalyticsEventType.MESSAGE_SENT, minutes=3, room_id=room_id
+        )
+
+        assert result == [1, 0, 4]
+        realtime_metrics.event_counts.assert_awaited_once_with(
+            event_type=AnalyticsEventType.MESSAGE_SENT, minutes=3, room_id=room_id
+        )
+
+    async def test_realtime_window_too_wide(self, service, realtime_metrics):
+        with pytest.raises(InvalidTimeRange):
+            await service.realtime_active_users(minutes=24 * 60)
+        realtime_metrics.active_users.assert_not_awaited()
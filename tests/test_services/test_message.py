@@ -1,25 +1,48 @@
-from datetime import UTC, datetime
-from unittest.mock import AsyncMock
+from datetime import UTC, datetime, timedelta
 from uuid import uuid4
 
 import pytest
 
 from app.core.constants import BroadcastEventType
+from app.core.settings import get_settings
+from app.domain.dtos.message import message_to_dto
 from app.domain.entities.message import Message
+from app.domain.entities.room import Room
 from app.domain.entities.user import User
-from app.domain.exceptions.message import MessageNotFound, MessagePermissionError
+from app.domain.exceptions.message import (
+    InvalidCursor,
+    MessageNotFound,
+    MessagePermissionError,
+)
+from app.domain.exceptions.storage import StorageOverloaded
 from app.domain.exceptions.user import UserNotFound
 from app.domain.services.message import MessageService
 
 
 @pytest.fixture
-def service(message_repo, user_repo, membership_repo, connection_port, outbox_repo, tm):
+def service(
+    message_repo,
+    user_repo,
+    room_repo,
+    membership_repo,
+    connection_port,
+    outbox_repo,
+    recent_messages_cache,
+    username_cache,
+    room_retention_cache,
+    tm,
+):
+    room_repo.get_by_id.return_value = None
     return MessageService(
         message_repo=message_repo,
         user_repo=user_repo,
+        room_repo=room_repo,
         membership_repo=membership_repo,
         connection_port=connection_port,
         outbox_repo=outbox_repo,
+        recent_messages_cache=recent_messages_cache,
+        username_cache=username_cache,
+        room_retention_cache=room_retention_cache,
         transaction_manager=tm,
     )
 
@@ -51,7 +74,7 @@ class TestMessageService:
         sample_user,
     ):
         room_id = uuid4()
-        user_repo.get_by_id.return_value = sample_user
+        user_repo.get_by_ids.return_value = [sample_user]
         membership_repo.exists.return_value = True
 
         saved_message = Message(room_id=room_id, user_id=sample_user.id, content="hi")
@@ -62,7 +85,7 @@ class TestMessageService:
             room_id=room_id, user_id=sample_user.id, content="hi"
         )
 
-        user_repo.get_by_id.assert_awaited_once_with(user_id=sample_user.id)
+        user_repo.get_by_ids.assert_awaited_once_with(user_ids={sample_user.id})
         membership_repo.exists.assert_awaited_once_with(
             room_id=room_id, user_id=sample_user.id
         )
@@ -80,8 +103,8 @@ class TestMessageService:
     @pytest.mark.parametrize(
         ("user_exists", "membership_exists", "expected_exception"),
         [
-            (None, True, UserNotFound),
-            (AsyncMock(), False, MessagePermissionError),
+            (False, True, UserNotFound),
+            (True, False, MessagePermissionError),
         ],
     )
     async def test_validate_user_failures(
@@ -94,7 +117,11 @@ class TestMessageService:
         expected_exception,
     ):
         user_id, room_id = uuid4(), uuid4()
-        user_repo.get_by_id.return_value = user_exists
+        user_repo.get_by_ids.return_value = (
+            [User(id=user_id, username="john", hashed_password="hashed-pass")]
+            if user_exists
+            else []
+        )
         membership_repo.exists.return_value = membership_exists
         with pytest.raises(expected_exception):
             await service._validate_user(user_id=user_id, room_id=room_id)
@@ -111,14 +138,14 @@ class TestMessageService:
     ):
         new_content = "new content"
         message_repo.get_by_id.return_value = sample_message
-        user_repo.get_by_id.return_value = sample_user
+        user_repo.get_by_ids.return_value = [sample_user]
         membership_repo.exists.return_value = True
 
         result = await service.edit_message(
             sample_message.id, sample_user.id, new_content
         )
 
-        message_repo.save.assert_awaited()
+        message_repo.update.assert_awaited()
         connection_port.broadcast_event.assert_awaited_once()
         _, kwargs = connection_port.broadcast_event.await_args
         assert kwargs["event_type"] == BroadcastEventType.MESSAGE_EDITED
@@ -127,11 +154,13 @@ class TestMessageService:
         assert result.content == new_content
         assert result.username == "john"
 
-    async def test_edit_message_not_found(self, service, message_repo, user_repo):
-        user_repo.get_by_id.return_value = AsyncMock()
+    async def test_edit_message_not_found(
+        self, service, message_repo, user_repo, sample_user
+    ):
+        user_repo.get_by_ids.return_value = [sample_user]
         message_repo.get_by_id.return_value = None
         with pytest.raises(MessageNotFound):
-            await service.edit_message(uuid4(), uuid4(), "edit")
+            await service.edit_message(uuid4(), sample_user.id, "edit")
 
     async def test_edit_message_permission_error(
         self,
@@ -140,10 +169,11 @@ class TestMessageService:
         user_repo,
         membership_repo,
         sample_message,
-        sample_user,
     ):
         other_user_id = uuid4()
-        user_repo.get_by_id.return_value = sample_user
+        user_repo.get_by_ids.return_value = [
+            User(id=other_user_id, username="bob", hashed_password="hashed-pass")
+        ]
         message_repo.get_by_id.return_value = sample_message
         membership_repo.exists.return_value = False
         with pytest.raises(MessagePermissionError):
@@ -160,7 +190,7 @@ class TestMessageService:
         sample_user,
     ):
         message_repo.get_by_id.return_value = sample_message
-        user_repo.get_by_id.return_value = sample_user
+        user_repo.get_by_ids.return_value = [sample_user]
         membership_repo.exists.return_value = True
 
         await service.delete_message(sample_message.id, sample_user.id)
@@ -179,8 +209,8 @@ class TestMessageService:
     @pytest.mark.parametrize(
         ("user_exists", "message_exists", "expected_exception"),
         [
-            (None, True, UserNotFound),
-            (True, None, MessageNotFound),
+            (False, True, UserNotFound),
+            (True, False, MessageNotFound),
         ],
     )
     async def test_delete_message_failures(
@@ -190,15 +220,16 @@ class TestMessageService:
         message_repo,
         membership_repo,
         sample_message,
+        sample_user,
         user_exists,
         message_exists,
         expected_exception,
     ):
-        user_repo.get_by_id.return_value = AsyncMock() if user_exists else None
+        user_repo.get_by_ids.return_value = [sample_user] if user_exists else []
         message_repo.get_by_id.return_value = sample_message if message_exists else None
         membership_repo.exists.return_value = True
         with pytest.raises(expected_exception):
-            await service.delete_message(uuid4(), uuid4())
+            await service.delete_message(uuid4(), sample_user.id)
 
     async def test_delete_message_permission_error(
         self,
@@ -210,13 +241,19 @@ class TestMessageService:
         sample_user,
     ):
         message_repo.get_by_id.return_value = sample_message
-        user_repo.get_by_id.return_value = sample_user
+        user_repo.get_by_ids.return_value = [sample_user]
         membership_repo.exists.return_value = False
         with pytest.raises(MessagePermissionError):
             await service.delete_message(sample_message.id, sample_user.id)
 
     async def test_get_recent_messages_success(
-        self, service, message_repo, membership_repo, user_repo, sample_user
+        self,
+        service,
+        message_repo,
+        membership_repo,
+        user_repo,
+        recent_messages_cache,
+        sample_user,
     ):
         room_id = uuid4()
         user_id = sample_user.id
@@ -236,9 +273,468 @@ class TestMessageService:
         )
 
         message_repo.get_recent_by_room.assert_awaited_once_with(
-            room_id=room_id, limit=5, before=None
+            room_id=room_id, limit=200, before=None, expiring=False
         )
         user_repo.get_by_ids.assert_awaited_once()
+        recent_messages_cache.fill.assert_awaited_once()
+        _, kwargs = recent_messages_cache.fill.await_args
+        assert kwargs["complete"] is True
+        assert kwargs["generation"] == 0
         assert len(result) == 1
         assert result[0].content == "hello"
         assert result[0].username == "john"
+
+    async def test_fill_carries_generation_read_before_snapshot(
+        self,
+        service,
+        message_repo,
+        membership_repo,
+        user_repo,
+        recent_messages_cache,
+        sample_user,
+    ):
+        membership_repo.exists.return_value = True
+        user_repo.get_by_ids.return_value = [sample_user]
+        calls: list[str] = []
+
+        async def _generation(**_kwargs):
+            calls.append("generation")
+            return 7
+
+        async def _snapshot(**_kwargs):
+            calls.append("snapshot")
+            return []
+
+        recent_messages_cache.get_generation.side_effect = _generation
+        message_repo.get_recent_by_room.side_effect = _snapshot
+
+        await service.get_recent_messages(uuid4(), sample_user.id, limit=5, before=None)
+
+        assert calls == ["generation", "snapshot"]
+        assert recent_messages_cache.fill.await_args.kwargs["generation"] == 7
+
+    async def test_get_messages_page_returns_next_cursor(
+        self, service, message_repo, membership_repo, user_repo, sample_user
+    ):
+        room_id = uuid4()
+        membership_repo.exists.return_value = True
+        user_repo.get_by_ids.return_value = [sample_user]
+        messages = [
+            Message(
+                room_id=room_id,
+                user_id=sample_user.id,
+                content=f"msg {i}",
+                created_at=datetime(2025, 1, 1, 12, 0, 10 - i, tzinfo=UTC),
+            )
+            for i in range(3)
+        ]
+        message_repo.get_recent_by_room.return_value = messages
+
+        page = await service.get_messages_page(
+            room_id=room_id, user_id=sample_user.id, limit=2, cursor=None
+        )
+
+        message_repo.get_recent_by_room.assert_awaited_once_with(
+            room_id=room_id, limit=200, before=None, expiring=False
+        )
+        assert [item.content for item in page.items] == ["msg 0", "msg 1"]
+        assert page.next_cursor is not None
+
+        message_repo.get_recent_by_room.reset_mock()
+        message_repo.get_recent_by_room.return_value = messages[2:]
+        next_page = await service.get_messages_page(
+            room_id=room_id, user_id=sample_user.id, limit=2, cursor=page.next_cursor
+        )
+
+        _, kwargs = message_repo.get_recent_by_room.await_args
+        assert kwargs["limit"] == 3
+        assert kwargs["start_after"] == (messages[1].created_at, messages[1].id)
+        assert [item.content for item in next_page.items] == ["msg 2"]
+        assert next_page.next_cursor is None
+
+    async def test_get_messages_page_rejects_foreign_cursor(
+        self, service, membership_repo, user_repo, sample_user, sample_message
+    ):
+        membership_repo.exists.return_value = True
+        user_repo.get_by_ids.return_value = [sample_user]
+        cursor = service._encode_message_cursor(message=sample_message)
+
+        with pytest.raises(InvalidCursor):
+            await service.get_messages_page(
+                room_id=uuid4(), user_id=sample_user.id, limit=10, cursor=cursor
+            )
+        with pytest.raises(InvalidCursor):
+            await service.get_messages_page(
+                room_id=sample_message.room_id,
+                user_id=sample_user.id,
+                limit=10,
+                cursor=cursor[:-2] + "xx",
+            )
+        for forged in ("é.x", f"{cursor.partition('.')[0]}.é"):
+            with pytest.raises(InvalidCursor):
+                await service.get_messages_page(
+                    room_id=sample_message.room_id,
+                    user_id=sample_user.id,
+                    limit=10,
+                    cursor=forged,
+                )
+
+    async def test_get_recent_messages_served_from_buffer(
+        self,
+        service,
+        message_repo,
+        membership_repo,
+        user_repo,
+        recent_messages_cache,
+        sample_user,
+        sample_message,
+    ):
+        membership_repo.exists.return_value = True
+        user_repo.get_by_ids.return_value = [sample_user]
+        cached = [message_to_dto(message=sample_message, username="john")]
+        recent_messages_cache.get_recent.return_value = cached
+
+        result = await service.get_recent_messages(
+            sample_message.room_id, sample_user.id, limit=5, before=None
+        )
+
+        assert result == cached
+        message_repo.get_recent_by_room.assert_not_awaited()
+        user_repo.get_by_ids.assert_awaited_once_with(user_ids={sample_user.id})
+
+    async def test_message_writes_update_buffer(
+        self,
+        service,
+        message_repo,
+        user_repo,
+        membership_repo,
+        recent_messages_cache,
+        sample_message,
+        sample_user,
+    ):
+        user_repo.get_by_ids.return_value = [sample_user]
+        membership_repo.exists.return_value = True
+        message_repo.get_by_id.return_value = sample_message
+
+        sent = await service.send_message(
+            room_id=sample_message.room_id, user_id=sample_user.id, content="hi"
+        )
+        recent_messages_cache.push.assert_awaited_once_with(
+            message=sent, only_existing=False, not_before=None
+        )
+
+        recent_messages_cache.push.reset_mock()
+        edited = await service.edit_message(sample_message.id, sample_user.id, "edit")
+        recent_messages_cache.push.assert_awaited_once_with(
+            message=edited, only_existing=True, not_before=None
+        )
+
+        await service.delete_message(sample_message.id, sample_user.id)
+        recent_messages_cache.remove.assert_awaited_once_with(
+            room_id=sample_message.room_id, created_at=sample_message.created_at
+        )
+
+    async def test_usernames_resolved_from_cache(
+        self,
+        service,
+        message_repo,
+        membership_repo,
+        user_repo,
+        username_cache,
+        sample_user,
+        sample_message,
+    ):
+        membership_repo.exists.return_value = True
+        username_cache.get_many.return_value = {sample_user.id: sample_user.username}
+        message_repo.get_recent_by_room.return_value = [sample_message]
+
+        result = await service.get_recent_messages(
+            sample_message.room_id, sample_user.id, limit=5, before=None
+        )
+
+        assert [item.username for item in result] == ["john"]
+        user_repo.get_by_ids.assert_not_awaited()
+        username_cache.set_many.assert_not_awaited()
+
+    async def test_export_room_messages_streams_pages(
+        self,
+        service,
+        message_repo,
+        membership_repo,
+        user_repo,
+        sample_user,
+        sample_message,
+    ):
+        membership_repo.exists.return_value = True
+        user_repo.get_by_ids.return_value = [sample_user]
+
+        async def _pages(**_):
+            yield [sample_message]
+            yield [sample_message]
+
+        message_repo.iter_by_room.side_effect = _pages
+
+        pages = await service.export_room_messages(
+            room_id=sample_message.room_id, user_id=sample_user.id
+        )
+        result = [page async for page in pages]
+
+        assert [len(page) for page in result] == [1, 1]
+        assert result[0][0].username == "john"
+        _, kwargs = message_repo.iter_by_room.call_args
+        assert kwargs["room_id"] == sample_message.room_id
+
+    async def test_export_room_messages_checks_membership_upfront(
+        self, service, message_repo, membership_repo, user_repo, sample_user
+    ):
+        membership_repo.exists.return_value = False
+        user_repo.get_by_ids.return_value = [sample_user]
+
+        with pytest.raises(MessagePermissionError):
+            await service.export_room_messages(room_id=uuid4(), user_id=sample_user.id)
+        message_repo.iter_by_room.assert_not_called()
+
+    async def test_get_user_messages_enriches_and_pages(
+        self, service, message_repo, room_repo, user_repo, sample_user
+    ):
+        room = Room(name="general", created_by=sample_user.id, is_public=True)
+        messages = [
+            Message(
+                room_id=room.id,
+                user_id=sample_user.id,
+                content=f"msg {i}",
+                created_at=datetime(2025, 1, 1, 12, 0, 10 - i, tzinfo=UTC),
+            )
+            for i in range(3)
+        ]
+        message_repo.get_recent_by_user.return_value = messages
+        room_repo.get_by_ids.return_value = [room]
+        user_repo.get_by_ids.return_value = [sample_user]
+
+        page = await service.get_user_messages(
+            user_id=sample_user.id, requested_by=sample_user.id, limit=2, cursor=None
+        )
+
+        message_repo.get_recent_by_user.assert_awaited_once_with(
+            user_id=sample_user.id, limit=3, start_after=None
+        )
+        assert [item.content for item in page.items] == ["msg 0", "msg 1"]
+        assert {item.room_name for item in page.items} == {"general"}
+        assert page.items[0].username == "john"
+        assert page.next_cursor is not None
+
+        await service.get_user_messages(
+            user_id=sample_user.id,
+            requested_by=sample_user.id,
+            limit=2,
+            cursor=page.next_cursor,
+        )
+        _, kwargs = message_repo.get_recent_by_user.await_args
+        assert kwargs["start_after"] == messages[1].created_at
+
+    async def test_get_user_messages_requires_self_or_admin(
+        self, service, message_repo, sample_user
+    ):
+        with pytest.raises(MessagePermissionError):
+            await service.get_user_messages(
+                user_id=sample_user.id, requested_by=uuid4(), limit=10, cursor=None
+            )
+        message_repo.get_recent_by_user.assert_not_awaited()
+
+    async def test_purge_user_messages(
+        self,
+        service,
+        message_repo,
+        outbox_repo,
+        connection_port,
+        recent_messages_cache,
+        sample_user,
+        monkeypatch,
+    ):
+        admin_id = uuid4()
+        monkeypatch.setattr(get_settings(), "admin_user_ids", [admin_id])
+        monkeypatch.setattr(get_settings(), "message_purge_batch_size", 2)
+        room_ids = [uuid4(), uuid4()]
+        messages = [
+            Message(room_id=room_ids[i % 2], user_id=sample_user.id, content="spam")
+            for i in range(5)
+        ]
+
+        async def _pages(**_):
+            yield messages[:3]
+            yield messages[3:]
+
+        message_repo.iter_by_user.side_effect = _pages
+
+        result = await service.purge_user_messages(
+            user_id=sample_user.id, requested_by=admin_id
+        )
+
+        assert result.deleted_count == 5
+        assert result.room_count == 2
+        assert message_repo.delete_many.await_count == 3
+        assert message_repo.delete_user_archive.await_count == 2
+        assert outbox_repo.save_many.await_count == 2
+        outbox_repo.save.assert_not_awaited()
+        # one event per room and page
+        assert connection_port.broadcast_event.await_count == 4
+        recent_messages_cache.invalidate.assert_any_await(room_id=room_ids[0])
+        recent_messages_cache.invalidate.assert_any_await(room_id=room_ids[1])
+        broadcast_ids: list[str] = []
+        for call in connection_port.broadcast_event.await_args_list:
+            assert call.kwargs["event_type"] == BroadcastEventType.MESSAGES_PURGED
+            payload = call.kwargs["event_payload"].payload
+            assert payload["user_id"] == str(sample_user.id)
+            broadcast_ids.extend(payload["message_ids"])
+        assert sorted(broadcast_ids) == sorted(str(m.id) for m in messages)
+
+    async def test_purge_failure_still_flushes_deleted_batches(
+        self,
+        service,
+        message_repo,
+        outbox_repo,
+        connection_port,
+        recent_messages_cache,
+        sample_user,
+        monkeypatch,
+    ):
+        admin_id = uuid4()
+        monkeypatch.setattr(get_settings(), "admin_user_ids", [admin_id])
+        monkeypatch.setattr(get_settings(), "message_purge_batch_size", 2)
+        room_id = uuid4()
+        messages = [
+            Message(room_id=room_id, user_id=sample_user.id, content="spam")
+            for _ in range(4)
+        ]
+
+        async def _pages(**_):
+            yield messages
+
+        message_repo.iter_by_user.side_effect = _pages
+        message_repo.delete_many.side_effect = [None, StorageOverloaded()]
+
+        with pytest.raises(StorageOverloaded):
+            await service.purge_user_messages(
+                user_id=sample_user.id, requested_by=admin_id
+            )
+
+        outbox_repo.save_many.assert_awaited_once()
+        recent_messages_cache.invalidate.assert_awaited_once_with(room_id=room_id)
+        connection_port.broadcast_event.assert_awaited_once()
+        payload = connection_port.broadcast_event.await_args.kwargs["event_payload"]
+        assert payload.payload["message_ids"] == [str(m.id) for m in messages[:2]]
+        message_repo.delete_user_archive.assert_awaited_once_with(
+            user_id=sample_user.id, room_id=room_id
+        )
+
+    async def test_purge_user_messages_requires_admin(
+        self, service, message_repo, sample_user
+    ):
+        with pytest.raises(MessagePermissionError):
+            await service.purge_user_messages(
+                user_id=sample_user.id, requested_by=sample_user.id
+            )
+        message_repo.iter_by_user.assert_not_called()
+
+    async def test_send_applies_room_retention(
+        self,
+        service,
+        message_repo,
+        room_repo,
+        user_repo,
+        membership_repo,
+        room_retention_cache,
+        sample_user,
+        sample_message,
+    ):
+        room_repo.get_by_id.return_value = Room(
+            name="general", is_public=True, created_by=sample_user.id, retention_days=7
+        )
+        user_repo.get_by_ids.return_value = [sample_user]
+        membership_repo.exists.return_value = True
+
+        await service.send_message(
+            room_id=sample_message.room_id, user_id=sample_user.id, content="hi"
+        )
+
+        assert message_repo.save.await_args.kwargs["ttl_seconds"] == 7 * 86400
+        room_retention_cache.set.assert_awaited_once_with(
+            room_id=sample_message.room_id, retention_days=7
+        )
+
+    async def test_buffer_trimmed_to_room_retention(
+        self,
+        service,
+        message_repo,
+        user_repo,
+        membership_repo,
+        recent_messages_cache,
+        room_retention_cache,
+        sample_user,
+        sample_message,
+    ):
+        room_retention_cache.get.return_value = 7
+        user_repo.get_by_ids.return_value = [sample_user]
+        membership_repo.exists.return_value = True
+
+        started = datetime.now(UTC)
+        await service.send_message(
+            room_id=sample_message.room_id, user_id=sample_user.id, content="hi"
+        )
+        await service.get_recent_messages(
+            sample_message.room_id, sample_user.id, limit=5, before=None
+        )
+
+        # rooms with a retention policy keep their rows in the expiring table
+        assert message_repo.get_recent_by_room.await_args.kwargs["expiring"] is True
+        push_cutoff = recent_messages_cache.push.await_args.kwargs["not_before"]
+        read_cutoff = recent_messages_cache.get_recent.await_args.kwargs["not_before"]
+        for cutoff in (push_cutoff, read_cutoff):
+            assert (
+                started - timedelta(days=7)
+                <= cutoff
+                <= datetime.now(UTC) - timedelta(days=7)
+            )
+
+    async def test_send_uses_cached_retention(
+        self,
+        service,
+        message_repo,
+        room_repo,
+        user_repo,
+        membership_repo,
+        room_retention_cache,
+        sample_user,
+        sample_message,
+    ):
+        room_retention_cache.get.return_value = 0
+        user_repo.get_by_ids.return_value = [sample_user]
+        membership_repo.exists.return_value = True
+
+        await service.send_message(
+            room_id=sample_message.room_id, user_id=sample_user.id, content="hi"
+        )
+
+        assert message_repo.save.await_args.kwargs["ttl_seconds"] is None
+        room_repo.get_by_id.assert_not_awaited()
+
+    async def test_edit_keeps_original_ttl(
+        self,
+        service,
+        message_repo,
+        room_retention_cache,
+        user_repo,
+        membership_repo,
+        sample_user,
+        sample_message,
+    ):
+        room_retention_cache.get.return_value = 1
+        user_repo.get_by_ids.return_value = [sample_user]
+        membership_repo.exists.return_value = True
+        sample_message.created_at = datetime.now(UTC) - timedelta(days=6)
+        message_repo.get_by_id.return_value = sample_message
+        message_repo.get_ttl.return_value = None
+
+        await service.edit_message(sample_message.id, sample_user.id, "edited")
+
+        assert message_repo.update.await_args.kwargs["ttl_seconds"] is None
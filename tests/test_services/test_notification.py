@@ -11,10 +11,14 @@ from app.domain.services.notification import NotificationService
 
 class TestNotificationService:
     @fixture
-    def service(self, notif_repo, outbox_repo, tm) -> NotificationService:
+    def service(
+        self, notif_repo, outbox_repo, user_repo, username_cache, tm
+    ) -> NotificationService:
         return NotificationService(
             notification_repo=notif_repo,
             outbox_repo=outbox_repo,
+            user_repo=user_repo,
+            username_cache=username_cache,
             transaction_manager=tm,
         )
 
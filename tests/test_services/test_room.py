@@ -30,6 +30,8 @@ class TestRoomService:
         membership_repo,
         outbox_repo,
         connection_port,
+        username_cache,
+        reclaim_repo,
         tm,
     ):
         return RoomService(
@@ -39,6 +41,8 @@ class TestRoomService:
             membership_repo,
             outbox_repo,
             connection_port,
+            username_cache,
+            reclaim_repo,
             tm,
         )
 
@@ -108,6 +112,27 @@ class TestRoomService:
         outbox_repo.save.assert_awaited_once()
         tm.run_in_transaction.assert_awaited_once()
 
+    async def test_update_room_retention(self, service, room_repo):
+        created_by = uuid4()
+        room = Room(name="R", is_public=True, created_by=created_by, retention_days=30)
+        room_repo.get_by_id.return_value = room
+        room_repo.save.return_value = room
+
+        result = await service.update_room(
+            room.id, RoomUpdateDTO(created_by=created_by, retention_days=7)
+        )
+        assert result.retention_days == 7
+
+        result = await service.update_room(
+            room.id, RoomUpdateDTO(created_by=created_by, retention_days=0)
+        )
+        assert result.retention_days is None
+
+        with pytest.raises(NoChangesDetected):
+            await service.update_room(
+                room.id, RoomUpdateDTO(created_by=created_by, retention_days=0)
+            )
+
     async def test_update_room_not_found(self, service, room_repo):
         room_repo.get_by_id.return_value = None
         with pytest.raises(RoomNotFound):
@@ -129,7 +154,9 @@ class TestRoomService:
         with pytest.raises(NoChangesDetected):
             await service.update_room(room.id, dto)
 
-    async def test_delete_room_success(self, service, room_repo, outbox_repo, tm):
+    async def test_delete_room_success(
+        self, service, room_repo, outbox_repo, reclaim_repo, tm
+    ):
         created_by = uuid4()
         room = Room(
             id=uuid4(), name="R", description="", is_public=True, created_by=created_by
@@ -141,6 +168,25 @@ class TestRoomService:
         room_repo.delete_by_id.assert_awaited_once()
         outbox_repo.save.assert_awaited_once()
         tm.run_in_transaction.assert_awaited_once()
+        reclaim_repo.enqueue.assert_awaited_once()
+        assert reclaim_repo.enqueue.await_args.kwargs["room_id"] == room.id
+
+    @pytest.mark.parametrize("owner_leaves", [True, False])
+    async def test_leave_room_reclaims_only_deleted_room(
+        self, service, room_repo, membership_repo, reclaim_repo, owner_leaves
+    ):
+        owner_id = uuid4()
+        room = Room(
+            id=uuid4(), name="R", description="", is_public=True, created_by=owner_id
+        )
+        room_repo.get_by_id.return_value = room
+        membership_repo.exists.return_value = True
+
+        user_id = owner_id if owner_leaves else uuid4()
+        await service.leave_room(room_id=room.id, user_id=user_id)
+
+        assert reclaim_repo.enqueue.await_count == int(owner_leaves)
+        assert room_repo.delete_by_id.await_count == int(owner_leaves)
 
     async def test_delete_room_not_found(self, service, room_repo):
         room_repo.get_by_id.return_value = None